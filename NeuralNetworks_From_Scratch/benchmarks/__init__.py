@@ -0,0 +1,2 @@
+# Benchmarks for the neural_network package.
+# Run from the project root, e.g. `python -m benchmarks.precision`.
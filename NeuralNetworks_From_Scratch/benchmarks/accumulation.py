@@ -0,0 +1,52 @@
+"""
+Gradient accumulation: memory and throughput for one large effective batch.
+
+Trains one epoch of SimpleNN with a fixed effective batch size, split into
+K micro-batches (accumulate_steps=K, batch_size=effective/K) for several K,
+and reports samples/sec and the peak memory fit() allocates.
+
+    python -m benchmarks.accumulation [--effective-batch 4096] [--steps 1 4 16]
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from neural_network.model import SimpleNN
+from neural_network.optimizer import Adam
+from benchmarks.common import mnist_or_synthetic
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--effective-batch', type=int, default=4096)
+    parser.add_argument('--steps', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--hidden-size', type=int, default=512)
+    parser.add_argument('--dtype', default='float32')
+    parser.add_argument('--samples', type=int, default=32768)
+    args = parser.parse_args()
+
+    X, y, source = mnist_or_synthetic(train=True, n_samples=args.samples)
+    print(f"Data: {source}, {X.shape[0]} rows, effective batch {args.effective_batch}")
+    for steps in args.steps:
+        batch_size = args.effective_batch // steps
+        np.random.seed(0)
+        model = SimpleNN(784, args.hidden_size, 10, dtype=args.dtype)
+
+        def epoch():
+            model.fit(X, y, epochs=1, batch_size=batch_size, optimizer=Adam(0.001),
+                      verbose=False, accumulate_steps=steps, prefetch=0)
+
+        epoch()
+        start = time.perf_counter()
+        epoch()
+        seconds = time.perf_counter() - start
+        tracemalloc.start()
+        try:
+            epoch()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        print(f"K={steps:3d} x {batch_size:5d} rows: {X.shape[0] / seconds:9.0f} samples/s  "
+              f"peak {peak / 2**20:6.1f} MiB")
+
+if __name__ == "__main__":
+    main()
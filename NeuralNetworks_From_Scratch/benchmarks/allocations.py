@@ -0,0 +1,85 @@
+"""
+Allocation check for the SimpleNN / Sequential training step (including Adam).
+
+Runs a few warm-up steps (which allocate the workspaces), then traces
+steady-state forward/loss/backward/update steps with tracemalloc and fails if
+any step raises the traced peak by more than a small fixed budget plus a few
+bytes per row (the loss's label-gather index temporaries). The budget does
+not grow with the layer sizes: a broadcast or mixed-dtype ufunc call, whose
+casting buffer NumPy allocates on every call (up to np.getbufsize()
+elements), fails it.
+
+    python -m benchmarks.allocations [--batch-size 128] [--dtype float32]
+    python -m benchmarks.allocations --hidden-size 256 128 64   # Sequential only
+
+Without --hidden-size it checks both SimpleNN (hidden 128) and a deep
+Sequential stack (784-256-128-64-10), where a per-layer allocation would
+show up once per hidden layer.
+"""
+import argparse
+import sys
+import tracemalloc
+import numpy as np
+from neural_network.model import SimpleNN, Sequential
+from neural_network.data import normalize
+from neural_network.optimizer import Adam
+
+DEFAULT_STACKS = ([128], [256, 128, 64])
+
+def step(model, optimizer, X_uint8, y):
+    X = normalize(X_uint8, model.policy.compute_dtype, out=model.workspace(X_uint8.shape[0])['X'])
+    _, _, grads = model.train_step(X, y)
+    optimizer.update(model.params, grads)
+    model.sync_params()
+
+def peak_step_allocation(model, optimizer, X_uint8, y, warmup=3, steps=20):
+    """Largest growth of the traced peak over a single steady-state step, in bytes"""
+    for _ in range(warmup):
+        step(model, optimizer, X_uint8, y)
+    tracemalloc.start()
+    try:
+        worst = 0
+        for _ in range(steps):
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+            step(model, optimizer, X_uint8, y)
+            worst = max(worst, tracemalloc.get_traced_memory()[1] - current)
+    finally:
+        tracemalloc.stop()
+    return worst
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--hidden-size', type=int, nargs='+', default=None,
+                        help="one size -> SimpleNN, several -> Sequential "
+                             "(default: SimpleNN 128 and Sequential 256 128 64)")
+    parser.add_argument('--dtype', default='float64')
+    parser.add_argument('--threshold', type=int, default=None,
+                        help="bytes; defaults to 8192 + 32 per batch row")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 256, size=(args.batch_size, 784), dtype=np.uint8)
+    y = rng.integers(0, 10, size=args.batch_size)
+    if args.threshold is None:
+        args.threshold = 8192 + 32 * args.batch_size
+
+    failed = False
+    for hidden_size in ([args.hidden_size] if args.hidden_size else DEFAULT_STACKS):
+        if len(hidden_size) == 1:
+            model = SimpleNN(784, hidden_size[0], 10, dtype=args.dtype)
+        else:
+            model = Sequential.from_sizes([784, *hidden_size, 10], dtype=args.dtype)
+        worst = peak_step_allocation(model, Adam(), X, y)
+        name = f"{type(model).__name__} 784-{'-'.join(map(str, hidden_size))}-10"
+        ok = worst < args.threshold
+        failed |= not ok
+        print(f"{name}: peak allocation per steady-state step {worst} bytes "
+              f"(threshold {args.threshold}) {'OK' if ok else 'FAIL'}")
+    if failed:
+        print("FAIL: the training step allocates large arrays")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
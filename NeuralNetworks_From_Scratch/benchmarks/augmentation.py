@@ -0,0 +1,64 @@
+"""
+Cost of online augmentation: inline vs. AugmentedLoader worker processes.
+
+Times Augmenter on one batch, then one SimpleNN training epoch without
+augmentation, with augmentation inline in the training loop
+(n_workers=0), and with worker pools of increasing size. With enough
+spare cores the worker rows approach the unaugmented epoch time.
+
+    python -m benchmarks.augmentation [--samples 20000] [--workers 1 2 4] [--elastic-alpha 1.5]
+"""
+import argparse
+import os
+import time
+import numpy as np
+from neural_network.augmentation import Augmenter, AugmentedLoader
+from neural_network.data import BatchLoader
+from neural_network.model import SimpleNN
+from neural_network.optimizer import SGD
+from benchmarks.common import mnist_or_synthetic
+
+def epoch_time(loader, dtype):
+    np.random.seed(0)
+    model = SimpleNN(784, 128, 10, dtype=dtype)
+    optimizer = SGD()
+    start = time.perf_counter()
+    for X_batch, y_batch in loader:
+        _, _, grads = model.train_step(X_batch, y_batch)
+        optimizer.update(model.params, grads)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--elastic-alpha', type=float, default=1.5)
+    parser.add_argument('--dtype', default='float32')
+    args = parser.parse_args()
+
+    X, y, source = mnist_or_synthetic(train=True, n_samples=args.samples)
+    X = np.ascontiguousarray(X)
+    dtype = np.dtype(args.dtype)
+    augment = Augmenter(elastic_alpha=args.elastic_alpha)
+
+    rng = np.random.default_rng(0)
+    augment(X[:args.batch_size], rng=rng)
+    start = time.perf_counter()
+    for _ in range(20):
+        augment(X[:args.batch_size], rng=rng)
+    per_batch = (time.perf_counter() - start) / 20
+    print(f"Data: {source}, {X.shape[0]} samples, batch {args.batch_size}, {dtype.name}, "
+          f"{os.cpu_count()} CPUs; augment {1e3 * per_batch:.2f} ms/batch")
+
+    base = epoch_time(BatchLoader(X, y, args.batch_size, dtype=dtype), dtype)
+    print(f"{'no augmentation':>22}: epoch {base:6.2f} s")
+    for n_workers in [0] + args.workers:
+        with AugmentedLoader(X, y, args.batch_size, augment, n_workers=n_workers,
+                             dtype=dtype) as loader:
+            seconds = epoch_time(loader, dtype)
+        name = 'inline' if n_workers == 0 else f'{n_workers} worker(s)'
+        print(f"{name:>22}: epoch {seconds:6.2f} s ({seconds / base:4.2f}x unaugmented)")
+
+if __name__ == "__main__":
+    main()
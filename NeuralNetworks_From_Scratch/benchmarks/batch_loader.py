@@ -0,0 +1,77 @@
+"""
+Mini-batch pipeline cost: BatchLoader vs. the previous per-epoch
+`X_train[permutation]` copy followed by slicing.
+
+Reports time to the first batch of an epoch, the bytes allocated per
+epoch, and full-epoch training time with SimpleNN.
+
+    python -m benchmarks.batch_loader [--samples 60000] [--batch-size 128] [--prefetch 2]
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from neural_network.data import BatchLoader, normalize
+from neural_network.model import SimpleNN
+from neural_network.optimizer import SGD
+from benchmarks.common import mnist_or_synthetic
+
+def legacy_batches(X, y, batch_size, dtype):
+    """What fit did before BatchLoader"""
+    permutation = np.random.permutation(X.shape[0])
+    X_shuffled = X[permutation]
+    y_shuffled = y[permutation]
+    for i in range(0, X.shape[0], batch_size):
+        yield normalize(X_shuffled[i:i+batch_size], dtype), y_shuffled[i:i+batch_size]
+
+def first_batch_latency(make_batches):
+    start = time.perf_counter()
+    batches = make_batches()
+    next(batches)
+    elapsed = time.perf_counter() - start
+    batches.close()
+    return elapsed
+
+def epoch_peak_memory(make_batches):
+    tracemalloc.start()
+    for _ in make_batches():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def epoch_train_time(make_batches, model, optimizer):
+    start = time.perf_counter()
+    for X_batch, y_batch in make_batches():
+        _, _, grads = model.train_step(X_batch, y_batch)
+        optimizer.update(model.params, grads)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--samples', type=int, default=60000)
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--prefetch', type=int, default=2)
+    parser.add_argument('--dtype', default='float32')
+    args = parser.parse_args()
+
+    X, y, source = mnist_or_synthetic(train=True, n_samples=args.samples)
+    dtype = np.dtype(args.dtype)
+    print(f"Data: {source}, {X.shape[0]} samples ({X.dtype}), batch {args.batch_size}, {dtype.name}")
+
+    loader = BatchLoader(X, y, args.batch_size, prefetch=args.prefetch, dtype=dtype)
+    pipelines = {
+        'legacy copy': lambda: legacy_batches(X, y, args.batch_size, dtype),
+        f'BatchLoader(prefetch={args.prefetch})': lambda: iter(loader),
+    }
+    for name, make_batches in pipelines.items():
+        latency = first_batch_latency(make_batches)
+        peak = epoch_peak_memory(make_batches)
+        model = SimpleNN(784, 128, 10, dtype=dtype)
+        seconds = epoch_train_time(make_batches, model, SGD())
+        print(f"{name:>22}: first batch {1e3 * latency:8.2f} ms  "
+              f"epoch peak alloc {peak / 2**20:7.1f} MiB  "
+              f"train epoch {seconds:6.2f} s ({X.shape[0] / seconds:,.0f} samples/sec)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Checkpoint save/load latency.
+
+Saves a large Sequential model with Adam state, then reports how long a
+synchronous save takes, how long the training loop is blocked by an
+asynchronous save, and how long loading takes with and without
+memory-mapping (in a fresh process, including the first prediction).
+
+    python -m benchmarks.checkpoint [--sizes 784 2048 2048 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from neural_network.model import Sequential
+from neural_network.optimizer import Adam
+from neural_network.checkpoint import save_checkpoint, AsyncCheckpointer
+
+LOAD_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import numpy as np
+from neural_network.checkpoint import load_checkpoint
+imported = time.perf_counter()
+model, _ = load_checkpoint(sys.argv[1], mmap=sys.argv[2] == '1', optimizer=False)
+model.predict(np.zeros((1, model.input_size), dtype=np.uint8))
+done = time.perf_counter()
+print(imported - start, done - imported)
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[784, 2048, 2048, 10])
+    args = parser.parse_args()
+
+    model = Sequential.from_sizes(args.sizes)
+    optimizer = Adam()
+    rng = np.random.default_rng(0)
+    X = rng.random((64, args.sizes[0]))
+    y = rng.integers(0, args.sizes[-1], size=64)
+    _, _, grads = model.train_step(X, y)
+    optimizer.update(model.params, grads)
+    print(f"{model.params.flat.size:,} parameters, {model.params.nbytes / 2**20:.1f} MiB "
+          f"(+ {2 * model.params.nbytes / 2**20:.1f} MiB Adam state)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ckpt')
+        start = time.perf_counter()
+        save_checkpoint(path, model, optimizer)
+        print(f"{'synchronous save':>24}: {1e3 * (time.perf_counter() - start):8.1f} ms")
+
+        writer = AsyncCheckpointer()
+        for _ in range(2):  # the first call also allocates the staging buffers
+            start = time.perf_counter()
+            writer.save(path, model, optimizer)
+            blocked = time.perf_counter() - start
+            writer.wait()
+        print(f"{'async save (blocking)':>24}: {1e3 * blocked:8.1f} ms")
+
+        env = dict(os.environ, PYTHONPATH=os.getcwd())
+        for mmap in (False, True):
+            out = subprocess.run([sys.executable, '-c', LOAD_SCRIPT, path, str(int(mmap))],
+                                 env=env, capture_output=True, text=True, check=True).stdout
+            imported, loaded = map(float, out.split())
+            label = 'load + predict (mmap)' if mmap else 'load + predict (copy)'
+            print(f"{label:>24}: {1e3 * loaded:8.1f} ms  (imports {1e3 * imported:.0f} ms)")
+
+if __name__ == "__main__":
+    main()
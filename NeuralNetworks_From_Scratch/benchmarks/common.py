@@ -0,0 +1,28 @@
+import numpy as np
+from neural_network.data import load_mnist
+
+def mnist_or_synthetic(train=True, n_samples=None, seed=0):
+    """
+    Load the MNIST split used by main.py, falling back to synthetic
+    MNIST-shaped uint8 data (learnable labels) when the raw files are not
+    available.
+
+    Returns:
+        X (n_samples, 784) uint8, y (n_samples,) uint8, and the data source name
+    """
+    try:
+        X, y = load_mnist(root='./data', train=train)
+        source = 'mnist'
+    except FileNotFoundError:
+        rng = np.random.default_rng(seed)
+        n = n_samples or (60000 if train else 10000)
+        X = rng.integers(0, 256, size=(n, 784), dtype=np.uint8)
+        X[rng.random(X.shape) < 0.8] = 0  # MNIST is ~80% zeros
+        # Labels from a fixed random linear teacher (shared by both splits),
+        # so accuracy-based benchmarks have something to learn
+        teacher = np.random.default_rng(1234).standard_normal((784, 10))
+        y = np.argmax(X @ teacher, axis=1).astype(np.uint8)
+        source = 'synthetic'
+    if n_samples is not None:
+        X, y = X[:n_samples], y[:n_samples]
+    return X, y, source
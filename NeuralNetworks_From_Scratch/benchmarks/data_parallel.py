@@ -0,0 +1,57 @@
+"""
+Data-parallel training throughput: samples/sec against the worker count.
+
+Each worker is pinned to one BLAS thread so the scaling comes from the
+process pool alone. Compare against the single-process fit (workers=1).
+
+    python -m benchmarks.data_parallel [--workers 1 2 4 8] [--batch-size 512]
+"""
+import os
+
+# Must be set before numpy loads its BLAS (workers inherit it)
+for var in ('OPENBLAS_NUM_THREADS', 'OMP_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(var, '1')
+
+import argparse
+import time
+import numpy as np
+from neural_network.model import SimpleNN, Sequential
+from neural_network.optimizer import Adam
+from benchmarks.common import mnist_or_synthetic
+
+def run(n_workers, X, y, args):
+    np.random.seed(0)
+    if len(args.hidden_size) == 1:
+        model = SimpleNN(784, args.hidden_size[0], 10, dtype=args.dtype)
+    else:
+        model = Sequential.from_sizes([784, *args.hidden_size, 10], dtype=args.dtype)
+    start = time.perf_counter()
+    model.fit(X, y, epochs=args.epochs, batch_size=args.batch_size,
+              optimizer=Adam(), verbose=False, n_workers=n_workers)
+    return args.epochs * X.shape[0] / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    cpus = os.cpu_count() or 1
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, cpus} | {n for n in (8, 16) if n <= cpus}))
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=512)
+    parser.add_argument('--hidden-size', type=int, nargs='+', default=[128])
+    parser.add_argument('--dtype', default='float32')
+    args = parser.parse_args()
+
+    X, y, source = mnist_or_synthetic(train=True, n_samples=args.samples)
+    print(f"Data: {source}, {X.shape[0]} samples, batch {args.batch_size}, "
+          f"hidden {args.hidden_size}, {args.dtype}, {cpus} CPUs")
+
+    baseline = None
+    for n_workers in args.workers:
+        throughput = run(n_workers, X, y, args)
+        baseline = baseline or throughput
+        print(f"workers={n_workers:>3}: {throughput:10.0f} samples/sec  "
+              f"({throughput / baseline:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Serving latency: Model.predict vs. a frozen model for small requests.
+
+Times predict() on single samples and small batches of uint8 pixels for
+the trained model and for freeze() copies in float64 and float32, and
+reports the median latency per request.
+
+    python -m benchmarks.frozen [--hidden-size 128] [--batch-sizes 1 8 32]
+"""
+import argparse
+import statistics
+import time
+import numpy as np
+from neural_network.model import SimpleNN
+from benchmarks.common import mnist_or_synthetic
+
+def latency(fn, repeats):
+    for _ in range(10):
+        fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hidden-size', type=int, default=128)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--repeats', type=int, default=2000)
+    args = parser.parse_args()
+
+    X, _, source = mnist_or_synthetic(train=False, n_samples=max(args.batch_sizes))
+    X = np.ascontiguousarray(X)
+    np.random.seed(0)
+    model = SimpleNN(784, args.hidden_size, 10)
+    engines = {
+        'model.predict': model.predict,
+        'frozen float64': model.freeze().predict,
+        'frozen float32': model.freeze('float32').predict,
+    }
+    print(f"Data: {source}, 784-{args.hidden_size}-10, median latency per request")
+    for batch_size in args.batch_sizes:
+        # A single sample is passed as a 1-row batch to Model.predict
+        request = X[:batch_size]
+        line = [f"batch {batch_size:3d}:"]
+        base = None
+        for name, predict in engines.items():
+            seconds = latency(lambda: predict(request), args.repeats)
+            base = base or seconds
+            line.append(f"{name} {1e6 * seconds:7.1f} us ({base / seconds:4.1f}x)")
+        print('  '.join(line))
+    print(f"single sample, 1-D input: frozen float32 "
+          f"{1e6 * latency(lambda: engines['frozen float32'](X[0]), args.repeats):.1f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Gradient checks and golden-output regression checks for the fast paths.
+
+    python -m benchmarks.golden gradcheck            # analytic vs. finite differences
+    python -m benchmarks.golden check [--engine sparse|data_parallel|pipeline|all]
+    python -m benchmarks.golden record               # re-pin after an intended change
+
+`check` also compares streaming Metrics against a brute-force confusion
+matrix (uint8 labels with more classes than fit in a byte product),
+checks the learning rates of a second fit with a reused optimizer, then
+recomputes the fixed-seed cases in neural_network.golden.CASES
+(loss, logits, gradients and chunked predict_proba) with the chosen engine
+and compares them to benchmarks/golden.npz, recorded from the reference
+implementation. Both commands exit with status 1 on a failure.
+"""
+import argparse
+import os
+import sys
+import numpy as np
+from neural_network import golden
+from neural_network.gradcheck import check_model, check_layer, check_loss
+from neural_network.layers import DenseLayer
+from neural_network.loss_functions import SoftmaxCrossEntropy
+from neural_network.metrics import Metrics
+from neural_network.callbacks import Callback
+from neural_network.model import SimpleNN
+from neural_network.optimizer import SGD
+from neural_network.schedulers import CosineSchedule
+
+GOLDEN_PATH = os.path.join(os.path.dirname(__file__), 'golden.npz')
+GRADCHECK_TOLERANCE = 1e-6
+
+def gradcheck():
+    """Returns True if every relative error is below GRADCHECK_TOLERANCE"""
+    results = {}
+    for name, case in golden.CASES.items():
+        if case['dtype'] != 'float64':
+            continue
+        model, X, y = golden.make_case(case)
+        results[name] = check_model(model, X, y)
+    rng = np.random.default_rng(0)
+    for activation in ('relu', 'linear'):
+        np.random.seed(0)
+        layer = DenseLayer(12, 7, activation=activation)
+        results[f'DenseLayer {activation}'] = check_layer(layer, rng.standard_normal((5, 12)))
+    results['SoftmaxCrossEntropy'] = {
+        'dlogits': check_loss(SoftmaxCrossEntropy(), rng.standard_normal((6, 10)) * 3,
+                              rng.integers(0, 10, 6))}
+
+    passed = True
+    for name, errors in results.items():
+        worst = max(errors.values())
+        ok = worst < GRADCHECK_TOLERANCE
+        passed &= ok
+        detail = '  '.join(f"{key} {value:.1e}" for key, value in errors.items())
+        print(f"{'ok  ' if ok else 'FAIL'} {name:>22}: {detail}")
+    return passed
+
+def metrics_check():
+    """Metrics vs. a brute-force confusion matrix, with uint8 labels and 30 classes"""
+    n_classes = 30
+    rng = np.random.default_rng(0)
+    metrics = Metrics(n_classes, top_k=True)
+    expected = np.zeros((n_classes, n_classes), dtype=np.int64)
+    correct = 0
+    ok = True
+    for n in (3, 64, 17):
+        labels = rng.integers(0, n_classes, n).astype(np.uint8)
+        logits = rng.standard_normal((n, n_classes))
+        # Half the rows predict their label
+        logits[np.arange(0, n, 2), labels[::2]] += 10
+        batch_correct = metrics.update(logits, labels)
+        predicted = np.argmax(logits, axis=1)
+        np.add.at(expected, (labels, predicted), 1)
+        ok &= batch_correct == int(np.sum(predicted == labels))
+        correct += batch_correct
+    ok &= np.array_equal(metrics.confusion_matrix, expected) and correct == np.trace(expected)
+    print(f"{'ok  ' if ok else 'FAIL'} {'Metrics':>13} {'uint8 labels, 30 classes':>20}")
+    return bool(ok)
+
+class _LearningRates(Callback):
+    def on_train_start(self, logs):
+        self.optimizer = logs['optimizer']
+        self.rates = []
+
+    def on_batch_end(self, batch, logs):
+        self.rates.append(self.optimizer.lr)
+
+def schedule_check():
+    """
+    A reused optimizer: a schedule fit() sizes restarts on every fit, one
+    with its own total_steps keeps counting across fit calls
+    """
+    rng = np.random.default_rng(0)
+    X, y = rng.random((64, 20)), rng.integers(0, 5, 64)
+    ok = True
+    for total_steps in (None, 12):
+        schedule = CosineSchedule(0.1, total_steps=total_steps, min_lr=0.001)
+        optimizer = SGD(schedule)
+        expected = np.asarray(schedule.values(12))
+        rates = []
+        np.random.seed(0)
+        model = SimpleNN(20, 8, 5)
+        for epochs in (3, 3):
+            recorder = _LearningRates()
+            model.fit(X, y, epochs=epochs, batch_size=16, optimizer=optimizer,
+                      callbacks=[recorder], verbose=False)
+            rates.append(recorder.rates)
+        if total_steps is None:
+            # Both runs span their own 12 steps
+            ok &= np.allclose(rates[0], expected) and np.allclose(rates[1], expected)
+        else:
+            ok &= np.allclose(rates[0] + rates[1], np.concatenate([expected, [expected[-1]] * 12]))
+    print(f"{'ok  ' if ok else 'FAIL'} {'Schedule':>13} {'reused optimizer':>20}")
+    return bool(ok)
+
+def check(path, engines):
+    passed = metrics_check() & schedule_check()
+    for engine in engines:
+        failures = golden.verify(path, golden.ENGINES[engine])
+        for name, mismatches in failures.items():
+            ok = not mismatches
+            passed &= ok
+            detail = ', '.join(f"{key} (max err {error:.2e})" for key, error in mismatches)
+            print(f"{'ok  ' if ok else 'FAIL'} {engine:>13} {name:>20}{': ' + detail if detail else ''}")
+    return passed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('command', choices=['gradcheck', 'check', 'record'])
+    parser.add_argument('--engine', default='all', choices=['all', *golden.ENGINES])
+    parser.add_argument('--path', default=GOLDEN_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        golden.record(args.path)
+        print(f"Recorded {len(golden.CASES)} cases to {args.path}")
+        return
+    if args.command == 'gradcheck':
+        passed = gradcheck()
+    else:
+        passed = check(args.path, list(golden.ENGINES) if args.engine == 'all' else [args.engine])
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Inference memory and throughput: chunked predict/evaluate vs. one
+full-size forward pass.
+
+The input lives in a temporary uint8 memmap so the dataset itself is not
+counted; peak traced memory then reflects only what inference allocates.
+
+    python -m benchmarks.inference [--rows 200000] [--chunk 256 1024 4096]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from neural_network.data import normalize
+from neural_network.model import SimpleNN
+
+def traced(fn):
+    """Run fn, return (result, seconds, peak traced bytes)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--chunk', type=int, nargs='+', default=[256, 1024, 4096])
+    parser.add_argument('--dtype', default='float32')
+    args = parser.parse_args()
+
+    model = SimpleNN(784, 128, 10, dtype=args.dtype)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'X.u8')
+        X = np.memmap(path, dtype=np.uint8, mode='w+', shape=(args.rows, 784))
+        rng = np.random.default_rng(0)
+        for start in range(0, args.rows, 65536):
+            stop = min(start + 65536, args.rows)
+            X[start:stop] = rng.integers(0, 256, size=(stop - start, 784), dtype=np.uint8)
+        y = rng.integers(0, 10, size=args.rows).astype(np.uint8)
+        print(f"{args.rows} rows, {args.dtype}")
+
+        def full_forward():
+            # What evaluate did before: normalize and forward everything at once
+            logits = model.forward_logits(normalize(X, model.policy.compute_dtype))
+            return np.mean(np.argmax(logits, axis=1) == y)
+
+        if args.rows <= 1_000_000:
+            acc, seconds, peak = traced(full_forward)
+            model._workspaces.clear()
+            print(f"{'full forward':>18}: {args.rows / seconds:12,.0f} rows/sec  "
+                  f"peak {peak / 2**20:9.1f} MiB  acc {acc:.4f}")
+
+        for chunk in args.chunk:
+            (_, acc), seconds, peak = traced(lambda: model.evaluate(X, y, batch_size=chunk))
+            print(f"{'evaluate chunk=' + str(chunk):>18}: {args.rows / seconds:12,.0f} rows/sec  "
+                  f"peak {peak / 2**20:9.1f} MiB  acc {acc:.4f}")
+        del X
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Optimizer step cost: flat-buffer SGD/Adam vs. the previous per-key dict loop.
+
+Times `update` on SimpleNN-shaped parameters and counts the bytes
+allocated per step with tracemalloc.
+
+    python -m benchmarks.optimizers [--hidden-size 128] [--dtype float64] [--steps 500]
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from neural_network.model import SimpleNN
+from neural_network.optimizer import SGD, Adam
+
+class LegacySGD:
+    """Plain SGD stepping each parameter array separately (the pre-flat-buffer baseline)"""
+    def __init__(self, learning_rate=0.01):
+        self.learning_rate = learning_rate
+
+    def update(self, params, grads):
+        for key in params:
+            params[key] -= self.learning_rate * grads['d' + key]
+
+class LegacyAdam:
+    """Adam with per-key m/v dicts, one update per parameter array (the pre-flat-buffer baseline)"""
+    def __init__(self, learning_rate=0.001, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        self.learning_rate = learning_rate
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.m = {}
+        self.v = {}
+        self.t = 0
+
+    def update(self, params, grads):
+        self.t += 1
+        if not self.m:
+            for key in params:
+                self.m['d' + key] = np.zeros_like(params[key])
+                self.v['d' + key] = np.zeros_like(params[key])
+        for key in params:
+            grad_key = 'd' + key
+            self.m[grad_key] = self.beta1 * self.m[grad_key] + (1 - self.beta1) * grads[grad_key]
+            self.v[grad_key] = self.beta2 * self.v[grad_key] + (1 - self.beta2) * (grads[grad_key] ** 2)
+            m_corrected = self.m[grad_key] / (1 - self.beta1 ** self.t)
+            v_corrected = self.v[grad_key] / (1 - self.beta2 ** self.t)
+            params[key] -= self.learning_rate * m_corrected / (np.sqrt(v_corrected) + self.epsilon)
+
+def measure(optimizer, model, steps):
+    """Return (microseconds per step, bytes allocated per step)"""
+    grads = model.gradients()
+    grads.flat[:] = np.random.default_rng(0).standard_normal(grads.flat.size) * 1e-3
+    for _ in range(3):
+        optimizer.update(model.params, grads)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        optimizer.update(model.params, grads)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    current, _ = tracemalloc.get_traced_memory()
+    optimizer.update(model.params, grads)
+    peak = tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return 1e6 * elapsed / steps, peak
+
+def check_equivalence(dtype):
+    """Max abs difference between the flat and legacy Adam after 10 steps"""
+    rng = np.random.default_rng(1)
+    new, old = SimpleNN(784, 32, 10, dtype=dtype), SimpleNN(784, 32, 10, dtype=dtype)
+    old_params = {key: value.copy() for key, value in new.params.items()}
+    new_opt, old_opt = Adam(), LegacyAdam()
+    for _ in range(10):
+        grads = new.gradients()
+        grads.flat[:] = rng.standard_normal(grads.flat.size)
+        old_grads = {key: value.copy() for key, value in grads.items()}
+        new_opt.update(new.params, grads)
+        old_opt.update(old_params, old_grads)
+    return max(np.abs(new.params[key] - old_params[key]).max() for key in old_params)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hidden-size', type=int, default=128)
+    parser.add_argument('--dtype', default='float64')
+    parser.add_argument('--steps', type=int, default=500)
+    args = parser.parse_args()
+
+    model = SimpleNN(784, args.hidden_size, 10, dtype=args.dtype)
+    n_params = model.params.flat.size
+    print(f"{n_params} parameters, dtype policy {args.dtype}")
+    print(f"Adam flat vs legacy max |diff| after 10 steps: {check_equivalence(args.dtype):.2e}")
+
+    for name, optimizer in [('legacy SGD', LegacySGD()), ('SGD', SGD()),
+                            ('SGD momentum', SGD(momentum=0.9)),
+                            ('legacy Adam', LegacyAdam()), ('Adam', Adam())]:
+        usec, peak = measure(optimizer, model, args.steps)
+        print(f"{name:>13}: {usec:8.1f} us/step  {peak / 1024:9.1f} KiB allocated/step")
+
+if __name__ == "__main__":
+    main()
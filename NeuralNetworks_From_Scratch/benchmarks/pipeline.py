@@ -0,0 +1,62 @@
+"""
+Training-step latency with and without the pipelined optimizer update.
+
+Times train_step + optimizer.update against pipeline.PipelinedStep (layer
+updates overlapped with the rest of backward) for Sequential stacks of
+increasing depth. The overlap needs a spare core: give BLAS fewer threads
+than the machine has (e.g. OPENBLAS_NUM_THREADS=2 on 4 cores).
+
+    python -m benchmarks.pipeline [--batch-size 256] [--width 1024] [--depths 2 4 8]
+"""
+import argparse
+import os
+import statistics
+import time
+import numpy as np
+from neural_network.model import Sequential
+from neural_network.optimizer import Adam
+from neural_network.pipeline import PipelinedStep
+from neural_network.data import normalize
+from benchmarks.common import mnist_or_synthetic
+
+def step_time(step, repeats):
+    step()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        step()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--width', type=int, default=1024)
+    parser.add_argument('--depths', type=int, nargs='+', default=[2, 4, 8])
+    parser.add_argument('--dtype', default='float32')
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    X, y, source = mnist_or_synthetic(train=True, n_samples=args.batch_size)
+    print(f"Data: {source}, batch {args.batch_size}, width {args.width}, "
+          f"{os.cpu_count()} CPUs")
+    for depth in args.depths:
+        sizes = [784] + [args.width] * (depth - 1) + [10]
+        np.random.seed(0)
+        model = Sequential.from_sizes(sizes, dtype=args.dtype)
+        X_batch = normalize(X, model.policy.compute_dtype)
+        optimizer = Adam(0.0001)
+
+        def sequential():
+            _, _, grads = model.train_step(X_batch, y)
+            optimizer.update(model.params, grads)
+            model.sync_params()
+
+        baseline = step_time(sequential, args.repeats)
+        with PipelinedStep(model, optimizer) as engine:
+            pipelined = step_time(lambda: engine.train_step(X_batch, y), args.repeats)
+        print(f"depth {depth:2d}: sequential {1e3 * baseline:7.2f} ms  "
+              f"pipelined {1e3 * pipelined:7.2f} ms  ({baseline / pipelined:.2f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Training throughput of SimpleNN under each dtype policy.
+
+Runs the same configuration as main.py (784-128-10, Adam, batch 128) for
+one epoch per policy and reports samples/sec relative to float64.
+
+    python -m benchmarks.precision [--epochs 1] [--samples 50000]
+"""
+import argparse
+import time
+import numpy as np
+from neural_network.model import SimpleNN
+from neural_network.optimizer import Adam
+from benchmarks.common import mnist_or_synthetic
+
+def run(policy, X, y, epochs, batch_size, hidden_size):
+    np.random.seed(0)
+    model = SimpleNN(input_size=784, hidden_size=hidden_size, output_size=10, dtype=policy)
+    start = time.perf_counter()
+    model.fit(X, y, epochs=epochs, batch_size=batch_size,
+              optimizer=Adam(learning_rate=0.001), verbose=False)
+    elapsed = time.perf_counter() - start
+    return epochs * X.shape[0] / elapsed, model.train_losses[-1], model.train_accuracies[-1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--samples', type=int, default=50000)
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--hidden-size', type=int, default=128)
+    args = parser.parse_args()
+
+    X, y, source = mnist_or_synthetic(train=True, n_samples=args.samples)
+    print(f"Data: {source}, {X.shape[0]} samples, batch size {args.batch_size}")
+
+    baseline = None
+    for policy in ('float64', 'float32', 'mixed'):
+        throughput, loss, acc = run(policy, X, y, args.epochs, args.batch_size, args.hidden_size)
+        baseline = baseline or throughput
+        print(f"{policy:>8}: {throughput:10.0f} samples/sec  "
+              f"({throughput / baseline:.2f}x)  loss {loss:.4f}  acc {acc:.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Accuracy / size / speed tradeoff of magnitude pruning.
+
+Trains SimpleNN with MagnitudePruning of W1 at each target sparsity,
+for unstructured ('weight') and input-row ('row') granularity. It
+reports test accuracy, the size of the saved PrunedModel file, and the
+median predict latency at small and large batch sizes, next to the
+unpruned dense model.
+
+    python -m benchmarks.pruning [--sparsities 0.5 0.9 0.95 0.98] [--epochs 3]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import numpy as np
+from neural_network.model import SimpleNN
+from neural_network.optimizer import Adam
+from neural_network.pruning import MagnitudePruning, sparsify
+from benchmarks.common import mnist_or_synthetic
+
+def latency(fn, repeats):
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def train(X, y, args, sparsity=None, granularity='weight'):
+    np.random.seed(0)
+    model = SimpleNN(784, args.hidden_size, 10, dtype=args.dtype)
+    callbacks = [MagnitudePruning(sparsity, layers=['W1'], granularity=granularity,
+                                  frequency=args.frequency)] if sparsity else []
+    model.fit(X, y, epochs=args.epochs, batch_size=args.batch_size, optimizer=Adam(1e-3),
+              callbacks=callbacks, verbose=False)
+    return model
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sparsities', type=float, nargs='+', default=[0.5, 0.9, 0.95, 0.98])
+    parser.add_argument('--granularities', nargs='+', default=['weight', 'row'])
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--hidden-size', type=int, default=128)
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--frequency', type=int, default=50)
+    parser.add_argument('--latency-batches', type=int, nargs='+', default=[1, 256])
+    parser.add_argument('--repeats', type=int, default=200)
+    parser.add_argument('--dtype', default='float32')
+    args = parser.parse_args()
+
+    # The last 10000 training rows are held out, so both sides come from
+    # the same source even when only the synthetic fallback is available
+    X, y, source = mnist_or_synthetic(train=True)
+    X_train, y_train = X[:-10000], y[:-10000]
+    X_test, y_test = np.ascontiguousarray(X[-10000:]), y[-10000:]
+    print(f"Data: {source}, 784-{args.hidden_size}-10, {args.epochs} epochs, {args.dtype}; "
+          f"latency = median predict time per batch")
+    header = f"{'model':>18} {'accuracy':>9} {'file KiB':>9}" + \
+        ''.join(f" {f'batch {n} (us)':>16}" for n in args.latency_batches)
+    print(header)
+
+    def report(name, predictor, accuracy, file_bytes):
+        line = f"{name:>18} {accuracy:9.4f} {file_bytes / 1024:9.1f}"
+        for n in args.latency_batches:
+            batch = X_test[:n]
+            line += f" {1e6 * latency(lambda: predictor.predict(batch), args.repeats):16.1f}"
+        print(line)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.npz')
+        dense = train(X_train, y_train, args)
+        dense_bytes = sum(dense.params[name].astype(args.dtype).nbytes for name in dense.params)
+        report('dense', dense, dense.evaluate(X_test, y_test)[1], dense_bytes)
+        for granularity in args.granularities:
+            for sparsity in args.sparsities:
+                pruned = sparsify(train(X_train, y_train, args, sparsity, granularity))
+                pruned.save(path)
+                report(f"{granularity} {sparsity:.2f}", pruned,
+                       pruned.evaluate(X_test, y_test)[1], os.path.getsize(path))
+
+if __name__ == "__main__":
+    main()
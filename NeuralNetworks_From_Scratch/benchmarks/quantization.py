@@ -0,0 +1,87 @@
+"""
+int8 post-training quantization: accuracy, latency and memory vs. float.
+
+Trains SimpleNN (or loads a checkpoint), quantizes it, and compares the
+float64 model, a float32 copy and the int8 model on the test set: loss,
+accuracy, prediction agreement, predict() latency, weight bytes and
+peak memory allocated by predict(). The int8 model trades latency
+(its GEMMs still run in float32, after extra casts) for 4x smaller weights.
+
+    python -m benchmarks.quantization [--epochs 3] [--checkpoint path]
+"""
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from neural_network.model import SimpleNN
+from neural_network.optimizer import Adam
+from neural_network.checkpoint import load_checkpoint
+from neural_network.precision import Policy
+from neural_network.quantization import quantize
+from benchmarks.common import mnist_or_synthetic
+
+def latency(fn, repeats):
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def peak_allocation(fn):
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--checkpoint', help="evaluate this checkpoint instead of training")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    X_train, y_train, source = mnist_or_synthetic(train=True)
+    X_test, y_test, test_source = mnist_or_synthetic(train=False)
+    if test_source != source:
+        # Only one split is available: hold out the end of it
+        X_test, y_test = X_train[-10000:], y_train[-10000:]
+        X_train, y_train = X_train[:-10000], y_train[:-10000]
+    print(f"Data: {source}, {X_test.shape[0]} test rows")
+
+    if args.checkpoint:
+        model, _ = load_checkpoint(args.checkpoint, optimizer=False)
+    else:
+        np.random.seed(0)
+        model = SimpleNN(784, 128, 10)
+        model.fit(X_train, y_train, epochs=args.epochs, batch_size=128,
+                  optimizer=Adam(0.001), verbose=False)
+
+    # Same master weights, float32 compute copy
+    float32_model = type(model).from_params(model.params, Policy(np.float32, model.params.dtype),
+                                            **model.get_config())
+    models = {
+        model.policy.compute_dtype.name: model,
+        'float32 compute': float32_model,
+        'int8': quantize(model),
+    }
+    reference = model.predict(X_test)
+    base_loss, base_acc = model.evaluate(X_test, y_test)
+
+    for name, m in models.items():
+        loss, acc = m.evaluate(X_test, y_test)
+        agreement = np.mean(m.predict(X_test) == reference)
+        seconds = latency(lambda: m.predict(X_test), args.repeats)
+        weights = m.nbytes if hasattr(m, 'nbytes') else m.compute_params.nbytes
+        peak = peak_allocation(lambda: m.predict(X_test))
+        print(f"{name:>16}: acc {acc:.4f} ({acc - base_acc:+.4f})  loss {loss:.4f} "
+              f"({loss - base_loss:+.4f})  agree {agreement:.4f}  "
+              f"{1e3 * seconds:7.1f} ms  weights {weights / 1024:7.1f} KiB  "
+              f"predict peak {peak / 2**20:5.1f} MiB")
+
+if __name__ == "__main__":
+    main()
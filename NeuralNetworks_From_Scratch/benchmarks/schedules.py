@@ -0,0 +1,78 @@
+"""
+Time-to-accuracy with and without learning-rate schedules.
+
+Trains SimpleNN (784-128-10) with several optimizer/schedule combinations
+and reports the epoch and wall-clock time at which the held-out accuracy
+first reaches --target (training stops there).
+
+    python -m benchmarks.schedules [--target 0.97] [--epochs 10]
+"""
+import argparse
+import time
+import numpy as np
+from neural_network.model import SimpleNN
+from neural_network.optimizer import SGD, Adam
+from neural_network.callbacks import Callback
+from neural_network.schedulers import (StepSchedule, CosineSchedule, OneCycleSchedule,
+                                       WarmupSchedule)
+from benchmarks.common import mnist_or_synthetic
+
+class TimeToAccuracy(Callback):
+    """Records when val_accuracy first reaches `target` and stops training"""
+    def __init__(self, target):
+        self.target = target
+        self.epoch = None
+        self.seconds = None
+        self.best = 0.0
+
+    def on_train_start(self, logs):
+        self.start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs):
+        self.best = max(self.best, logs['val_accuracy'])
+        if logs['val_accuracy'] >= self.target:
+            self.epoch = epoch + 1
+            self.seconds = time.perf_counter() - self.start
+            self.model.stop_training = True
+
+def configs(steps_per_epoch, epochs):
+    return {
+        'Adam 1e-3': lambda: Adam(0.001),
+        'Adam warmup+cosine 3e-3': lambda: Adam(WarmupSchedule(CosineSchedule(0.003),
+                                                               steps_per_epoch // 2)),
+        'SGD+momentum 0.05': lambda: SGD(0.05, momentum=0.9),
+        'SGD+momentum step': lambda: SGD(StepSchedule(0.1, step_size=max(epochs // 3, 1) * steps_per_epoch,
+                                                      gamma=0.2), momentum=0.9),
+        'SGD+momentum one-cycle': lambda: SGD(OneCycleSchedule(0.2), momentum=0.9),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--target', type=float, default=0.97)
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--samples', type=int, default=60000)
+    args = parser.parse_args()
+
+    X, y, source = mnist_or_synthetic(train=True, n_samples=args.samples)
+    n_val = X.shape[0] // 6
+    X_val, y_val, X_train, y_train = X[:n_val], y[:n_val], X[n_val:], y[n_val:]
+    steps_per_epoch = -(-X_train.shape[0] // args.batch_size)
+    print(f"Data: {source}, {X_train.shape[0]} train / {n_val} held out, "
+          f"target accuracy {args.target}")
+
+    for name, make_optimizer in configs(steps_per_epoch, args.epochs).items():
+        np.random.seed(0)
+        model = SimpleNN(784, 128, 10, dtype='float32')
+        tracker = TimeToAccuracy(args.target)
+        model.fit(X_train, y_train, X_val, y_val, epochs=args.epochs,
+                  batch_size=args.batch_size, optimizer=make_optimizer(),
+                  verbose=False, callbacks=[tracker])
+        if tracker.epoch is None:
+            result = f"not reached in {args.epochs} epochs"
+        else:
+            result = f"epoch {tracker.epoch:2d}, {tracker.seconds:6.1f} s"
+        print(f"{name:>24}: {result}  (best {tracker.best:.4f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Dense vs. CSR first-layer matmul: where does sparse start to win?
+
+Times the first layer's forward (X @ W1) and weight gradient (X.T @ dZ1)
+on one mini-batch with dense BLAS and with the CSR kernels, over a range
+of input densities and hidden sizes, and prints the speedup. The input
+density of MNIST (or the synthetic fallback) and the mode fit(sparse='auto')
+picks for it are printed first.
+
+    python -m benchmarks.sparse [--batch-size 128] [--hidden-sizes 128 512]
+"""
+import argparse
+import time
+import numpy as np
+from neural_network.model import Model
+from neural_network.sparse import CSRMatrix, input_density
+from benchmarks.common import mnist_or_synthetic
+
+def best_time(fn, repeats):
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--features', type=int, default=784)
+    parser.add_argument('--hidden-sizes', type=int, nargs='+', default=[128, 512])
+    parser.add_argument('--densities', type=float, nargs='+',
+                        default=[0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2])
+    parser.add_argument('--dtype', default='float32')
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    X, _, source = mnist_or_synthetic(train=True)
+    density = input_density(X)
+    mode = 'sparse' if density < Model.sparse_density_threshold else 'dense'
+    print(f"Data: {source}, input density {density:.3f} -> fit(sparse='auto') "
+          f"trains {mode} (threshold {Model.sparse_density_threshold})")
+
+    rng = np.random.default_rng(0)
+    dtype = np.dtype(args.dtype)
+    n, d = args.batch_size, args.features
+    print(f"{'hidden':>6} {'density':>8} {'fwd dense':>10} {'fwd csr':>9} {'speedup':>8} "
+          f"{'bwd dense':>10} {'bwd csr':>9} {'speedup':>8}")
+    for hidden in args.hidden_sizes:
+        W = rng.standard_normal((d, hidden)).astype(dtype)
+        G = rng.standard_normal((n, hidden)).astype(dtype)
+        out = np.empty((n, hidden), dtype=dtype)
+        grad = np.empty((d, hidden), dtype=dtype)
+        for p in args.densities:
+            dense = (rng.random((n, d)) < p) * rng.random((n, d))
+            dense = dense.astype(dtype)
+            csr = CSRMatrix.from_dense(dense)
+            fwd_dense = best_time(lambda: np.matmul(dense, W, out=out), args.repeats)
+            fwd_csr = best_time(lambda: csr.matmul(W, out=out), args.repeats)
+            bwd_dense = best_time(lambda: np.matmul(dense.T, G, out=grad), args.repeats)
+            bwd_csr = best_time(lambda: csr.t_matmul(G, out=grad), args.repeats)
+            print(f"{hidden:>6} {p:>8.3f} {1e3 * fwd_dense:>8.3f}ms {1e3 * fwd_csr:>7.3f}ms "
+                  f"{fwd_dense / fwd_csr:>7.2f}x {1e3 * bwd_dense:>8.3f}ms "
+                  f"{1e3 * bwd_csr:>7.3f}ms {bwd_dense / bwd_csr:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Out-of-core training throughput: StreamingLoader over on-disk shards.
+
+Writes `--copies` copies of the training set as .npy shards (a dataset
+of any size can be produced this way, one shard in memory at a time),
+then trains SimpleNN for one epoch streaming from disk. Reports samples/sec
+per interval (stability), the overall rate next to the in-memory
+BatchLoader, and the peak bytes allocated, which is set by the shuffle
+buffer rather than the dataset size.
+
+    python -m benchmarks.streaming [--copies 4] [--shuffle-buffer 65536] [--directory DIR]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from neural_network.data import BatchLoader
+from neural_network.model import SimpleNN
+from neural_network.optimizer import SGD
+from neural_network.streaming import write_shards
+from benchmarks.common import mnist_or_synthetic
+
+class _Copies:
+    """`copies` back-to-back repeats of (X, y), sliced like one large array"""
+    def __init__(self, array, copies):
+        self.array = array
+        self.shape = (array.shape[0] * copies,) + array.shape[1:]
+
+    def __getitem__(self, rows):
+        n = self.array.shape[0]
+        return np.take(self.array, np.arange(rows.start, rows.stop) % n, axis=0)
+
+def train_epoch(loader, model, optimizer, interval):
+    """Trains one epoch; returns samples/sec of every `interval` batches and overall"""
+    rates = []
+    seen = total = 0
+    start = last = time.perf_counter()
+    for batch, (X_batch, y_batch) in enumerate(loader, start=1):
+        _, _, grads = model.train_step(X_batch, y_batch)
+        optimizer.update(model.params, grads)
+        seen += X_batch.shape[0]
+        total += X_batch.shape[0]
+        if batch % interval == 0:
+            now = time.perf_counter()
+            rates.append(seen / (now - last))
+            seen, last = 0, now
+    return rates, total / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--copies', type=int, default=4)
+    parser.add_argument('--shard-rows', type=int, default=65536)
+    parser.add_argument('--shuffle-buffer', type=int, default=65536)
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--dtype', default='float32')
+    parser.add_argument('--interval', type=int, default=200, help='batches per throughput sample')
+    parser.add_argument('--directory', default=None, help='shard directory (default: a temp dir)')
+    args = parser.parse_args()
+
+    X, y, source = mnist_or_synthetic(train=True)
+    dtype = np.dtype(args.dtype)
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.directory or tmp
+        dataset = write_shards(_Copies(X, args.copies), _Copies(y, args.copies),
+                               directory, shard_rows=args.shard_rows)
+        dataset.shuffle_buffer = args.shuffle_buffer
+        on_disk = sum(os.path.getsize(os.path.join(directory, name))
+                      for name in os.listdir(directory))
+        print(f"Data: {source} x{args.copies}: {len(dataset)} samples, "
+              f"{len(dataset.shards)} shards, {on_disk / 2**20:.0f} MiB on disk; "
+              f"shuffle buffer {args.shuffle_buffer} rows, batch {args.batch_size}, {dtype.name}")
+
+        np.random.seed(0)
+        model = SimpleNN(784, 128, 10, dtype=dtype)
+        tracemalloc.start()
+        rates, overall = train_epoch(dataset.loader(args.batch_size, dtype=dtype),
+                                     model, SGD(), args.interval)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    model = SimpleNN(784, 128, 10, dtype=dtype)
+    _, in_memory = train_epoch(BatchLoader(X, y, args.batch_size, dtype=dtype),
+                               model, SGD(), args.interval)
+    spread = (statistics.pstdev(rates) / statistics.mean(rates)) if rates else 0.0
+    print(f"streaming: {overall:,.0f} samples/sec overall, per {args.interval} batches "
+          f"min {min(rates, default=0):,.0f} / median {statistics.median(rates or [0]):,.0f} / "
+          f"max {max(rates, default=0):,.0f} (cv {100 * spread:.1f}%)")
+    print(f"streaming epoch peak alloc {peak / 2**20:.1f} MiB "
+          f"(dataset {len(dataset) * X[0].nbytes / 2**20:.0f} MiB)")
+    print(f"in-memory BatchLoader ({X.shape[0]} samples): {in_memory:,.0f} samples/sec")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Training throughput benchmark suite.
+
+Times the forward pass, loss + backward, optimizer step (Adam), a full
+training epoch and chunked inference for every combination of batch size,
+hidden size and dtype policy on MNIST (synthetic MNIST-shaped data when
+the files are missing). For each measurement it records samples/sec, the
+bytes a steady-state call allocates at its peak and the bytes it leaves
+allocated.
+
+The whole grid runs --runs times and every throughput is the median over
+all runs' median call times, so one slow stretch of the machine does not
+decide the result. Results are written as JSON; with --baseline they are
+compared against a previous run and the script exits with status 1 if any
+throughput dropped by more than --tolerance, or any per-call peak
+allocation grew by more than --alloc-tolerance.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --quick --baseline results.json --runs 5 --tolerance 0.3
+    python -m benchmarks.suite --batch-size 64 256 --hidden-size 128 --dtype float32
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import numpy as np
+from neural_network.model import SimpleNN
+from neural_network.data import normalize
+from neural_network.optimizer import Adam
+from benchmarks.common import mnist_or_synthetic
+
+PHASES = ('forward', 'backward', 'optimizer', 'epoch', 'inference')
+
+def measure(fn, samples, warmup, repeats):
+    """
+    Time and trace a benchmark callable.
+
+    Args:
+        fn: Callable doing one unit of work
+        samples: Number of samples processed by one call
+        warmup: Untimed calls first (allocate workspaces, optimizer state)
+        repeats: Timed calls; the median is reported
+
+    Returns:
+        dict with samples_per_sec, seconds, peak_bytes and retained_bytes
+    """
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    seconds = statistics.median(times)
+
+    # A separate traced call: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'samples_per_sec': samples / seconds,
+        'seconds': seconds,
+        'peak_bytes': peak - before,
+        'retained_bytes': max(current - before, 0),
+    }
+
+def bench_config(batch_size, hidden_size, dtype, X, y, args):
+    """All phases for one (batch size, hidden size, dtype) configuration"""
+    np.random.seed(0)
+    model = SimpleNN(784, hidden_size, 10, dtype=dtype)
+    optimizer = Adam(learning_rate=0.001)
+    X_batch = normalize(X[:batch_size], model.policy.compute_dtype)
+    y_batch = y[:batch_size]
+
+    # Populate the gradients once so the optimizer phase has work to do
+    _, _, grads = model.train_step(X_batch, y_batch)
+
+    def forward():
+        model.forward_logits(X_batch)
+
+    def backward():
+        ws = model.cache
+        model.loss_fn(ws['logits'], y_batch, grad_out=ws['dlogits'], rowbuf=ws['rowbuf'])
+        model.backward(X_batch, y_batch, dlogits=ws['dlogits'])
+
+    def step():
+        optimizer.update(model.params, grads)
+        model.sync_params()
+
+    def epoch():
+        model.fit(X, y, epochs=1, batch_size=batch_size, optimizer=optimizer, verbose=False)
+
+    def inference():
+        model.evaluate(X, y)
+
+    # backward reuses the activations cached by forward, so they run in order
+    n = X.shape[0]
+    plan = {
+        'forward': (forward, batch_size, args.warmup, args.repeats),
+        'backward': (backward, batch_size, args.warmup, args.repeats),
+        'optimizer': (step, batch_size, args.warmup, args.repeats),
+        'epoch': (epoch, n, 1, args.epoch_repeats),
+        'inference': (inference, n, 1, args.epoch_repeats),
+    }
+    results = {}
+    for phase in args.phases:
+        fn, samples, warmup, repeats = plan[phase]
+        if phase == 'backward':
+            forward()
+        results[phase] = measure(fn, samples, warmup, repeats)
+    return results
+
+def run(args, X, y):
+    results = {}
+    for dtype in args.dtype:
+        for hidden_size in args.hidden_size:
+            for batch_size in args.batch_size:
+                config = bench_config(batch_size, hidden_size, dtype, X, y, args)
+                for phase, result in config.items():
+                    key = f"{phase}/{dtype}/b{batch_size}/h{hidden_size}"
+                    results[key] = result
+                    print(f"{key:<30} {result['samples_per_sec']:12,.0f} samples/sec  "
+                          f"peak {result['peak_bytes'] / 2**20:8.2f} MiB  "
+                          f"retained {result['retained_bytes']:>8,} B", flush=True)
+    return results
+
+def combine(runs):
+    """
+    One result per key from several runs: the median time (and its
+    throughput) and the smallest allocations, which only noise can inflate
+    """
+    results = {}
+    for key in runs[0]:
+        seconds = statistics.median(run[key]['seconds'] for run in runs)
+        first = runs[0][key]
+        results[key] = {
+            'samples_per_sec': first['samples_per_sec'] * first['seconds'] / seconds,
+            'seconds': seconds,
+            'peak_bytes': min(run[key]['peak_bytes'] for run in runs),
+            'retained_bytes': min(run[key]['retained_bytes'] for run in runs),
+        }
+    return results
+
+def environment():
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def compare(results, baseline, tolerance, alloc_tolerance):
+    """
+    Compare results against a baseline run.
+
+    Returns:
+        List of human-readable regression messages (empty if none)
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        ratio = result['samples_per_sec'] / base['samples_per_sec']
+        status = ''
+        if ratio < 1 - tolerance:
+            status = '  REGRESSION'
+            regressions.append(f"{key}: throughput {ratio:.2f}x of baseline")
+        # Small absolute growth (a few hundred bytes of Python objects) is noise
+        alloc_limit = base['peak_bytes'] * (1 + alloc_tolerance) + 4096
+        if result['peak_bytes'] > alloc_limit:
+            status += '  ALLOC'
+            regressions.append(f"{key}: allocates {result['peak_bytes']:,} B per call "
+                               f"(baseline {base['peak_bytes']:,} B)")
+        print(f"{key:<30} {ratio:6.2f}x{status}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[32, 128, 512])
+    parser.add_argument('--hidden-size', type=int, nargs='+', default=[128, 512])
+    parser.add_argument('--dtype', nargs='+', default=['float64', 'float32', 'mixed'])
+    parser.add_argument('--phases', nargs='+', choices=PHASES, default=list(PHASES))
+    parser.add_argument('--samples', type=int, default=10000,
+                        help="samples per epoch / inference pass")
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=50)
+    parser.add_argument('--epoch-repeats', type=int, default=3)
+    parser.add_argument('--runs', type=int, default=3,
+                        help="passes over the whole grid; each throughput is their median")
+    parser.add_argument('--quick', action='store_true',
+                        help="batch 128, hidden 128, fewer repeats (smoke test)")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="JSON file from a previous run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative throughput drop (default 0.25)")
+    parser.add_argument('--alloc-tolerance', type=float, default=0.10,
+                        help="allowed relative growth of per-call peak allocation (default 0.10)")
+    args = parser.parse_args()
+    if args.quick:
+        args.batch_size, args.hidden_size = [128], [128]
+        args.samples, args.repeats, args.epoch_repeats = 4096, 20, 1
+
+    X, y, source = mnist_or_synthetic(train=True, n_samples=args.samples)
+    X, y = np.ascontiguousarray(X), np.ascontiguousarray(y)
+    runs = []
+    for i in range(args.runs):
+        if args.runs > 1:
+            print(f"Run {i + 1}/{args.runs} ({source} data)")
+        runs.append(run(args, X, y))
+    results = combine(runs)
+    report = {'environment': {**environment(), 'data': source}, 'args': vars(args),
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nCompared to {args.baseline} ({baseline['environment']['timestamp']}):")
+        if baseline['environment'].get('data', source) != source:
+            print(f"Warning: baseline ran on {baseline['environment'].get('data')} data, "
+                  f"this run on {source}")
+        regressions = compare(results, baseline['results'], args.tolerance, args.alloc_tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s):")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print("No regressions")
+
+if __name__ == "__main__":
+    main()
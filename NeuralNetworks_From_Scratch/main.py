@@ -3,7 +3,7 @@ import matplotlib.pyplot as plt
 from neural_network.model import SimpleNN
 from neural_network.optimizer import SGD, Adam
 from neural_network.utils import accuracy
-import torchvision.datasets as datasets
+from neural_network.data import load_mnist
 
 def plot_training_history(model, save_path=None):
     """Plot training history"""
@@ -35,18 +35,12 @@ def plot_training_history(model, save_path=None):
     plt.show()
 
 def main():
-    # Load MNIST data
+    # Load MNIST data (uint8 memmaps, normalized per batch by the model)
     print("Loading MNIST data...")
-    mnist_trainset = datasets.MNIST(root='./data', train=True, download=True, transform=None)
-    mnist_testset = datasets.MNIST(root='./data', train=False, download=True, transform=None)
+    X_train, y_train = load_mnist(root='./data', train=True, download=True)
+    X_test, y_test = load_mnist(root='./data', train=False, download=True)
 
-    X_train = mnist_trainset.data.numpy().reshape(-1, 28*28) / 255.0
-    y_train = mnist_trainset.targets.numpy()
-
-    X_test = mnist_testset.data.numpy().reshape(-1, 28*28) / 255.0
-    y_test = mnist_testset.targets.numpy()
-
-    # Create validation set from training data
+    # Create validation set from training data (slices stay memory-mapped)
     val_size = 10000
     X_val = X_train[:val_size]
     y_val = y_train[:val_size]
@@ -57,8 +51,9 @@ def main():
     print(f"Validation set size: {X_val.shape[0]}")
     print(f"Test set size: {X_test.shape[0]}")
 
-    # Initialize model
-    model = SimpleNN(input_size=784, hidden_size=128, output_size=10)
+    # Initialize model ('float64', 'float32' or 'mixed' precision)
+    precision = 'float64'
+    model = SimpleNN(input_size=784, hidden_size=128, output_size=10, dtype=precision)
     
     # Choose optimizer
     optimizer = Adam(learning_rate=0.001)  # Try Adam optimizer
@@ -68,6 +63,11 @@ def main():
     epochs = 10
     batch_size = 128
 
+    # Online augmentation on background worker processes (None to disable)
+    augment = None
+    # from neural_network.augmentation import Augmenter
+    # augment = Augmenter(max_rotation=10, max_shift=2, elastic_alpha=1.5)
+
     print(f"\nTraining with {optimizer.__class__.__name__} optimizer...")
     print(f"Epochs: {epochs}, Batch size: {batch_size}")
     
@@ -78,6 +78,7 @@ def main():
         epochs=epochs,
         batch_size=batch_size,
         optimizer=optimizer,
+        augment=augment,
         verbose=True
     )
 
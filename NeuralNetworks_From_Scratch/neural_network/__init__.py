@@ -1,9 +1,26 @@
 # This file marks the directory as a Python package.
 # You can optionally expose key classes/functions here.
 
-from .activation_functions import ReLu, gradReLu, softmax
-from .loss_functions import cross_entropy, grad_cross_entropy
-from .model import SimpleNN
-from .optimizer import SGD, Adam
+from .activation_functions import ReLu, gradReLu, ReLu_inplace, gradReLu_inplace, softmax
+from .loss_functions import cross_entropy, grad_cross_entropy, SoftmaxCrossEntropy
+from .model import Model, SimpleNN, Sequential
+from .optimizer import Optimizer, SGD, Adam
+from .parameters import ParameterBuffer
 from .utils import accuracy, one_hot_encode, shuffle_data, create_mini_batches
-from .layers import DenseLayer
\ No newline at end of file
+from .layers import DenseLayer
+from .data import load_mnist, read_idx, normalize, BatchLoader
+from .precision import Policy, get_policy
+from .parallel import DataParallel
+from .callbacks import Callback, ProgressLogger, Profiler, EarlyStopping, PhaseTimer, MemorySink, CSVSink, JSONLinesSink
+from .checkpoint import save_checkpoint, load_checkpoint, AsyncCheckpointer, ModelCheckpoint
+from .schedulers import Schedule, StepSchedule, CosineSchedule, OneCycleSchedule, WarmupSchedule, ReduceLROnPlateau
+from .quantization import QuantizedModel, quantize, quantize_per_channel
+from .sparse import CSRMatrix, input_density
+from .sweep import grid_search, random_search, run_sweep, Uniform, LogUniform, MedianPruner
+from .metrics import Metrics
+from .gradcheck import check_model, check_layer, check_loss
+from .pipeline import PipelinedStep
+from .frozen import FrozenModel, freeze
+from .streaming import ShardedDataset, StreamingLoader, write_shards
+from .augmentation import Augmenter, AugmentedLoader
+from .pruning import MagnitudePruning, PrunedModel, sparsify, layer_sparsity
@@ -4,8 +4,25 @@ def ReLu(inp):
     return np.maximum(inp, 0)
 
 def gradReLu(inp):
-    return np.where(inp > 0, 1, 0)
+    return (inp > 0).astype(inp.dtype)
 
-def softmax(inp):
-    exps = np.exp(inp - np.max(inp, axis=1, keepdims=True))
-    return exps / np.sum(exps, axis=1, keepdims=True)
+def ReLu_inplace(inp, mask):
+    # ReLU that overwrites `inp` and records the inactive (<= 0) units in
+    # the bool `mask` for backward
+    np.less_equal(inp, 0, out=mask)
+    return np.maximum(inp, 0, out=inp)
+
+def gradReLu_inplace(grad, mask):
+    # Fused ReLU backward: zero the incoming gradient where `mask` (from
+    # ReLu_inplace) is set. A masked copy, not grad * mask: a float-by-bool
+    # multiply allocates a ufunc casting buffer on every call
+    np.copyto(grad, 0, where=mask)
+    return grad
+
+def softmax(inp, out=None, rowbuf=None):
+    # `out` / `rowbuf` (shape (batch_size, 1)) allow an allocation-free call
+    row = np.max(inp, axis=1, keepdims=True, out=rowbuf)
+    exps = np.subtract(inp, row, out=out)
+    np.exp(exps, out=exps)
+    np.sum(exps, axis=1, keepdims=True, out=row)
+    return np.divide(exps, row, out=exps)
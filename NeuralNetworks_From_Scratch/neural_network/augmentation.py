@@ -0,0 +1,310 @@
+import multiprocessing as mp
+import queue
+import traceback
+from multiprocessing import shared_memory
+import numpy as np
+from .data import normalize
+
+def _gaussian_matrix(size, sigma):
+    """(size, size) matrix G so that G @ a blurs the rows of a (zero boundary)"""
+    offsets = np.arange(size)[:, None] - np.arange(size)[None, :]
+    G = np.exp(-0.5 * (offsets / sigma) ** 2)
+    return G / G.sum(axis=1, keepdims=True)
+
+class Augmenter:
+    """
+    Vectorized random augmentation of whole batches of square images.
+
+    Every image gets its own random rotation, scale and shift, plus an
+    optional elastic distortion (a random displacement field smoothed
+    with a Gaussian, as in Simard et al. 2003). All of them are folded into
+    one source coordinate per output pixel, so a batch is augmented with a
+    few array expressions and a single bilinear gather, with no loop over
+    images. Pixels sampled from outside the image are 0.
+
+    Args:
+        max_rotation: Rotation range in degrees (+/-)
+        max_scale: Scale range around 1 (+/-)
+        max_shift: Translation range in pixels (+/-)
+        elastic_alpha: Displacement strength in pixels (0 disables it)
+        elastic_sigma: Smoothness of the displacement field in pixels
+        image_shape: (height, width) of the flattened rows
+    """
+    def __init__(self, max_rotation=10.0, max_scale=0.1, max_shift=2.0,
+                 elastic_alpha=0.0, elastic_sigma=4.0, image_shape=(28, 28)):
+        self.max_rotation = max_rotation
+        self.max_scale = max_scale
+        self.max_shift = max_shift
+        self.elastic_alpha = elastic_alpha
+        self.elastic_sigma = elastic_sigma
+        self.image_shape = tuple(image_shape)
+        height, width = self.image_shape
+        self._blur_rows = _gaussian_matrix(height, elastic_sigma).astype(np.float32)
+        self._blur_cols = _gaussian_matrix(width, elastic_sigma).astype(np.float32).T
+
+    def _source_coordinates(self, n, rng):
+        """Source (row, col) of every output pixel, each (n, height, width)"""
+        height, width = self.image_shape
+        angle = np.deg2rad(rng.uniform(-self.max_rotation, self.max_rotation, n)).astype(np.float32)
+        scale = rng.uniform(1 - self.max_scale, 1 + self.max_scale, n).astype(np.float32)
+        shift = rng.uniform(-self.max_shift, self.max_shift, (2, n)).astype(np.float32)
+
+        # Inverse map about the image centre: rotate by -angle, scale by 1/scale
+        cos = (np.cos(angle) / scale)[:, None, None]
+        sin = (np.sin(angle) / scale)[:, None, None]
+        cy, cx = (height - 1) / 2, (width - 1) / 2
+        v = (np.arange(height, dtype=np.float32) - cy)[None, :, None]
+        u = (np.arange(width, dtype=np.float32) - cx)[None, None, :]
+        rows = sin * u + cos * v + (cy - shift[0])[:, None, None]
+        cols = cos * u - sin * v + (cx - shift[1])[:, None, None]
+
+        if self.elastic_alpha:
+            for coords in (rows, cols):
+                field = rng.random((n, height, width), dtype=np.float32)
+                field -= 0.5
+                field = self._blur_rows @ field @ self._blur_cols
+                # Rescale so alpha is the largest displacement in pixels
+                field *= self.elastic_alpha / max(float(np.abs(field).max()), 1e-12)
+                coords += field
+        return rows, cols
+
+    def __call__(self, X, rng=None, out=None):
+        """
+        Augment a batch of flattened images.
+
+        Args:
+            X: Batch (n, height * width), uint8 pixels or floats
+            rng: np.random.Generator (default: a fresh unseeded one)
+            out: Optional output array, same shape and dtype as X
+
+        Returns:
+            Augmented batch with X's shape and dtype
+        """
+        rng = rng if rng is not None else np.random.default_rng()
+        n = X.shape[0]
+        height, width = self.image_shape
+        rows, cols = self._source_coordinates(n, rng)
+
+        # Zero border of one pixel before and two after, so clipped
+        # coordinates and their +1 neighbours always index a 0 pixel
+        padded = np.zeros((n, height + 3, width + 3), dtype=np.float32)
+        padded[:, 1:height + 1, 1:width + 1] = X.reshape(n, height, width)
+        np.clip(rows, -1, height, out=rows)
+        np.clip(cols, -1, width, out=cols)
+        r0 = np.floor(rows)
+        c0 = np.floor(cols)
+        dr = rows - r0
+        dc = cols - c0
+        stride = width + 3
+        base = (np.arange(n) * padded[0].size)[:, None, None]
+        index = base + (r0.astype(np.intp) + 1) * stride + (c0.astype(np.intp) + 1)
+
+        flat = padded.reshape(-1)
+        top = flat[index] * (1 - dc) + flat[index + 1] * dc
+        bottom = flat[index + stride] * (1 - dc) + flat[index + stride + 1] * dc
+        result = (top * (1 - dr) + bottom * dr).reshape(n, -1)
+
+        if out is None:
+            out = np.empty(X.shape, dtype=X.dtype)
+        if X.dtype.kind in 'ui':
+            np.rint(result, out=result)
+            np.clip(result, np.iinfo(X.dtype).min, np.iinfo(X.dtype).max, out=result)
+        np.copyto(out, result, casting='unsafe')
+        return out
+
+class AugmentedLoader:
+    """
+    Shuffled, augmented mini-batches prepared by a pool of worker processes.
+
+    X is copied once into shared memory. For every batch the main process
+    sends the row indices and a seed to a worker, which gathers the rows,
+    augments them, normalizes them to `dtype` and writes the result into
+    one of `queue_size` shared-memory slots. At most `queue_size` batches
+    are in flight, so the workers stay that far ahead of training and the
+    augmentation cost is hidden as long as the pool keeps up. Batches are
+    yielded in order and are reproducible for a given rng, however the
+    work is scheduled; n_workers=0 augments inline in the main process.
+
+    Same iteration contract as data.BatchLoader: yielded (X_batch, y_batch)
+    are views into recycled buffers, valid until the next batch (a copy
+    out of the shared slot, so views into shared memory never leave this
+    object). Use as a context manager or call `close()` (fit does this
+    itself).
+    """
+    def __init__(self, X, y, batch_size, augment, n_workers=2, queue_size=4,
+                 shuffle=True, dtype=np.float64, rng=None):
+        if X.shape[0] != y.shape[0]:
+            raise ValueError(f"X has {X.shape[0]} rows but y has {y.shape[0]}")
+        self.y = y
+        self.batch_size = batch_size
+        self.augment = augment
+        self.n_workers = n_workers
+        self.shuffle = shuffle
+        self.dtype = np.dtype(dtype)
+        self.rng = rng if rng is not None else np.random
+        self.queue_size = queue_size = max(queue_size, 1)
+        self._closed = False
+        self._n_samples = X.shape[0]
+        self._y_slots = np.empty((queue_size, batch_size), dtype=y.dtype)
+        self._batch = np.empty((batch_size,) + X.shape[1:], dtype=self.dtype)
+
+        if n_workers <= 0:
+            self.X = X
+            self._shm = {}
+            self._slots = None
+            self._workers = []
+            return
+
+        slot_shape = (queue_size, batch_size) + X.shape[1:]
+        self._shm = {
+            'X': shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1)),
+            'slots': shared_memory.SharedMemory(
+                create=True, size=max(int(np.prod(slot_shape)) * self.dtype.itemsize, 1)),
+        }
+        self.X = np.ndarray(X.shape, dtype=X.dtype, buffer=self._shm['X'].buf)
+        np.copyto(self.X, X)
+        self._slots = np.ndarray(slot_shape, dtype=self.dtype, buffer=self._shm['slots'].buf)
+        spec = {'X': (self._shm['X'].name, X.shape, X.dtype.str),
+                'slots': (self._shm['slots'].name, slot_shape, self.dtype.str)}
+
+        self._tasks = mp.Queue()
+        self._done = mp.Queue()
+        self._workers = [mp.Process(target=_worker_main,
+                                    args=(self._tasks, self._done, spec, augment),
+                                    daemon=True)
+                         for _ in range(n_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def n_samples(self):
+        return self._n_samples
+
+    def __len__(self):
+        return -(-self.n_samples // self.batch_size)
+
+    def _batches(self):
+        """(row indices, seed) of every batch of one epoch"""
+        order = self.rng.permutation(self.n_samples) if self.shuffle else np.arange(self.n_samples)
+        seeds = (self.rng.random(len(self)) * 2**32).astype(np.uint64)
+        for i, start in enumerate(range(0, self.n_samples, self.batch_size)):
+            yield order[start:start + self.batch_size], int(seeds[i])
+
+    def _wait(self, slot, finished):
+        """Block until `slot` is filled; other slots finishing are remembered"""
+        while slot not in finished:
+            try:
+                done, error = self._done.get(timeout=1.0)
+            except queue.Empty:
+                if not all(worker.is_alive() for worker in self._workers):
+                    self.close()
+                    raise RuntimeError("AugmentedLoader worker died")
+                continue
+            if error is not None:
+                self.close()
+                raise RuntimeError(f"AugmentedLoader worker failed:\n{error}")
+            finished.add(done)
+        finished.discard(slot)
+
+    def __iter__(self):
+        if self._closed:
+            raise RuntimeError("AugmentedLoader is closed")
+        batches = self._batches()
+        if not self._workers:
+            for indices, seed in batches:
+                n = indices.shape[0]
+                raw = self.augment(np.take(self.X, indices, axis=0),
+                                   rng=np.random.default_rng(seed))
+                y_batch = np.take(self.y, indices, out=self._y_slots[0][:n])
+                yield normalize(raw, self.dtype, out=self._batch[:n]), y_batch
+            return
+
+        # Batch b always uses slot b % queue_size; it is refilled with
+        # batch b + queue_size once the consumer has moved past batch b
+        sizes = {}
+        in_flight = set()
+        finished = set()
+
+        def submit(b):
+            item = next(batches, None)
+            if item is not None:
+                indices, seed = item
+                slot = b % self.queue_size
+                sizes[slot] = indices.shape[0]
+                np.take(self.y, indices, out=self._y_slots[slot][:indices.shape[0]])
+                self._tasks.put((slot, indices, seed))
+                in_flight.add(slot)
+
+        for b in range(self.queue_size):
+            submit(b)
+        try:
+            for b in range(len(self)):
+                slot = b % self.queue_size
+                self._wait(slot, finished)
+                in_flight.discard(slot)
+                n = sizes[slot]
+                X_batch = self._batch[:n]
+                np.copyto(X_batch, self._slots[slot][:n])
+                yield X_batch, self._y_slots[slot][:n]
+                submit(b + self.queue_size)
+        finally:
+            # A loop left early still lets its batches in flight finish,
+            # so they cannot land in a slot of the next epoch
+            for slot in list(in_flight):
+                if not self._closed:
+                    self._wait(slot, finished)
+
+    def close(self):
+        """Stop the workers and release the shared memory"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self.X = self._slots = None
+        for shm in self._shm.values():
+            shm.close()
+            shm.unlink()
+
+def _worker_main(tasks, done, spec, augment):
+    shms = {name: shared_memory.SharedMemory(name=shm_name)
+            for name, (shm_name, _, _) in spec.items()}
+    try:
+        _worker_loop(tasks, done, spec, shms, augment)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        for shm in shms.values():
+            shm.close()
+
+def _worker_loop(tasks, done, spec, shms, augment):
+    arrays = {name: np.ndarray(shape, dtype=dtype, buffer=shms[name].buf)
+              for name, (_, shape, dtype) in spec.items()}
+    X, slots = arrays['X'], arrays['slots']
+    dtype = slots.dtype
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, indices, seed = task
+            try:
+                n = indices.shape[0]
+                raw = augment(np.take(X, indices, axis=0), rng=np.random.default_rng(seed))
+                normalize(raw, dtype, out=slots[slot][:n])
+                done.put((slot, None))
+            except Exception:
+                done.put((slot, traceback.format_exc()))
+    finally:
+        # The caller closes the shared memory; drop the views first
+        del X, slots, arrays
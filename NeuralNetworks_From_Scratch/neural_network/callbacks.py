@@ -0,0 +1,290 @@
+import csv
+import json
+import time
+import numpy as np
+
+class Callback:
+    """
+    Base class for fit() callbacks; override any of the hooks.
+
+    `logs` are plain dicts. on_batch_end gets the batch 'loss', 'accuracy'
+    and 'size'; on_epoch_end the epoch 'loss' and 'accuracy' (plus
+    'val_loss' / 'val_accuracy' when validation data is given).
+    on_train_end is also called when training raises, with 'completed'
+    False, so release resources there.
+
+    Callbacks that set `timed = True` also receive wall-clock seconds per
+    training phase as 'time_<phase>' entries (data, forward, loss, backward,
+    optimizer, metrics, validation; 'step' replaces forward/loss/backward
+    under data parallelism). Phases are only timed when a callback asks.
+    """
+    timed = False
+    model = None
+
+    def on_train_start(self, logs):
+        pass
+
+    def on_epoch_start(self, epoch, logs):
+        pass
+
+    def on_batch_start(self, batch, logs):
+        pass
+
+    def on_batch_end(self, batch, logs):
+        pass
+
+    def on_epoch_end(self, epoch, logs):
+        pass
+
+    def on_train_end(self, logs):
+        pass
+
+class CallbackList:
+    """Dispatches every hook to a list of callbacks (falsy when empty)"""
+    def __init__(self, callbacks, model):
+        self.callbacks = list(callbacks)
+        for callback in self.callbacks:
+            callback.model = model
+        self.timed = any(callback.timed for callback in self.callbacks)
+
+    def __bool__(self):
+        return bool(self.callbacks)
+
+    def on_train_start(self, logs):
+        for callback in self.callbacks:
+            callback.on_train_start(logs)
+
+    def on_epoch_start(self, epoch, logs):
+        for callback in self.callbacks:
+            callback.on_epoch_start(epoch, logs)
+
+    def on_batch_start(self, batch, logs):
+        for callback in self.callbacks:
+            callback.on_batch_start(batch, logs)
+
+    def on_batch_end(self, batch, logs):
+        for callback in self.callbacks:
+            callback.on_batch_end(batch, logs)
+
+    def on_epoch_end(self, epoch, logs):
+        for callback in self.callbacks:
+            callback.on_epoch_end(epoch, logs)
+
+    def on_train_end(self, logs):
+        for callback in self.callbacks:
+            callback.on_train_end(logs)
+
+class PhaseTimer:
+    """
+    Lap timer: `lap(phase)` charges the time since the previous lap to
+    `phase`, both for the current batch and for the epoch.
+    """
+    def __init__(self):
+        self.batch = {}
+        self.epoch = {}
+        self._last = time.perf_counter()
+
+    def reset(self):
+        self._last = time.perf_counter()
+
+    def lap(self, phase, batch=True):
+        now = time.perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        self.epoch[phase] = self.epoch.get(phase, 0.0) + elapsed
+        if batch:
+            self.batch[phase] = self.batch.get(phase, 0.0) + elapsed
+
+    def end_batch(self):
+        """Per-phase seconds of the batch as 'time_<phase>' entries"""
+        times = {f'time_{phase}': seconds for phase, seconds in self.batch.items()}
+        self.batch = {}
+        return times
+
+    def end_epoch(self):
+        """Per-phase seconds of the epoch as 'time_<phase>' entries"""
+        times = {f'time_{phase}': seconds for phase, seconds in self.epoch.items()}
+        self.epoch = {}
+        return times
+
+class ProgressLogger(Callback):
+    """Prints one line per epoch (what fit(verbose=True) shows)"""
+    def __init__(self, print_fn=print):
+        self.print_fn = print_fn
+        self.epochs = None
+
+    def on_train_start(self, logs):
+        self.epochs = logs['epochs']
+
+    def on_epoch_end(self, epoch, logs):
+        line = (f"Epoch {epoch+1}/{self.epochs}: "
+                f"Train Loss: {logs['loss']:.4f}, Train Acc: {logs['accuracy']:.4f}")
+        if 'val_loss' in logs:
+            line += f", Val Loss: {logs['val_loss']:.4f}, Val Acc: {logs['val_accuracy']:.4f}"
+        self.print_fn(line)
+
+class Profiler(Callback):
+    """
+    Writes per-epoch (and optionally per-batch) metrics and phase timings
+    to sinks.
+
+    The sinks are closed when training ends (a MemorySink keeps its
+    records), so give each fit its own file sinks.
+
+    Args:
+        sink: Receives one record per epoch; defaults to a MemorySink
+        batch_sink: Optional sink receiving one record per batch
+    """
+    timed = True
+
+    def __init__(self, sink=None, batch_sink=None):
+        self.sink = sink if sink is not None else MemorySink()
+        self.batch_sink = batch_sink
+        self._epoch = 0
+
+    def on_epoch_start(self, epoch, logs):
+        self._epoch = epoch + 1
+
+    def on_batch_end(self, batch, logs):
+        if self.batch_sink is not None:
+            self.batch_sink.write({'epoch': self._epoch, 'batch': batch + 1, **logs})
+
+    def on_epoch_end(self, epoch, logs):
+        self.sink.write({'epoch': epoch + 1, **logs})
+
+    def on_train_end(self, logs):
+        self.sink.close()
+        if self.batch_sink is not None:
+            self.batch_sink.close()
+
+class EarlyStopping(Callback):
+    """
+    Stops training when `monitor` has not improved for `patience` epochs.
+
+    With restore_best_weights the best parameters are kept in one shadow
+    buffer allocated on the first improvement (a memcpy per improvement,
+    no deep copies) and copied back when training ends. The model's own
+    buffer is never rebound, so optimizer state and layer views stay valid.
+
+    Args:
+        monitor: Epoch log key, e.g. 'val_loss' or 'val_accuracy'; epochs
+            without it (see fit's val_freq) are skipped
+        patience: Epochs without improvement before stopping
+        min_delta: Minimum change that counts as an improvement
+        mode: 'min', 'max', or 'auto' (max for accuracies, else min)
+        restore_best_weights: Restore the best epoch's weights at the end
+    """
+    def __init__(self, monitor='val_loss', patience=5, min_delta=0.0, mode='auto',
+                 restore_best_weights=True):
+        if mode == 'auto':
+            mode = 'max' if 'acc' in monitor else 'min'
+        if mode not in ('min', 'max'):
+            raise ValueError(f"Unknown mode: {mode!r}")
+        self.monitor = monitor
+        self.patience = patience
+        self.min_delta = abs(min_delta)
+        self.sign = 1 if mode == 'min' else -1
+        self.restore_best_weights = restore_best_weights
+        self.best = None
+        self.best_epoch = None
+        self.stopped_epoch = None
+        self._best_params = None
+        self._wait = 0
+        self._last_epoch = None
+
+    def on_train_start(self, logs):
+        self.best = None
+        self.best_epoch = None
+        self.stopped_epoch = None
+        self._wait = 0
+
+    def on_epoch_end(self, epoch, logs):
+        self._last_epoch = epoch + 1
+        value = logs.get(self.monitor)
+        if value is None:
+            return
+        if self.best is None or self.sign * (self.best - value) > self.min_delta:
+            self.best = value
+            self.best_epoch = epoch + 1
+            self._wait = 0
+            if self.restore_best_weights:
+                flat = self.model.params.flat
+                if self._best_params is None or self._best_params.shape != flat.shape:
+                    self._best_params = np.empty_like(flat)
+                np.copyto(self._best_params, flat)
+            return
+        self._wait += 1
+        if self._wait >= self.patience:
+            self.stopped_epoch = epoch + 1
+            self.model.stop_training = True
+
+    def on_train_end(self, logs):
+        if self.restore_best_weights and self._best_params is not None \
+                and self.best_epoch != self._last_epoch:
+            np.copyto(self.model.params.flat, self._best_params)
+            self.model.sync_params()
+
+class MemorySink:
+    """Keeps records in a list (`.records`)"""
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class CSVSink:
+    """
+    Appends records as CSV rows.
+
+    The columns are `fields`, or the keys of the first record; keys not in
+    the columns are dropped and missing ones left empty.
+    """
+    def __init__(self, path, fields=None):
+        self.file = open(path, 'w', newline='')
+        self.fields = fields
+        self._writer = None
+
+    def write(self, record):
+        if self._writer is None:
+            self._writer = csv.DictWriter(self.file, fieldnames=self.fields or list(record),
+                                          extrasaction='ignore')
+            self._writer.writeheader()
+        self._writer.writerow(record)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class JSONLinesSink:
+    """Appends records as one JSON object per line"""
+    def __init__(self, path):
+        self.file = open(path, 'w')
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
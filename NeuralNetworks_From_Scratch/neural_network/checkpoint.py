@@ -0,0 +1,270 @@
+import json
+import os
+import shutil
+import threading
+import numpy as np
+from .callbacks import Callback
+from .model import SimpleNN, Sequential
+from .optimizer import SGD, Adam
+from .parameters import ParameterBuffer
+from .precision import Policy
+from .schedulers import Schedule, schedule_to_config, schedule_from_config
+
+FORMAT_VERSION = 1
+MODELS = {'SimpleNN': SimpleNN, 'Sequential': Sequential}
+OPTIMIZERS = {'SGD': SGD, 'Adam': Adam}
+HISTORY = ('train_losses', 'train_accuracies', 'val_losses', 'val_accuracies')
+
+# A checkpoint is a directory:
+#   manifest.json     model class/config, dtype policy, offset table,
+#                     optimizer hyperparameters (incl. LR schedule) and
+#                     step counters, training history
+#   params.npy        the flat master-weight buffer (uncompressed)
+#   optimizer_<name>.npy   one flat buffer per optimizer state (Adam m/v,
+#                     SGD velocity), same layout as params
+
+def _layout(buffer):
+    return {name: {'shape': list(buffer[name].shape), 'offset': list(buffer.offsets[name])}
+            for name in buffer}
+
+def _snapshot(model, optimizer=None, extra=None, stage=None):
+    """
+    Manifest plus copies of every array to write.
+
+    `stage` maps file name -> array from an earlier snapshot; arrays of the
+    same shape and dtype are reused instead of allocated.
+    """
+    stage = stage or {}
+    arrays = {}
+
+    def copy(name, flat):
+        out = stage.get(name)
+        if out is None or out.shape != flat.shape or out.dtype != flat.dtype:
+            out = np.empty_like(flat)
+        np.copyto(out, flat)
+        arrays[name] = out
+
+    copy('params.npy', model.params.flat)
+    manifest = {
+        'format': FORMAT_VERSION,
+        'model': type(model).__name__,
+        'config': model.get_config(),
+        'policy': {'compute_dtype': model.policy.compute_dtype.name,
+                   'param_dtype': model.policy.param_dtype.name},
+        'params': {'file': 'params.npy', 'dtype': model.params.dtype.name,
+                   'layout': _layout(model.params)},
+        'history': {name: [float(value) for value in getattr(model, name)] for name in HISTORY},
+        'optimizer': None,
+        'extra': extra or {},
+    }
+    if optimizer is not None:
+        state = {}
+        for name, buffer in optimizer.state_buffers().items():
+            file_name = f'optimizer_{name}.npy'
+            copy(file_name, buffer.flat)
+            state[name] = {'file': file_name, 'dtype': buffer.dtype.name,
+                           'layout': _layout(buffer)}
+        config = optimizer.get_config()
+        if isinstance(config['learning_rate'], Schedule):
+            config['learning_rate'] = schedule_to_config(config['learning_rate'])
+        manifest['optimizer'] = {'class': type(optimizer).__name__,
+                                 'config': config,
+                                 't': getattr(optimizer, 't', 0),
+                                 'iterations': optimizer.iterations,
+                                 'schedule_start': optimizer.schedule_start,
+                                 'lr_scale': optimizer.lr_scale,
+                                 'state': state}
+    return manifest, arrays
+
+def _write(path, manifest, arrays):
+    """
+    Write into `path`.tmp, then swap it in. Readers that memory-mapped the
+    previous files keep valid mappings: their inodes are only unlinked.
+    """
+    path = os.fspath(path)
+    tmp = path + '.tmp'
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+    for file_name, array in arrays.items():
+        np.save(os.path.join(tmp, file_name), array, allow_pickle=False)
+    with open(os.path.join(tmp, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=1)
+
+    if os.path.exists(path):
+        old = path + '.old'
+        if os.path.exists(old):
+            shutil.rmtree(old)
+        os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old)
+    else:
+        os.replace(tmp, path)
+
+def save_checkpoint(path, model, optimizer=None, extra=None):
+    """
+    Save model parameters, training history and optionally optimizer state.
+
+    Args:
+        path: Checkpoint directory. An existing one is replaced by two
+            renames (old aside, new in); a crash between them leaves the
+            previous checkpoint in `path`.old
+        model: SimpleNN or Sequential
+        optimizer: Optional SGD/Adam whose state (m, v, t, velocity) to save
+        extra: Optional JSON-serializable dict stored in the manifest
+    """
+    manifest, arrays = _snapshot(model, optimizer, extra)
+    _write(path, manifest, arrays)
+
+MMAP_MODES = {False: None, True: 'r', 'copy-on-write': 'c'}
+
+def _load_buffer(path, entry, mmap):
+    if mmap not in MMAP_MODES:
+        raise ValueError(f"mmap must be False, True or 'copy-on-write', got {mmap!r}")
+    flat = np.load(os.path.join(path, entry['file']), mmap_mode=MMAP_MODES[mmap],
+                   allow_pickle=False)
+    shapes = {name: tuple(spec['shape']) for name, spec in entry['layout'].items()}
+    if mmap:
+        # Views straight into the mapped file: no copy, pages shared with
+        # every other process mapping the same checkpoint
+        return ParameterBuffer(shapes, flat.dtype, buffer=flat)
+    buffer = ParameterBuffer(shapes, flat.dtype)
+    np.copyto(buffer.flat, flat)
+    return buffer
+
+def load_manifest(path):
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format: {manifest.get('format')!r}")
+    return manifest
+
+def load_checkpoint(path, mmap=False, optimizer=True):
+    """
+    Load a checkpoint written by save_checkpoint.
+
+    Args:
+        path: Checkpoint directory
+        mmap: Memory-map the weights read-only instead of reading them.
+            Loading is then nearly instant and processes mapping the same
+            checkpoint share its pages; the model can run inference but
+            not train (fit and optimizer updates raise ValueError; mixed-
+            precision models still copy into float32). 'copy-on-write'
+            maps the weights privately: pages are copied as training
+            writes to them and the file is never modified
+        optimizer: Also rebuild the optimizer (if one was saved)
+
+    Returns:
+        model, optimizer (None if not saved or not requested)
+    """
+    manifest = load_manifest(path)
+    policy = Policy(manifest['policy']['compute_dtype'], manifest['policy']['param_dtype'])
+    params = _load_buffer(path, manifest['params'], mmap)
+    model = MODELS[manifest['model']].from_params(params, policy, **manifest['config'])
+    for name in HISTORY:
+        getattr(model, name).extend(manifest['history'][name])
+
+    opt = None
+    if optimizer and manifest['optimizer'] is not None:
+        saved = manifest['optimizer']
+        config = dict(saved['config'])
+        if isinstance(config['learning_rate'], dict):
+            config['learning_rate'] = schedule_from_config(config['learning_rate'])
+        opt = OPTIMIZERS[saved['class']](**config)
+        opt.load_state({name: _load_buffer(path, entry, mmap=False)
+                        for name, entry in saved['state'].items()},
+                       t=saved['t'], iterations=saved['iterations'], lr_scale=saved['lr_scale'],
+                       schedule_start=saved.get('schedule_start', 0))
+    return model, opt
+
+class AsyncCheckpointer:
+    """
+    Writes checkpoints on a background thread.
+
+    save() copies the weights and optimizer state into staging buffers
+    (a memcpy, reused between saves) and returns; the files are written
+    by the thread. If the previous write is still running the checkpoint
+    is skipped (counted in `skipped`) unless block=True.
+    """
+    def __init__(self):
+        self.skipped = 0
+        self._thread = None
+        self._error = None
+        self._stage = {}
+
+    @property
+    def busy(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def save(self, path, model, optimizer=None, extra=None, block=False):
+        """Returns True if the checkpoint was queued, False if skipped"""
+        if self.busy:
+            if not block:
+                self.skipped += 1
+                return False
+            self.wait()
+        self._raise_error()
+        manifest, arrays = _snapshot(model, optimizer, extra, stage=self._stage)
+        self._stage = arrays
+        self._thread = threading.Thread(target=self._run, args=(path, manifest, arrays),
+                                        daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, path, manifest, arrays):
+        try:
+            _write(path, manifest, arrays)
+        except BaseException as exc:
+            self._error = exc
+
+    def wait(self):
+        """Block until the pending write is done; re-raise its error"""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+class ModelCheckpoint(Callback):
+    """
+    Saves a checkpoint every `every` epochs without blocking training.
+
+    `path` may contain '{epoch}'. The optimizer fit() uses is saved too
+    unless one is given. The last completed epoch is always saved:
+    on_train_end writes it if it was not (training stopped early, or a
+    save was skipped while a write was still running) and waits for it.
+    When training raised, the weights may be mid-epoch, so on_train_end
+    only waits for the pending write.
+    """
+    def __init__(self, path, every=1, optimizer=None):
+        self.path = os.fspath(path)
+        self.every = every
+        self.optimizer = optimizer
+        self.writer = AsyncCheckpointer()
+        self._epoch = 0
+        self._saved = False
+
+    def on_train_start(self, logs):
+        self._epoch = 0
+        self._saved = False
+        if self.optimizer is None:
+            self.optimizer = logs.get('optimizer')
+
+    def _save(self, block):
+        self._saved = self.writer.save(self.path.format(epoch=self._epoch), self.model,
+                                       self.optimizer, extra={'epoch': self._epoch}, block=block)
+
+    def on_epoch_end(self, epoch, logs):
+        self._epoch = epoch + 1
+        self._saved = False
+        if self._epoch % self.every == 0:
+            self._save(block=False)
+
+    def on_train_end(self, logs):
+        if self._epoch and not self._saved and logs.get('completed', True):
+            self._save(block=True)
+        self.writer.wait()
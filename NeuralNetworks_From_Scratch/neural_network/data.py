@@ -0,0 +1,296 @@
+import gzip
+import os
+import queue
+import shutil
+import threading
+import urllib.request
+import numpy as np
+from .sparse import CSRMatrix
+
+# IDX type codes -> big-endian numpy dtypes
+IDX_DTYPES = {
+    0x08: np.dtype('u1'),
+    0x09: np.dtype('i1'),
+    0x0B: np.dtype('>i2'),
+    0x0C: np.dtype('>i4'),
+    0x0D: np.dtype('>f4'),
+    0x0E: np.dtype('>f8'),
+}
+
+MNIST_FILES = {
+    True: ('train-images-idx3-ubyte', 'train-labels-idx1-ubyte'),
+    False: ('t10k-images-idx3-ubyte', 't10k-labels-idx1-ubyte'),
+}
+MNIST_MIRROR = 'https://ossci-datasets.s3.amazonaws.com/mnist/'
+
+
+def _download(url, path):
+    """Fetch `url` into `path` via a temporary file (no partial file on failure)"""
+    tmp_path = path + '.part'
+    try:
+        urllib.request.urlretrieve(url, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _decompress(gz_path, path):
+    """Inflate a gzipped IDX file next to the original, once."""
+    tmp_path = path + '.part'
+    with gzip.open(gz_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    os.replace(tmp_path, path)
+
+
+def _resolve(path, download_url=None):
+    """
+    Return the path of an uncompressed IDX file, inflating `path + '.gz'`
+    (or downloading it first) when only the compressed file is available.
+    """
+    if path.endswith('.gz'):
+        path = path[:-3]
+    if os.path.exists(path):
+        return path
+    gz_path = path + '.gz'
+    if not os.path.exists(gz_path):
+        if download_url is None:
+            raise FileNotFoundError(f"IDX file not found: {path}[.gz]")
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        _download(download_url, gz_path)
+    _decompress(gz_path, path)
+    return path
+
+
+def read_idx(path, download_url=None):
+    """
+    Memory-map an IDX file without reading its payload.
+
+    Args:
+        path: Path to an IDX file, gzipped or not
+        download_url: Optional URL of the gzipped file if it is missing
+
+    Returns:
+        Read-only np.memmap with the shape and dtype stored in the header
+    """
+    path = _resolve(path, download_url)
+    with open(path, 'rb') as f:
+        header = f.read(4)
+        if len(header) != 4 or header[0] != 0 or header[1] != 0:
+            raise ValueError(f"Not an IDX file: {path}")
+        type_code, ndim = header[2], header[3]
+        if type_code not in IDX_DTYPES:
+            raise ValueError(f"Unsupported IDX type code 0x{type_code:02X} in {path}")
+        shape = tuple(np.frombuffer(f.read(4 * ndim), dtype='>u4').astype(int))
+    return np.memmap(path, dtype=IDX_DTYPES[type_code], mode='r',
+                     offset=4 + 4 * ndim, shape=shape)
+
+
+def load_mnist(root='./data', train=True, download=False, sparse=False):
+    """
+    Load MNIST straight from the raw IDX files in `root/MNIST/raw`.
+
+    Pixels stay uint8 and on disk; pages are read lazily as batches
+    touch them. Use `normalize` to scale a batch to [0, 1].
+
+    Args:
+        root: Dataset root directory (same layout as torchvision)
+        train: Load the training split if True, else the test split
+        download: Fetch missing files from the MNIST mirror
+        sparse: Return the images as a uint8 CSRMatrix, compressed once here
+
+    Returns:
+        images: uint8 memmap of shape (n_samples, 784) (or a CSRMatrix)
+        labels: uint8 memmap of shape (n_samples,)
+    """
+    raw_dir = os.path.join(root, 'MNIST', 'raw')
+    arrays = []
+    for name in MNIST_FILES[train]:
+        url = MNIST_MIRROR + name + '.gz' if download else None
+        arrays.append(read_idx(os.path.join(raw_dir, name), download_url=url))
+    images, labels = arrays
+    images = images.reshape(images.shape[0], -1)
+    if sparse:
+        images = CSRMatrix.from_dense(images)
+    return images, labels
+
+
+def normalize(X, dtype=np.float64, out=None):
+    """
+    Scale a batch of uint8 pixels to [0, 1] in the given float dtype.
+
+    Float input is assumed to be normalized already and is only cast
+    (without a copy when the dtype already matches). A CSRMatrix stays
+    sparse, or is expanded into `out` when given.
+
+    Args:
+        X: Batch of inputs (batch_size, n_features)
+        dtype: Float dtype of the result
+        out: Optional preallocated output array
+
+    Returns:
+        Normalized batch
+    """
+    if isinstance(X, CSRMatrix):
+        scale = None if X.dtype.kind == 'f' else 1.0 / 255.0
+        if out is None:
+            # Stays sparse: only the stored values are converted
+            return X.take(np.arange(X.shape[0]), dtype=dtype, scale=scale)
+        return X.to_dense(out, scale=scale)
+    if X.dtype.kind == 'f':
+        if out is None:
+            return np.asarray(X, dtype=dtype)
+        np.copyto(out, X, casting='same_kind')
+        return out
+    if out is None:
+        out = np.empty(X.shape, dtype=dtype)
+    # Cast then scale in place: a mixed-dtype multiply would allocate a
+    # ufunc casting buffer on every call
+    np.copyto(out, X)
+    np.multiply(out, out.dtype.type(1.0 / 255.0), out=out)
+    return out
+
+
+def prefetch_batches(items, slots, fill, name='prefetch'):
+    """
+    Yields fill(slot, item) for every item, recycling the buffers in
+    `slots`: with a single slot the batches are filled inline, otherwise
+    on a background thread up to len(slots) - 1 batches ahead while the
+    consumer holds one. `items` is consumed on that thread too.
+
+    A batch stays valid until the next one is requested. Exceptions of
+    the producer are re-raised in the consumer, and stopping early (break
+    or close) retires the thread.
+    """
+    if len(slots) < 2:
+        for item in items:
+            yield fill(slots[0], item)
+        return
+
+    free = queue.Queue()
+    for i in range(len(slots)):
+        free.put(i)
+    ready = queue.Queue()
+    stop = threading.Event()
+
+    def producer():
+        try:
+            for item in items:
+                i = free.get()
+                if stop.is_set():
+                    return
+                ready.put((i, fill(slots[i], item)))
+            ready.put(None)
+        except BaseException as exc:
+            ready.put(exc)
+
+    thread = threading.Thread(target=producer, name=name, daemon=True)
+    thread.start()
+    held = None
+    try:
+        while True:
+            item = ready.get()
+            if held is not None:
+                free.put(held)
+                held = None
+            if item is None:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            held, batch = item
+            yield batch
+    finally:
+        # Unblock and retire the producer if the consumer stopped early
+        stop.set()
+        free.put(None)
+        thread.join()
+
+
+class BatchLoader:
+    """
+    Shuffled mini-batch iterator with background prefetching.
+
+    Each epoch shuffles an index array (never the data), gathers every
+    batch into reused buffers with np.take(..., out=) and normalizes it
+    to `dtype`. A background thread keeps up to `prefetch` batches ready
+    while the caller computes on the current one.
+
+    Yielded (X_batch, y_batch) arrays are views into recycled buffers:
+    they stay valid until the next batch is requested.
+    """
+    def __init__(self, X, y, batch_size, shuffle=True, prefetch=2, dtype=np.float64,
+                 drop_last=False, rng=None, sparse=None):
+        """
+        Args:
+            X: Inputs (n_samples, n_features); uint8 pixels or floats, may be a memmap
+            y: Labels (n_samples,)
+            batch_size: Rows per batch
+            shuffle: Reshuffle the index order every epoch
+            prefetch: Batches prepared ahead on a background thread (0 = inline)
+            dtype: Float dtype of the yielded X batches
+            drop_last: Skip the final ragged batch
+            rng: np.random.Generator/RandomState for shuffling (default: np.random)
+            sparse: Yield CSRMatrix batches (X must be a CSRMatrix); defaults
+                to whether X is one. False expands CSR rows into dense buffers
+        """
+        if X.shape[0] != y.shape[0]:
+            raise ValueError(f"X has {X.shape[0]} rows but y has {y.shape[0]}")
+        self.X = X
+        self.y = y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.prefetch = prefetch
+        self.dtype = np.dtype(dtype)
+        self.drop_last = drop_last
+        self.rng = rng if rng is not None else np.random
+        self.sparse = isinstance(X, CSRMatrix) if sparse is None else sparse
+        if self.sparse and not isinstance(X, CSRMatrix):
+            raise ValueError("sparse batches need a CSRMatrix X")
+
+        # prefetch batches in flight + one held by the consumer
+        self._slots = [self._alloc_slot() for _ in range(max(prefetch, 0) + 1)]
+
+    def _alloc_slot(self):
+        shape = (self.batch_size,) + self.X.shape[1:]
+        slot = {'y': np.empty(self.batch_size, dtype=self.y.dtype)}
+        if self.sparse:
+            # CSR batches have a different size every time; built per batch
+            return slot
+        slot['X'] = np.empty(shape, dtype=self.dtype)
+        if self.X.dtype != self.dtype and not isinstance(self.X, CSRMatrix):
+            slot['raw'] = np.empty(shape, dtype=self.X.dtype)
+        return slot
+
+    @property
+    def n_samples(self):
+        return self.X.shape[0]
+
+    def __len__(self):
+        if self.drop_last:
+            return self.n_samples // self.batch_size
+        return -(-self.n_samples // self.batch_size)
+
+    def _fill(self, slot, idx):
+        """Gather rows `idx` into a slot; returns (X_batch, y_batch) views"""
+        n = idx.shape[0]
+        if isinstance(self.X, CSRMatrix):
+            scale = None if self.X.dtype.kind == 'f' else 1.0 / 255.0
+            if self.sparse:
+                X_batch = self.X.take(idx, dtype=self.dtype, scale=scale)
+            else:
+                X_batch = self.X.take(idx).to_dense(slot['X'][:n], scale=scale)
+        elif 'raw' in slot:
+            raw = np.take(self.X, idx, axis=0, out=slot['raw'][:n])
+            X_batch = normalize(raw, self.dtype, out=slot['X'][:n])
+        else:
+            X_batch = np.take(self.X, idx, axis=0, out=slot['X'][:n])
+        y_batch = np.take(self.y, idx, out=slot['y'][:n])
+        return X_batch, y_batch
+
+    def _batch_indices(self):
+        order = self.rng.permutation(self.n_samples) if self.shuffle else np.arange(self.n_samples)
+        for i in range(len(self)):
+            yield order[i * self.batch_size:(i + 1) * self.batch_size]
+
+    def __iter__(self):
+        return prefetch_batches(self._batch_indices(), self._slots, self._fill, 'BatchLoader')
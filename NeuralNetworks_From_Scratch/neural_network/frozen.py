@@ -0,0 +1,99 @@
+import numpy as np
+from .inference import ChunkedInference
+from .loss_functions import SoftmaxCrossEntropy
+
+class FrozenModel(ChunkedInference):
+    """
+    Immutable inference-only copy of a trained SimpleNN / Sequential.
+
+    Built for low-latency predict on single samples and small batches:
+
+    - Every layer is one GEMM. The bias is folded into an augmented weight
+      matrix [[W, 0], [b, 1]] and a constant-1 column is carried through
+      the activations (ReLU keeps it at 1), so there are no bias adds.
+    - The 1/255 pixel scale is folded into the first layer's weights, so
+      uint8 inputs are only cast into the buffer (normalized floats are
+      multiplied back by 255 while copied).
+    - predict takes the argmax of the logits; no softmax is computed.
+    - Weights are C-contiguous, read-only and in one dtype (default the
+      model's compute dtype; float32 is usually fastest). Activation
+      buffers for up to `max_batch_size` rows are reused, one set per
+      thread, so concurrent predict calls are safe; larger inputs run in
+      chunks.
+
+    Results match the model's up to floating-point rounding. Later changes
+    to the model's weights do not affect a frozen copy.
+    """
+    def __init__(self, model, dtype=None, max_batch_size=64):
+        self.dtype = np.dtype(dtype or model.policy.compute_dtype)
+        self.max_batch_size = self.inference_batch_size = max_batch_size
+        self.activations = tuple(model.activations)
+        self.input_size = model.input_size
+        self.output_size = model.output_size
+        self.weights = tuple(self._augment(model.params[f'W{i}'], model.params[f'b{i}'],
+                                           last=i == len(self.activations),
+                                           scale=1.0 / 255.0 if i == 1 else None)
+                             for i in range(1, len(self.activations) + 1))
+        self.loss_fn = SoftmaxCrossEntropy(self.dtype)
+        # Buffers of the building thread, so the first predict allocates nothing
+        self._workspace(max_batch_size)
+
+    def _augment(self, W, b, last, scale=None):
+        n_in, n_out = W.shape
+        # The output layer needs no constant column
+        width = n_out if last else n_out + 1
+        Wa = np.zeros((n_in + 1, width), dtype=self.dtype)
+        Wa[:n_in, :n_out] = W
+        if scale is not None:
+            # Input scale folded into the weights (the bias row stays unscaled)
+            Wa[:n_in, :n_out] *= self.dtype.type(scale)
+        Wa[n_in, :n_out] = np.reshape(b, -1)
+        if not last:
+            Wa[n_in, n_out] = 1
+        Wa.flags.writeable = False
+        return Wa
+
+    def _allocate(self, rows):
+        X = np.empty((rows, self.input_size + 1), dtype=self.dtype)
+        X[:, -1] = 1
+        buffers = {'X': X, 'rowbuf': np.empty((rows, 1), dtype=self.dtype),
+                   'dlogits': np.empty((rows, self.output_size), dtype=self.dtype)}
+        for i, Wa in enumerate(self.weights, start=1):
+            buffers[f'A{i}'] = np.empty((rows, Wa.shape[1]), dtype=self.dtype)
+        return buffers
+
+    @property
+    def nbytes(self):
+        """Bytes of the (augmented) weights"""
+        return sum(Wa.nbytes for Wa in self.weights)
+
+    def logits(self, X, out=None):
+        """
+        Logits for rows X (n, input_size), raw uint8 or normalized floats,
+        in one pass. Returned in this thread's reused buffer unless `out` given.
+        """
+        return self._forward(X, self._workspace(X.shape[0]), out)
+
+    def _forward(self, X, ws, out=None):
+        n = X.shape[0]
+        X_aug = ws['X'][:n]
+        # The first layer expects 0..255 pixels: uint8 is only cast, floats
+        # are scaled back up in the same pass
+        if X.dtype == np.uint8:
+            np.copyto(X_aug[:, :-1], X, casting='unsafe')
+        else:
+            np.multiply(X, 255, out=X_aug[:, :-1], casting='unsafe')
+        A = X_aug
+        last = len(self.weights)
+        for i, (Wa, activation) in enumerate(zip(self.weights, self.activations), start=1):
+            Z = np.matmul(A, Wa, out=out if i == last and out is not None else ws[f'A{i}'][:n])
+            if activation == 'relu':
+                np.maximum(Z, 0, out=Z)
+            elif activation != 'linear':
+                raise ValueError(f"Unsupported activation: {activation}")
+            A = Z
+        return A
+
+def freeze(model, dtype=None, max_batch_size=64):
+    """Immutable low-latency inference copy of a trained model (see FrozenModel)"""
+    return FrozenModel(model, dtype, max_batch_size)
@@ -0,0 +1,121 @@
+import numpy as np
+from .data import normalize
+from .model import SimpleNN, Sequential
+from .optimizer import SGD
+from .parallel import DataParallel
+from .pipeline import PipelinedStep
+from .sparse import CSRMatrix
+
+# Fixed-seed configurations pinned by the golden file
+CASES = {
+    'simple_float64': {'model': 'SimpleNN', 'sizes': [784, 16, 10], 'dtype': 'float64',
+                       'batch_size': 40, 'seed': 0},
+    'simple_float32': {'model': 'SimpleNN', 'sizes': [784, 16, 10], 'dtype': 'float32',
+                       'batch_size': 40, 'seed': 1},
+    'simple_mixed': {'model': 'SimpleNN', 'sizes': [784, 16, 10], 'dtype': 'mixed',
+                     'batch_size': 40, 'seed': 2},
+    'sequential_float64': {'model': 'Sequential', 'sizes': [784, 16, 12, 10],
+                           'dtype': 'float64', 'batch_size': 30, 'seed': 3},
+    'sequential_float32': {'model': 'Sequential', 'sizes': [784, 16, 12, 10],
+                           'dtype': 'float32', 'batch_size': 30, 'seed': 4},
+}
+
+# (rtol, atol) by compute dtype: engines may reorder sums, so results
+# are compared to rounding error, not bit for bit
+TOLERANCES = {'float64': (1e-9, 1e-12), 'float32': (1e-4, 1e-6)}
+
+def make_case(case):
+    """Model, raw uint8 inputs and labels for one CASES entry"""
+    np.random.seed(case['seed'])
+    sizes = case['sizes']
+    if case['model'] == 'SimpleNN':
+        model = SimpleNN(*sizes, dtype=case['dtype'])
+    else:
+        model = Sequential.from_sizes(sizes, dtype=case['dtype'])
+    rng = np.random.default_rng(case['seed'])
+    X = rng.integers(0, 256, size=(case['batch_size'], sizes[0]), dtype=np.uint8)
+    X[rng.random(X.shape) < 0.8] = 0
+    y = rng.integers(0, sizes[-1], size=case['batch_size'])
+    return model, X, y
+
+def reference_engine(model, X, y):
+    """Model.train_step on the normalized dense batch"""
+    return model.train_step(normalize(X, model.policy.compute_dtype), y)
+
+def sparse_engine(model, X, y):
+    """train_step through the CSR first-layer kernels"""
+    return model.train_step(normalize(CSRMatrix.from_dense(X), model.policy.compute_dtype), y)
+
+def data_parallel_engine(model, X, y, n_workers=2):
+    """One DataParallel step sharded over `n_workers` processes"""
+    with DataParallel(model, n_workers, max_batch_size=X.shape[0]) as engine:
+        loss, logits, grads = engine.train_step(normalize(X, model.policy.compute_dtype), y)
+        # logits live in shared memory, which close() releases
+        return loss, logits.copy(), grads
+
+def pipeline_engine(model, X, y, learning_rate=0.1):
+    """
+    One PipelinedStep with SGD. Its in-step update must equal
+    params - learning_rate * grads; the parameters are then restored so
+    the inference outputs compare against the pinned (pre-update) ones.
+    """
+    before = model.params.flat.copy()
+    with PipelinedStep(model, SGD(learning_rate)) as engine:
+        loss, logits, grads = engine.train_step(normalize(X, model.policy.compute_dtype), y)
+    expected = before - learning_rate * grads.flat.astype(before.dtype)
+    rtol, atol = TOLERANCES[model.policy.compute_dtype.name]
+    if not np.allclose(model.params.flat, expected, rtol=rtol, atol=atol):
+        raise AssertionError("the pipelined update differs from params - lr * grads")
+    np.copyto(model.params.flat, before)
+    model.sync_params()
+    return loss, logits, grads
+
+ENGINES = {'reference': reference_engine, 'sparse': sparse_engine,
+           'data_parallel': data_parallel_engine, 'pipeline': pipeline_engine}
+
+def outputs(model, X, y, engine=reference_engine):
+    """
+    Forward/backward outputs for one batch: loss, logits, every gradient
+    and the chunked inference path's probabilities.
+    """
+    loss, logits, grads = engine(model, X, y)
+    result = {'loss': np.array(loss), 'logits': np.array(logits)}
+    for name in grads:
+        result[name] = np.array(grads[name])
+    result['proba'] = model.predict_proba(X, batch_size=max(X.shape[0] // 3, 1))
+    return result
+
+def record(path, cases=None):
+    """Pin the reference outputs of every case (default CASES) in an .npz file"""
+    cases = cases or CASES
+    arrays = {}
+    for name, case in cases.items():
+        for key, value in outputs(*make_case(case)).items():
+            arrays[f'{name}/{key}'] = value
+    np.savez_compressed(path, **arrays)
+
+def verify(path, engine=reference_engine, cases=None):
+    """
+    Recompute every pinned case with `engine` (a callable like
+    reference_engine: (model, X, y) -> loss, logits, grads) and compare
+    against the golden file.
+
+    Returns:
+        dict of case -> list of (output name, max abs error) that are
+        outside the case's TOLERANCES; empty lists mean a pass
+    """
+    cases = cases or CASES
+    failures = {}
+    with np.load(path) as golden:
+        for name, case in cases.items():
+            model, X, y = make_case(case)
+            rtol, atol = TOLERANCES[model.policy.compute_dtype.name]
+            failures[name] = []
+            for key, value in outputs(model, X, y, engine).items():
+                expected = golden[f'{name}/{key}']
+                if value.shape != expected.shape or \
+                        not np.allclose(value, expected, rtol=rtol, atol=atol):
+                    error = float(np.max(np.abs(value - expected))) \
+                        if value.shape == expected.shape else float('inf')
+                    failures[name].append((key, error))
+    return failures
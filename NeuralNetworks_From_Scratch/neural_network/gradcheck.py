@@ -0,0 +1,115 @@
+import numpy as np
+from .data import normalize
+
+def relative_error(a, b):
+    """max |a - b| / max(|a| + |b|), 0 when both are all zeros"""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    scale = np.max(np.abs(a) + np.abs(b))
+    return float(np.max(np.abs(a - b)) / scale) if scale > 0 else 0.0
+
+def numerical_gradient(f, x, indices, eps=1e-6):
+    """
+    Central differences of a scalar function w.r.t. selected entries of x.
+
+    Args:
+        f: Callable returning a float; reads x (perturbed in place, restored)
+        x: Array whose entries are perturbed
+        indices: Flat indices of the entries to differentiate
+        eps: Step size
+
+    Returns:
+        Gradient values at `indices` (float64)
+    """
+    flat = x.reshape(-1)
+    grad = np.empty(len(indices))
+    for i, index in enumerate(indices):
+        original = flat[index]
+        flat[index] = original + eps
+        plus = f()
+        flat[index] = original - eps
+        minus = f()
+        flat[index] = original
+        grad[i] = (plus - minus) / (2 * eps)
+    return grad
+
+def _sample(size, max_checks, rng):
+    if max_checks is None or size <= max_checks:
+        return np.arange(size)
+    return np.sort(rng.choice(size, max_checks, replace=False))
+
+def check_model(model, X, y, eps=1e-6, max_checks=20, seed=0):
+    """
+    Compare a model's analytic gradients (train_step) against central
+    differences of its loss.
+
+    Use a float64 model: finite differences are meaningless at float32
+    precision. Up to `max_checks` random entries of every parameter are
+    perturbed (all of them with max_checks=None). X may be raw (uint8) or
+    normalized, dense or a CSRMatrix.
+
+    Returns:
+        dict of gradient name -> max relative error (below ~1e-6 is a pass)
+    """
+    rng = np.random.default_rng(seed)
+    X = normalize(X, model.policy.compute_dtype)
+    _, _, grads = model.train_step(X, y)
+    analytic = {name: grads[name].copy() for name in grads}
+
+    def loss():
+        model.sync_params()
+        ws = model.workspace(X.shape[0])
+        return model.loss_fn(model.forward_logits(X), y, grad_out=ws['dlogits'],
+                             rowbuf=ws['rowbuf'])
+
+    errors = {}
+    for name in model.params:
+        param = model.params[name]
+        indices = _sample(param.size, max_checks, rng)
+        numeric = numerical_gradient(loss, param, indices, eps)
+        errors['d' + name] = relative_error(analytic['d' + name].reshape(-1)[indices], numeric)
+    model.sync_params()
+    return errors
+
+def check_layer(layer, x, eps=1e-6, max_checks=20, seed=0):
+    """
+    Check DenseLayer.forward/backward: the loss is sum(forward(x) * R) for a
+    fixed random R, whose gradient w.r.t. the layer output is R.
+
+    Returns:
+        dict with the max relative errors of 'W', 'b' and 'input'
+    """
+    rng = np.random.default_rng(seed)
+    x = np.array(x, dtype=np.float64)
+    R = rng.standard_normal((x.shape[0], layer.W.shape[1]))
+
+    def loss():
+        return float(np.sum(layer.forward(x) * R))
+
+    layer.forward(x)
+    grad_input, grad_W, grad_b = layer.backward(R)
+    errors = {}
+    for name, array, analytic in (('W', layer.W, grad_W), ('b', layer.b, grad_b),
+                                  ('input', x, grad_input)):
+        indices = _sample(array.size, max_checks, rng)
+        numeric = numerical_gradient(loss, array, indices, eps)
+        errors[name] = relative_error(analytic.reshape(-1)[indices], numeric)
+    return errors
+
+def check_loss(loss_fn, logits, labels, eps=1e-6, max_checks=None, seed=0):
+    """
+    Check a loss's gradient w.r.t. the logits. `loss_fn` has the
+    SoftmaxCrossEntropy signature (logits, labels, grad_out, rowbuf).
+
+    Returns:
+        max relative error
+    """
+    rng = np.random.default_rng(seed)
+    logits = np.array(logits, dtype=np.float64)
+    grad = np.empty_like(logits)
+    loss_fn(logits, labels, grad_out=grad)
+    scratch = np.empty_like(logits)
+    indices = _sample(logits.size, max_checks, rng)
+    numeric = numerical_gradient(lambda: loss_fn(logits, labels, grad_out=scratch),
+                                 logits, indices, eps)
+    return relative_error(grad.reshape(-1)[indices], numeric)
@@ -0,0 +1,78 @@
+import threading
+import numpy as np
+from .activation_functions import softmax
+from .loss_functions import loss_value
+from .metrics import Metrics
+
+class ChunkedInference:
+    """
+    predict / predict_proba / evaluate for the inference-only models
+    (QuantizedModel, PrunedModel, FrozenModel).
+
+    Subclasses set `output_size`, `dtype` (of the logits), `loss_fn` and
+    `inference_batch_size`, and implement:
+
+    - `_allocate(rows)`: a workspace dict of buffers for up to `rows` rows,
+      with at least 'rowbuf' (rows, 1) and 'dlogits' (rows, output_size)
+    - `_forward(X, ws)`: logits of one chunk X (at most that many rows),
+      computed in (views of) the workspace
+
+    Workspaces are kept per thread: concurrent predict calls on one model
+    each reuse their own buffers instead of overwriting each other's.
+    """
+    inference_batch_size = 1024
+
+    def _workspace(self, rows):
+        """This thread's workspace, grown to at least `rows` rows"""
+        local = self.__dict__.get('_local')
+        if local is None:
+            local = self.__dict__.setdefault('_local', threading.local())
+        ws = getattr(local, 'ws', None)
+        if ws is None or ws['rowbuf'].shape[0] < rows:
+            ws = local.ws = self._allocate(rows)
+        return ws
+
+    def _chunks(self, X, batch_size=None):
+        n_samples = X.shape[0]
+        chunk = max(1, min(batch_size or self.inference_batch_size, n_samples))
+        ws = self._workspace(chunk)
+        for start in range(0, n_samples, chunk):
+            stop = min(start + chunk, n_samples)
+            yield start, stop, ws, self._forward(X[start:stop], ws)
+
+    def predict(self, X, batch_size=None, out=None):
+        """
+        Class predictions for uint8 pixels or [0, 1] floats, in chunks of
+        `batch_size` rows (default inference_batch_size). A single sample
+        (1-D X) returns an int; a batch an intp array (into `out` if given).
+        """
+        if X.ndim == 1:
+            return int(np.argmax(self._forward(X.reshape(1, -1), self._workspace(1))))
+        if out is None:
+            out = np.empty(X.shape[0], dtype=np.intp)
+        for start, stop, _, logits in self._chunks(X, batch_size):
+            np.argmax(logits, axis=1, out=out[start:stop])
+        return out
+
+    def predict_proba(self, X, batch_size=None, out=None):
+        """Class probabilities (n_samples, output_size), in chunks; 1-D X gives one row"""
+        if X.ndim == 1:
+            return self.predict_proba(X.reshape(1, -1))[0]
+        if out is None:
+            out = np.empty((X.shape[0], self.output_size), dtype=self.dtype)
+        for start, stop, ws, logits in self._chunks(X, batch_size):
+            softmax(logits, out=out[start:stop], rowbuf=ws['rowbuf'][:stop - start])
+        return out
+
+    def evaluate(self, X, y, batch_size=None, metrics=None):
+        """Loss and accuracy, accumulated chunk by chunk like Model.evaluate"""
+        if metrics is None:
+            metrics = Metrics(self.output_size)
+        metrics.reset()
+        for start, stop, ws, logits in self._chunks(X, batch_size):
+            n = stop - start
+            y_chunk = y[start:stop]
+            loss = loss_value(self.loss_fn, logits, y_chunk, scratch=ws['dlogits'][:n],
+                              rowbuf=ws['rowbuf'][:n])
+            metrics.update(logits, y_chunk, loss)
+        return metrics.loss, metrics.accuracy
@@ -1,15 +1,38 @@
 import numpy as np
-from .activation_functions import ReLu, gradReLu
+from .activation_functions import ReLu, gradReLu, ReLu_inplace, gradReLu_inplace
+from . import sparse
+
+def add_bias_inplace(out, b, scratch=None):
+    """
+    out += b (b broadcast over the rows). With a same-shape `scratch` the
+    bias is tiled into it first, so the add is a same-shape ufunc call:
+    NumPy allocates a ufunc buffer for a broadcast operand on every call.
+    """
+    if scratch is None:
+        return np.add(out, b, out=out)
+    np.copyto(scratch, b)
+    return np.add(out, scratch, out=out)
 
 class DenseLayer:
-    def __init__(self, input_dim, output_dim, activation='relu'):
+    def __init__(self, input_dim, output_dim, activation='relu', dtype=np.float64):
         # Xavier/Glorot initialization
-        self.W = np.random.randn(input_dim, output_dim) * np.sqrt(2.0 / input_dim)
-        self.b = np.zeros((1, output_dim))
+        self.W = (np.random.randn(input_dim, output_dim) * np.sqrt(2.0 / input_dim)).astype(dtype)
+        self.b = np.zeros((1, output_dim), dtype=dtype)
         self.input = None
         self.output = None
         self.activation = activation
 
+    @classmethod
+    def from_arrays(cls, W, b, activation='relu'):
+        """Layer around existing weight arrays (no initialization, no copy)"""
+        layer = cls.__new__(cls)
+        layer.W = W
+        layer.b = b
+        layer.input = None
+        layer.output = None
+        layer.activation = activation
+        return layer
+
     def forward(self, x):
         self.input = x
         self.output = x @ self.W + self.b
@@ -30,4 +53,39 @@ class DenseLayer:
         grad_W = self.input.T @ grad_output
         grad_b = np.sum(grad_output, axis=0, keepdims=True)
         
-        return grad_input, grad_W, grad_b
\ No newline at end of file
+        return grad_input, grad_W, grad_b
+
+    def forward_inplace(self, x, out, mask=None, scratch=None):
+        """
+        Allocation-free forward into `out` (batch_size, output_dim).
+        For ReLU layers `mask` (bool, same shape) records the inactive
+        units; `scratch` (same shape, free during forward, e.g. this
+        layer's gradient buffer) is used to tile the bias.
+        `x` may be a sparse.CSRMatrix (first layer).
+        """
+        sparse.matmul(x, self.W, out=out)
+        add_bias_inplace(out, self.b, scratch)
+
+        if self.activation == 'relu':
+            return ReLu_inplace(out, mask)
+        elif self.activation == 'linear':
+            return out
+        else:
+            raise ValueError(f"Unsupported activation: {self.activation}")
+
+    def backward_inplace(self, x, grad_output, grad_W, grad_b, grad_input=None, mask=None):
+        """
+        Allocation-free backward for the forward_inplace call on `x`.
+
+        `grad_output` is overwritten with the pre-activation gradient; the
+        parameter gradients go into `grad_W` / `grad_b` and the gradient
+        w.r.t. `x` into `grad_input` (skipped when None, e.g. first layer).
+        """
+        if self.activation == 'relu':
+            gradReLu_inplace(grad_output, mask)
+
+        sparse.t_matmul(x, grad_output, out=grad_W)
+        np.sum(grad_output, axis=0, keepdims=True, out=grad_b)
+        if grad_input is not None:
+            np.matmul(grad_output, self.W.T, out=grad_input)
+        return grad_input
@@ -1,12 +1,94 @@
 import numpy as np
 
-def cross_entropy(predictions, labels):
+def cross_entropy(predictions, labels, dtype=np.float64):
+    # The per-sample terms stay in the predictions' dtype; only the
+    # reduction is carried out (and returned) in `dtype`.
     n_samples = predictions.shape[0]
     logp = -np.log(predictions[range(n_samples), labels] + 1e-9)
-    return np.sum(logp) / n_samples
+    return float(np.sum(logp, dtype=dtype) / n_samples)
 
-def grad_cross_entropy(predictions, labels):
+def grad_cross_entropy(predictions, labels, dtype=None, out=None):
+    # The gradient keeps the predictions' dtype unless `dtype` is given;
+    # pass `out` to write it into a preallocated buffer instead
     n_samples = predictions.shape[0]
-    grad = predictions.copy()
+    if out is None:
+        grad = predictions.astype(dtype or predictions.dtype, copy=True)
+    else:
+        grad = out
+        np.copyto(grad, predictions)
     grad[range(n_samples), labels] -= 1
-    return grad / n_samples
+    grad /= n_samples
+    return grad
+
+class SoftmaxCrossEntropy:
+    """
+    Fused softmax + cross-entropy computed straight from logits.
+
+    The loss uses log-sum-exp, so no probabilities are materialized and no
+    epsilon clamp is needed. The gradient w.r.t. the logits,
+    (softmax(logits) - one_hot(labels)) / n_samples, is written in place
+    into `grad_out` (the logits themselves when not given).
+
+    Per-row values (max, sum) are broadcast into a logits-shaped tile
+    before they are applied: a same-shape ufunc runs without the casting
+    buffer NumPy allocates for a broadcast operand on every call.
+    """
+    def __init__(self, dtype=np.float64):
+        # dtype of the loss reduction; the gradient keeps the logits' dtype
+        self.dtype = dtype
+        self._tile = None
+
+    def _tile_like(self, logits):
+        """Reused logits-shaped buffer (grown on demand)"""
+        if self._tile is None or self._tile.size < logits.size or self._tile.dtype != logits.dtype:
+            self._tile = np.empty(logits.size, dtype=logits.dtype)
+        return self._tile[:logits.size].reshape(logits.shape)
+
+    def _forward(self, logits, labels, scratch, rowbuf, tile):
+        """
+        Loss, leaving exp(logits - max) in `scratch` and the row sums of
+        it in the returned `sum_exp` (a view of `rowbuf` when given).
+        `tile` (logits-shaped, not the logits) may be `scratch` itself.
+        """
+        n_samples = logits.shape[0]
+        # Shift by the row max, then exponentiate in place
+        row = np.max(logits, axis=1, keepdims=True, out=rowbuf)
+        np.copyto(tile, row)
+        np.subtract(logits, tile, out=scratch)
+        shifted_true = scratch[np.arange(n_samples), labels]
+        np.exp(scratch, out=scratch)
+        sum_exp = np.sum(scratch, axis=1, keepdims=True, out=row)
+
+        # loss = mean(log(sum(exp(z - max))) - (z_true - max))
+        loss = (np.sum(np.log(sum_exp), dtype=self.dtype)
+                - np.sum(shifted_true, dtype=self.dtype)) / n_samples
+        return float(loss), sum_exp
+
+    def __call__(self, logits, labels, grad_out=None, rowbuf=None):
+        n_samples = logits.shape[0]
+        grad = logits if grad_out is None else grad_out
+        tile = self._tile_like(logits)
+        loss, sum_exp = self._forward(logits, labels, grad, rowbuf, tile)
+        np.copyto(tile, sum_exp)
+        np.divide(grad, tile, out=grad)
+        grad[np.arange(n_samples), labels] -= 1
+        np.multiply(grad, grad.dtype.type(1.0 / n_samples), out=grad)
+        return loss
+
+    def loss(self, logits, labels, scratch=None, rowbuf=None):
+        """The loss alone (no gradient pass); `scratch` is a logits-shaped buffer"""
+        if scratch is None:
+            scratch = np.empty_like(logits)
+        # `scratch` doubles as the tile, so no shared state: safe across threads
+        return self._forward(logits, labels, scratch, rowbuf, scratch)[0]
+
+def loss_value(loss_fn, logits, labels, scratch=None, rowbuf=None):
+    """
+    Loss for evaluation: loss_fn.loss when the loss has a loss-only path
+    (SoftmaxCrossEntropy), else the full call with its gradient written
+    into `scratch`.
+    """
+    loss_only = getattr(loss_fn, 'loss', None)
+    if loss_only is not None:
+        return loss_only(logits, labels, scratch=scratch, rowbuf=rowbuf)
+    return loss_fn(logits, labels, grad_out=scratch, rowbuf=rowbuf)
@@ -0,0 +1,118 @@
+import numpy as np
+
+class Metrics:
+    """
+    Streaming classification metrics accumulated as integer counts.
+
+    Every update adds one np.bincount of (label, prediction) pairs to a
+    confusion matrix, plus the row-weighted loss; the argmax and bincount
+    indices go into buffers reused between calls. Accuracy, per-class
+    precision/recall and the mean loss are derived from the counts, so
+    they are exact over any mix of batch sizes (a ragged last batch
+    included).
+
+    With top_k=True the rank of the true class (how many logits beat it)
+    is also counted per row, giving top-k accuracy for every k at once.
+    """
+    def __init__(self, n_classes, top_k=False):
+        self.n_classes = n_classes
+        self.top_k = top_k
+        self._confusion = np.zeros(n_classes * n_classes, dtype=np.int64)
+        self._ranks = np.zeros(n_classes, dtype=np.int64)
+        self._predicted = np.empty(0, dtype=np.intp)
+        self._index = np.empty(0, dtype=np.intp)
+        self.loss_sum = 0.0
+        self.loss_count = 0
+        self.count = 0
+
+    def reset(self):
+        self._confusion.fill(0)
+        self._ranks.fill(0)
+        self.loss_sum = 0.0
+        self.loss_count = 0
+        self.count = 0
+
+    def _buffers(self, n):
+        if self._predicted.shape[0] < n:
+            self._predicted = np.empty(n, dtype=np.intp)
+            self._index = np.empty(n, dtype=np.intp)
+        return self._predicted[:n], self._index[:n]
+
+    def update(self, logits, labels, loss=None):
+        """
+        Add one batch.
+
+        Args:
+            logits: Scores or probabilities (batch_size, n_classes)
+            labels: Integer labels (batch_size,)
+            loss: Optional mean loss of the batch (weighted by its rows)
+
+        Returns:
+            Number of correct predictions in the batch
+        """
+        n = logits.shape[0]
+        predicted, index = self._buffers(n)
+        np.argmax(logits, axis=1, out=predicted)
+        # Flat confusion-matrix cell of every row: label * n_classes + prediction,
+        # computed in intp (uint8 labels would wrap from 17 classes up)
+        np.copyto(index, labels, casting='unsafe')
+        index *= self.n_classes
+        index += predicted
+        counts = np.bincount(index, minlength=self.n_classes * self.n_classes)
+        self._confusion += counts
+        if self.top_k:
+            true_scores = logits[np.arange(n), labels]
+            ranks = np.count_nonzero(logits > true_scores[:, None], axis=1)
+            self._ranks += np.bincount(ranks, minlength=self.n_classes)
+        if loss is not None:
+            self.loss_sum += n * loss
+            self.loss_count += n
+        self.count += n
+        return int(counts[::self.n_classes + 1].sum())
+
+    @property
+    def confusion_matrix(self):
+        """(n_classes, n_classes) counts, rows = true class, columns = predicted"""
+        return self._confusion.reshape(self.n_classes, self.n_classes)
+
+    @property
+    def correct(self):
+        return int(np.trace(self.confusion_matrix))
+
+    @property
+    def accuracy(self):
+        return self.correct / self.count if self.count else 0.0
+
+    @property
+    def loss(self):
+        """Mean loss over all rows passed with a loss"""
+        return self.loss_sum / self.loss_count if self.loss_count else 0.0
+
+    def top_k_accuracy(self, k):
+        """Fraction of rows whose true class is among the k highest scores"""
+        if not self.top_k:
+            raise ValueError("Metrics(top_k=True) is needed for top-k accuracy")
+        return int(self._ranks[:k].sum()) / self.count if self.count else 0.0
+
+    def precision(self):
+        """Per-class precision (0 for classes never predicted)"""
+        confusion = self.confusion_matrix
+        predicted = confusion.sum(axis=0)
+        return np.divide(np.diag(confusion), predicted, out=np.zeros(self.n_classes),
+                         where=predicted > 0)
+
+    def recall(self):
+        """Per-class recall (0 for classes absent from the labels)"""
+        confusion = self.confusion_matrix
+        actual = confusion.sum(axis=1)
+        return np.divide(np.diag(confusion), actual, out=np.zeros(self.n_classes),
+                         where=actual > 0)
+
+    def result(self):
+        """Scalar metrics as a dict (loss, accuracy, top-k if counted)"""
+        result = {'loss': self.loss, 'accuracy': self.accuracy}
+        if self.top_k:
+            for k in (3, 5):
+                if k < self.n_classes:
+                    result[f'top_{k}_accuracy'] = self.top_k_accuracy(k)
+        return result
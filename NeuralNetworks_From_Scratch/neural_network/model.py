@@ -1,122 +1,697 @@
+import contextlib
 import numpy as np
-from .activation_functions import ReLu, gradReLu, softmax
-from .loss_functions import cross_entropy, grad_cross_entropy
-from .utils import accuracy
-
-class SimpleNN:
-    def __init__(self, input_size, hidden_size, output_size):
-        # Xavier/Glorot initialization
-        self.params = {
-            'W1': np.random.randn(input_size, hidden_size) * np.sqrt(2.0 / input_size),
-            'b1': np.zeros((1, hidden_size)),
-            'W2': np.random.randn(hidden_size, output_size) * np.sqrt(2.0 / hidden_size),
-            'b2': np.zeros((1, output_size)),
-        }
-        
+from .activation_functions import ReLu_inplace, gradReLu_inplace, softmax
+from .loss_functions import grad_cross_entropy, SoftmaxCrossEntropy, loss_value
+from .layers import DenseLayer, add_bias_inplace
+from .metrics import Metrics
+from .data import normalize, BatchLoader
+from .precision import get_policy
+from .parameters import ParameterBuffer, GradientAccumulator
+from .parallel import DataParallel
+from .pipeline import PipelinedStep
+from .callbacks import CallbackList, PhaseTimer, ProgressLogger
+from .schedulers import Schedule
+from . import sparse
+from .sparse import CSRMatrix, input_density
+from .streaming import ShardedDataset
+from .augmentation import AugmentedLoader
+
+class Model:
+    """
+    Training/inference machinery shared by SimpleNN and Sequential.
+
+    Subclasses store their weights in a ParameterBuffer (keys W1, b1, W2, ...)
+    and implement `_build_workspace`, `forward_logits` and `backward`.
+    Workspaces always contain 'X', 'logits', 'probs', 'dlogits' and 'rowbuf'.
+    """
+    # Number of per-batch-size training workspaces kept alive (full batch,
+    # ragged last batch, ...)
+    max_workspaces = 4
+    # Rows per chunk on the inference path (predict / predict_proba / evaluate)
+    inference_batch_size = 1024
+    # fit(sparse='auto') trains on CSR inputs below this input density
+    # (crossover measured with benchmarks/sparse.py)
+    sparse_density_threshold = 0.01
+
+    def __init__(self, params, policy):
+        self.policy = policy
+        self.params = params
+        self.compute_params = self.params
+
+        # Reused activation buffers (per batch size) and gradient buffers
+        self.cache = {}
+        self._workspaces = {}
+        self._inference_ws = None
+        self._grads = None
+        self.loss_fn = SoftmaxCrossEntropy()
+        self.stop_training = False
+        self.sync_params()
+
         # For tracking training history
         self.train_losses = []
         self.train_accuracies = []
         self.val_losses = []
         self.val_accuracies = []
 
+    @classmethod
+    def from_params(cls, params, dtype='float64', **config):
+        """
+        Build a model around an existing ParameterBuffer without copying it
+        or drawing random weights (used when loading checkpoints).
+
+        `config` is what get_config() returned for the saved model.
+        """
+        model = cls.__new__(cls)
+        model._restore_config(params, **config)
+        Model.__init__(model, params, get_policy(dtype))
+        model._bind_compute_params()
+        return model
+
+    def get_config(self):
+        """Constructor settings not implied by the parameter shapes"""
+        return {}
+
+    def _restore_config(self, params, **config):
+        """Hook for from_params: set up state other than the parameters"""
+
+    def save(self, path, optimizer=None):
+        """Write a checkpoint directory (see checkpoint.save_checkpoint)"""
+        from .checkpoint import save_checkpoint
+        save_checkpoint(path, self, optimizer)
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """Load the model from a checkpoint (see checkpoint.load_checkpoint)"""
+        from .checkpoint import load_checkpoint
+        return load_checkpoint(path, mmap=mmap, optimizer=False)[0]
+
+    def freeze(self, dtype=None, max_batch_size=64):
+        """Immutable low-latency inference copy (see frozen.FrozenModel)"""
+        from .frozen import FrozenModel
+        return FrozenModel(self, dtype, max_batch_size)
+
+    @property
+    def input_size(self):
+        return self.params['W1'].shape[0]
+
+    @property
+    def output_size(self):
+        return self.params[f'W{len(self.params) // 2}'].shape[1]
+
+    @property
+    def activations(self):
+        """Activation of each layer (W1/b1, W2/b2, ...)"""
+        raise NotImplementedError
+
+    def __getstate__(self):
+        # Workspaces and gradient buffers are scratch; rebuild them lazily
+        state = self.__dict__.copy()
+        state['cache'] = {}
+        state['_workspaces'] = {}
+        state['_inference_ws'] = None
+        state['_grads'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._bind_compute_params()
+
+    def sync_params(self, start=0, stop=None):
+        """
+        Refresh the compute-dtype copy of the weights (mixed precision only),
+        optionally just entries [start, stop) of the flat buffer
+        """
+        if not self.policy.mixed:
+            self.compute_params = self.params
+            return
+        if self.compute_params is self.params:
+            self.compute_params = self.params.like(self.policy.compute_dtype)
+            self._bind_compute_params()
+            start, stop = 0, None
+        np.copyto(self.compute_params.flat[start:stop], self.params.flat[start:stop],
+                  casting='same_kind')
+
+    def layer_span(self, i):
+        """Flat-buffer range [start, stop) holding layer i's W{i} and b{i}"""
+        return self.params.offsets[f'W{i}'][0], self.params.offsets[f'b{i}'][1]
+
+    def _bind_compute_params(self):
+        """Hook for subclasses holding references into compute_params"""
+
+    def workspace(self, batch_size):
+        """
+        Activation/gradient buffers for a given batch size, allocated on
+        first use and reused by every later forward/backward pass.
+        """
+        ws = self._workspaces.get(batch_size)
+        if ws is not None:
+            return ws
+        if len(self._workspaces) >= self.max_workspaces:
+            self._workspaces.pop(next(iter(self._workspaces)))
+
+        ws = self._build_workspace(batch_size, self.policy.compute_dtype)
+        self._workspaces[batch_size] = ws
+        return ws
+
+    def _build_workspace(self, batch_size, dtype):
+        raise NotImplementedError
+
+    def gradients(self):
+        """Gradient buffers (compute dtype) filled in place by backward"""
+        if self._grads is None:
+            self._grads = self.params.like(self.policy.compute_dtype, prefix='d')
+        return self._grads
+
     def forward(self, X):
-        self.cache = {}
-        self.cache['Z1'] = X @ self.params['W1'] + self.params['b1']
-        self.cache['A1'] = ReLu(self.cache['Z1'])
-        self.cache['Z2'] = self.cache['A1'] @ self.params['W2'] + self.params['b2']
-        self.cache['A2'] = softmax(self.cache['Z2'])
-        return self.cache['A2']
-
-    def backward(self, X, y):
-        m = X.shape[0]
-        dZ2 = grad_cross_entropy(self.cache['A2'], y)
-        dW2 = self.cache['A1'].T @ dZ2
-        db2 = np.sum(dZ2, axis=0, keepdims=True)
-
-        dA1 = dZ2 @ self.params['W2'].T
-        dZ1 = dA1 * gradReLu(self.cache['Z1'])
-        dW1 = X.T @ dZ1
-        db1 = np.sum(dZ1, axis=0, keepdims=True)
-
-        grads = {'dW1': dW1, 'db1': db1, 'dW2': dW2, 'db2': db2}
-        return grads
+        """
+        Forward pass into the workspace for X's batch size.
+
+        The returned probabilities (and self.cache) are overwritten by the
+        next forward pass with the same batch size.
+        """
+        logits = self.forward_logits(X)
+        return softmax(logits, out=self.cache['probs'], rowbuf=self.cache['rowbuf'])
+
+    def forward_logits(self, X, ws=None):
+        """
+        Forward pass up to the output logits (no softmax).
+
+        Runs in `ws` when given (leaving self.cache untouched), otherwise
+        in the training workspace for X's batch size, which becomes
+        self.cache for the following backward call.
+        """
+        raise NotImplementedError
+
+    def backward(self, X, y, dlogits=None, on_layer=None):
+        """
+        Backward pass for the last forward call. `on_layer(i)` is called as
+        soon as layer i's gradients are final and its weights are no longer
+        read, from the last layer down (see pipeline.PipelinedStep).
+        """
+        raise NotImplementedError
+
+    def train_step(self, X, y, loss_fn=None, timer=None):
+        """
+        Forward, loss and backward on one normalized batch.
+
+        `timer` (a callbacks.PhaseTimer) gets a lap after each phase.
+
+        Returns:
+            loss, logits (valid until the next forward), grads
+        """
+        loss_fn = loss_fn or self.loss_fn
+        logits = self.forward_logits(X)
+        if timer is not None:
+            timer.lap('forward')
+        ws = self.cache
+        loss = loss_fn(logits, y, grad_out=ws['dlogits'], rowbuf=ws['rowbuf'])
+        if timer is not None:
+            timer.lap('loss')
+        grads = self.backward(X, y, dlogits=ws['dlogits'])
+        if timer is not None:
+            timer.lap('backward')
+        return loss, logits, grads
 
     def update(self, grads, lr):
         for key in self.params:
             self.params[key] -= lr * grads['d' + key]
-    
-    def predict(self, X):
-        """Make predictions on new data"""
-        predictions = self.forward(X)
-        return np.argmax(predictions, axis=1)
-    
-    def evaluate(self, X, y):
-        """Evaluate model on test/validation data"""
-        predictions = self.forward(X)
-        loss = cross_entropy(predictions, y)
-        acc = accuracy(predictions, y)
-        return loss, acc
-
-    def fit(self, X_train, y_train, X_val=None, y_val=None, epochs=10, 
-            batch_size=32, learning_rate=0.01, optimizer=None, verbose=True):
+        self.sync_params()
+
+    def _inference_chunks(self, X, batch_size=None):
+        """
+        Stream X through the forward pass in fixed-size chunks.
+
+        Uses one dedicated inference workspace (no backward cache, training
+        workspaces untouched), so memory stays bounded by the chunk size.
+
+        Yields:
+            start, stop, workspace, logits for rows X[start:stop]
+        """
+        self.sync_params()
+        n_samples = X.shape[0]
+        chunk = max(1, min(batch_size or self.inference_batch_size, n_samples))
+        # A larger existing workspace is reused through views, so alternating
+        # between small and large inputs does not reallocate
+        ws = self._inference_ws
+        if ws is None or ws['X'].shape[0] < chunk:
+            ws = self._inference_ws = self._build_workspace(chunk, self.policy.compute_dtype)
+        if ws['X'].shape[0] > chunk:
+            ws = {key: value[:chunk] for key, value in ws.items()}
+
+        for start in range(0, n_samples, chunk):
+            stop = min(start + chunk, n_samples)
+            if stop - start < chunk:
+                ws = {key: value[:stop - start] for key, value in ws.items()}
+            X_chunk = normalize(X[start:stop], self.policy.compute_dtype, out=ws['X'])
+            yield start, stop, ws, self.forward_logits(X_chunk, ws=ws)
+
+    def predict(self, X, batch_size=None, out=None):
+        """
+        Make predictions on new data.
+
+        Runs in chunks of `batch_size` rows (default inference_batch_size);
+        pass `out` (n_samples,) intp to reuse an output buffer.
+        """
+        if out is None:
+            out = np.empty(X.shape[0], dtype=np.intp)
+        for start, stop, _, logits in self._inference_chunks(X, batch_size):
+            np.argmax(logits, axis=1, out=out[start:stop])
+        return out
+
+    def predict_proba(self, X, batch_size=None, out=None):
+        """Class probabilities for new data, computed in chunks (see predict)"""
+        if out is None:
+            out = np.empty((X.shape[0], self.output_size), dtype=self.policy.compute_dtype)
+        for start, stop, ws, logits in self._inference_chunks(X, batch_size):
+            softmax(logits, out=out[start:stop], rowbuf=ws['rowbuf'])
+        return out
+
+    def evaluate(self, X, y, batch_size=None, metrics=None):
+        """
+        Evaluate model on test/validation data.
+
+        Loss and accuracy are accumulated chunk by chunk in a
+        metrics.Metrics, so memory does not grow with the number of rows.
+        Pass `metrics` to collect into your own (e.g. Metrics(10, top_k=True)
+        for the confusion matrix, precision/recall and top-k accuracy).
+
+        Returns:
+            loss, accuracy over X
+        """
+        if metrics is None:
+            metrics = Metrics(self.output_size)
+        metrics.reset()
+        for start, stop, ws, logits in self._inference_chunks(X, batch_size):
+            y_chunk = y[start:stop]
+            # Loss only: evaluation never runs backward
+            loss = loss_value(self.loss_fn, logits, y_chunk, scratch=ws['dlogits'],
+                              rowbuf=ws['rowbuf'])
+            metrics.update(logits, y_chunk, loss)
+        return metrics.loss, metrics.accuracy
+
+    def fit(self, X_train, y_train, X_val=None, y_val=None, epochs=10,
+            batch_size=32, learning_rate=0.01, optimizer=None, verbose=True,
+            loss=None, n_workers=1, prefetch=2, callbacks=None,
+            val_freq=1, val_every=None, val_subset=None, sparse='auto',
+            accumulate_steps=1, pipeline=False, augment=None, augment_workers=2):
         """
         Train the model with optional validation data.
+
+        Inputs may be dense arrays or a sparse.CSRMatrix. With sparse=True
+        the first layer runs sparse kernels on CSR batches (dense inputs are
+        compressed once); 'auto' does so when the measured input density is
+        below sparse_density_threshold. Validation always runs dense.
+
+        X_train may also be a streaming.ShardedDataset (y_train=None) for
+        data larger than RAM: batches are then streamed from disk through a
+        shuffle buffer (see streaming.StreamingLoader) and run dense.
+
+        `augment` (e.g. augmentation.Augmenter()) augments every training
+        batch on `augment_workers` background processes feeding a bounded
+        queue of batches (see augmentation.AugmentedLoader); batches run
+        dense and validation is not augmented.
+
+        With accumulate_steps=K the gradients of K consecutive mini-batches
+        of `batch_size` rows are summed into one preallocated buffer and the
+        optimizer steps once per K batches (and at the end of each epoch):
+        an effective batch of K * batch_size rows in the memory of one.
+
+        With pipeline=True each layer's parameters are updated on a worker
+        thread as soon as backward is done with that layer, overlapping the
+        optimizer with the rest of the backward pass (see
+        pipeline.PipelinedStep; single process, no accumulation).
+
+        `learning_rate` (float or schedulers.Schedule) is used for the
+        default SGD optimizer; schedules passed to an optimizer that have no
+        total_steps are sized to epochs * optimizer steps per epoch and
+        start over on every fit call (see optimizer.Optimizer).
+
+        `loss` defaults to the fused SoftmaxCrossEntropy op; any callable
+        with the same (logits, labels, grad_out, rowbuf) signature works.
+        With n_workers > 1 every mini-batch is sharded across that many
+        worker processes (see parallel.DataParallel). Batches are gathered
+        by a data.BatchLoader that prefetches `prefetch` batches ahead.
+        `callbacks` is a list of callbacks.Callback; verbose=True adds a
+        ProgressLogger. A callback can end training after the current epoch
+        by setting model.stop_training (see callbacks.EarlyStopping).
+
+        Validation cadence: the full validation pass runs every `val_freq`
+        epochs (val_losses / val_accuracies get one entry per pass). With
+        `val_every` set, a fixed random subset of `val_subset` validation
+        rows (default 1000) is also evaluated every `val_every` batches and
+        reported in the batch logs as 'subset_val_loss' /
+        'subset_val_accuracy'.
         """
+        if loss is not None:
+            self.loss_fn = loss
         if optimizer is None:
             from .optimizer import SGD
             optimizer = SGD(learning_rate)
-        
-        n_samples = X_train.shape[0]
-        n_batches = n_samples // batch_size
-        
-        for epoch in range(epochs):
-            # Shuffle training data
-            permutation = np.random.permutation(n_samples)
-            X_train_shuffled = X_train[permutation]
-            y_train_shuffled = y_train[permutation]
-            
-            epoch_loss = 0
-            epoch_acc = 0
-            
-            # Mini-batch training
-            for i in range(0, n_samples, batch_size):
-                X_batch = X_train_shuffled[i:i+batch_size]
-                y_batch = y_train_shuffled[i:i+batch_size]
-                
-                # Forward pass
-                predictions = self.forward(X_batch)
-                loss = cross_entropy(predictions, y_batch)
-                
-                # Backward pass
-                grads = self.backward(X_batch, y_batch)
-                
-                # Update parameters
-                if hasattr(optimizer, 'update'):
-                    optimizer.update(self.params, grads)
-                else:
-                    self.update(grads, learning_rate)
-                
-                epoch_loss += loss
-                epoch_acc += accuracy(predictions, y_batch)
-            
-            # Average metrics for the epoch
-            epoch_loss /= n_batches
-            epoch_acc /= n_batches
-            
-            self.train_losses.append(epoch_loss)
-            self.train_accuracies.append(epoch_acc)
-            
-            # Validation evaluation
-            if X_val is not None and y_val is not None:
-                val_loss, val_acc = self.evaluate(X_val, y_val)
-                self.val_losses.append(val_loss)
-                self.val_accuracies.append(val_acc)
-                
-                if verbose:
-                    print(f"Epoch {epoch+1}/{epochs}: "
-                          f"Train Loss: {epoch_loss:.4f}, Train Acc: {epoch_acc:.4f}, "
-                          f"Val Loss: {val_loss:.4f}, Val Acc: {val_acc:.4f}")
+
+        self.params.check_writeable()
+        self.sync_params()
+
+        streaming = isinstance(X_train, ShardedDataset)
+        if sparse == 'auto':
+            sparse = n_workers == 1 and not streaming and augment is None \
+                and input_density(X_train) < self.sparse_density_threshold
+        if sparse and (n_workers > 1 or streaming or augment is not None):
+            raise ValueError("Sparse inputs are not supported with n_workers > 1, "
+                             "a ShardedDataset or augment")
+        if streaming and augment is not None:
+            raise ValueError("augment is not supported with a ShardedDataset")
+        if sparse and not isinstance(X_train, CSRMatrix):
+            X_train = CSRMatrix.from_dense(X_train)
+
+        if pipeline and (n_workers > 1 or accumulate_steps > 1):
+            raise ValueError("pipeline=True needs n_workers=1 and accumulate_steps=1")
+
+        if augment is not None:
+            loader = AugmentedLoader(X_train, y_train, batch_size, augment,
+                                     n_workers=augment_workers, queue_size=max(prefetch, 1) + 1,
+                                     dtype=self.policy.compute_dtype)
+        elif streaming:
+            loader = X_train.loader(batch_size, shuffle=True, prefetch=prefetch,
+                                    dtype=self.policy.compute_dtype)
+        else:
+            loader = BatchLoader(X_train, y_train, batch_size, shuffle=True,
+                                 prefetch=prefetch, dtype=self.policy.compute_dtype,
+                                 sparse=bool(sparse))
+        accumulator = GradientAccumulator(self.params, accumulate_steps) \
+            if accumulate_steps > 1 else None
+
+        # LR schedules without an explicit length span this run: built for
+        # it (leaving the schedule's own total_steps unset) and restarted,
+        # so a reused optimizer does not index the new table from its end
+        schedule = getattr(optimizer, 'learning_rate', None)
+        if isinstance(schedule, Schedule):
+            if schedule.total_steps is None:
+                schedule.build(epochs * -(-len(loader) // accumulate_steps))
+                optimizer.schedule_start = optimizer.iterations
             else:
-                if verbose:
-                    print(f"Epoch {epoch+1}/{epochs}: "
-                          f"Train Loss: {epoch_loss:.4f}, Train Acc: {epoch_acc:.4f}")
+                schedule.build()
+
+        callbacks = list(callbacks or [])
+        if verbose:
+            callbacks.append(ProgressLogger())
+        callbacks = CallbackList(callbacks, self)
+        # Phases are only timed when a callback asks for it
+        timer = PhaseTimer() if callbacks.timed else None
+
+        # Single-process training steps run on the model itself
+        if pipeline:
+            step_engine = PipelinedStep(self, optimizer)
+        elif n_workers > 1:
+            step_engine = DataParallel(self, n_workers, max_batch_size=batch_size)
+        else:
+            step_engine = contextlib.nullcontext(self)
+
+        # Fixed validation subset for the cheap in-epoch estimates
+        has_val = X_val is not None and y_val is not None
+        if has_val and val_every:
+            n_val = X_val.shape[0]
+            subset = np.sort(np.random.choice(n_val, min(val_subset or 1000, n_val), replace=False))
+            X_subset, y_subset = X_val[subset], y_val[subset]
+
+        self.stop_training = False
+        metrics = Metrics(self.output_size)
+        callbacks.on_train_start({'epochs': epochs, 'n_batches': len(loader),
+                                  'optimizer': optimizer})
+        # on_train_end runs even when a step raises, so callbacks close
+        # their files and finish background writes; 'completed' tells them
+        # whether the run got through
+        completed = False
+        try:
+            # An augmenting loader owns worker processes for the whole run
+            loader_context = loader if augment is not None else contextlib.nullcontext()
+            with loader_context, step_engine as engine:
+                for epoch in range(epochs):
+                    metrics.reset()
+                    callbacks.on_epoch_start(epoch, {})
+                    if timer is not None:
+                        timer.reset()
+
+                    # Mini-batch training (the loader reshuffles every epoch)
+                    for batch, (X_batch, y_batch) in enumerate(loader):
+                        if timer is not None:
+                            timer.lap('data')
+                        if callbacks:
+                            callbacks.on_batch_start(batch, {'size': X_batch.shape[0]})
+
+                        # Forward pass, fused loss and backward pass
+                        batch_loss, logits, grads = engine.train_step(X_batch, y_batch, timer=timer)
+
+                        # Update parameters (once per accumulate_steps batches;
+                        # a pipelined step has already applied it)
+                        if pipeline:
+                            grads = None
+                        elif accumulator is not None:
+                            accumulator.add(grads, X_batch.shape[0])
+                            grads = accumulator.result() \
+                                if accumulator.ready or batch + 1 == len(loader) else None
+                        if grads is not None:
+                            if hasattr(optimizer, 'update'):
+                                optimizer.update(self.params, grads)
+                                self.sync_params()
+                            else:
+                                self.update(grads, learning_rate)
+                        if timer is not None:
+                            timer.lap('optimizer')
+
+                        batch_acc = metrics.update(logits, y_batch, batch_loss) / X_batch.shape[0]
+
+                        if callbacks:
+                            logs = {'loss': batch_loss, 'accuracy': batch_acc,
+                                    'size': X_batch.shape[0], 'lr': getattr(optimizer, 'lr', None)}
+                            if timer is not None:
+                                timer.lap('metrics')
+                            if has_val and val_every and (batch + 1) % val_every == 0:
+                                logs['subset_val_loss'], logs['subset_val_accuracy'] = \
+                                    self.evaluate(X_subset, y_subset)
+                                if timer is not None:
+                                    timer.lap('validation')
+                            if timer is not None:
+                                logs.update(timer.end_batch())
+                            callbacks.on_batch_end(batch, logs)
+                            if timer is not None:
+                                timer.lap('callbacks', batch=False)
+
+                    if timer is not None:
+                        timer.lap('data', batch=False)
+
+                    # Metrics over every row of the epoch
+                    epoch_loss, epoch_acc = metrics.loss, metrics.accuracy
+
+                    self.train_losses.append(epoch_loss)
+                    self.train_accuracies.append(epoch_acc)
+                    logs = {'loss': epoch_loss, 'accuracy': epoch_acc,
+                            'lr': getattr(optimizer, 'lr', None)}
+
+                    # Validation evaluation
+                    if has_val and (epoch + 1) % val_freq == 0:
+                        val_loss, val_acc = self.evaluate(X_val, y_val)
+                        self.val_losses.append(val_loss)
+                        self.val_accuracies.append(val_acc)
+                        logs['val_loss'] = val_loss
+                        logs['val_accuracy'] = val_acc
+                        if timer is not None:
+                            timer.lap('validation', batch=False)
+
+                    if timer is not None:
+                        logs.update(timer.end_epoch())
+                    callbacks.on_epoch_end(epoch, logs)
+                    if self.stop_training:
+                        break
+            completed = True
+        finally:
+            callbacks.on_train_end({'completed': completed})
+
+class SimpleNN(Model):
+    def __init__(self, input_size, hidden_size, output_size, dtype='float64'):
+        # dtype: 'float64', 'float32', 'mixed' (float64 master weights,
+        # float32 compute) or a precision.Policy
+        policy = get_policy(dtype)
+
+        # Xavier/Glorot initialization, packed into one flat buffer
+        params = ParameterBuffer.pack({
+            'W1': np.random.randn(input_size, hidden_size) * np.sqrt(2.0 / input_size),
+            'b1': np.zeros((1, hidden_size)),
+            'W2': np.random.randn(hidden_size, output_size) * np.sqrt(2.0 / hidden_size),
+            'b2': np.zeros((1, output_size)),
+        }, dtype=policy.param_dtype)
+        super().__init__(params, policy)
+
+    @property
+    def activations(self):
+        return ['relu', 'linear']
+
+    def _build_workspace(self, batch_size, dtype):
+        input_size, hidden_size = self.params['W1'].shape
+        output_size = self.params['W2'].shape[1]
+        ws = {
+            'X': np.empty((batch_size, input_size), dtype=dtype),
+            'A1': np.empty((batch_size, hidden_size), dtype=dtype),
+            'mask1': np.empty((batch_size, hidden_size), dtype=bool),
+            'Z2': np.empty((batch_size, output_size), dtype=dtype),
+            'A2': np.empty((batch_size, output_size), dtype=dtype),
+            'rowbuf': np.empty((batch_size, 1), dtype=dtype),
+            'dZ2': np.empty((batch_size, output_size), dtype=dtype),
+            'dA1': np.empty((batch_size, hidden_size), dtype=dtype),
+        }
+        ws['logits'], ws['probs'], ws['dlogits'] = ws['Z2'], ws['A2'], ws['dZ2']
+        return ws
+
+    def forward_logits(self, X, ws=None):
+        """Forward pass up to the output logits (no softmax)"""
+        params = self.compute_params
+        if ws is None:
+            ws = self.cache = self.workspace(X.shape[0])
+
+        # The gradient buffers are free until backward: they tile the biases
+        A1 = sparse.matmul(X, params['W1'], out=ws['A1'])
+        add_bias_inplace(A1, params['b1'], ws['dA1'])
+        ReLu_inplace(A1, ws['mask1'])
+
+        Z2 = np.matmul(A1, params['W2'], out=ws['Z2'])
+        add_bias_inplace(Z2, params['b2'], ws['dZ2'])
+        return Z2
+
+    def backward(self, X, y, dlogits=None, on_layer=None):
+        """
+        Backward pass for the last forward call.
+
+        `dlogits` is the loss gradient w.r.t. the logits (as produced by
+        SoftmaxCrossEntropy); without it the cross-entropy gradient is
+        derived from the probabilities of the last forward() call.
+
+        Gradients are written into the buffers returned by gradients(), so
+        the returned dict is the same object (with new values) every call.
+        `on_layer` is called with 2, then 1 (see Model.backward).
+        """
+        ws = self.cache
+        grads = self.gradients()
+
+        if dlogits is None:
+            dZ2 = grad_cross_entropy(ws['A2'], y, out=ws['dZ2'])
+        else:
+            dZ2 = dlogits
+        np.matmul(ws['A1'].T, dZ2, out=grads['dW2'])
+        np.sum(dZ2, axis=0, keepdims=True, out=grads['db2'])
+
+        dZ1 = np.matmul(dZ2, self.compute_params['W2'].T, out=ws['dA1'])
+        if on_layer is not None:
+            on_layer(2)
+        gradReLu_inplace(dZ1, ws['mask1'])
+        sparse.t_matmul(X, dZ1, out=grads['dW1'])
+        np.sum(dZ1, axis=0, keepdims=True, out=grads['db1'])
+        if on_layer is not None:
+            on_layer(1)
+
+        return grads
+
+class Sequential(Model):
+    """
+    Stack of DenseLayers trained as one model.
+
+    All layer weights live in a single shared ParameterBuffer (keys W1, b1,
+    W2, b2, ... in layer order) and each layer's W/b are rebound to views
+    into it, so the flat-buffer optimizers, dtype policies and workspaces
+    apply unchanged. The last layer produces logits and should normally use
+    activation='linear'.
+    """
+    def __init__(self, layers, dtype='float64'):
+        policy = get_policy(dtype)
+        self.layers = list(layers)
+        if not self.layers:
+            raise ValueError("Sequential needs at least one layer")
+        for i, (prev, layer) in enumerate(zip(self.layers, self.layers[1:]), start=1):
+            if prev.W.shape[1] != layer.W.shape[0]:
+                raise ValueError(f"Layer {i} outputs {prev.W.shape[1]} features "
+                                 f"but layer {i + 1} expects {layer.W.shape[0]}")
+
+        arrays = {}
+        for i, layer in enumerate(self.layers, start=1):
+            arrays[f'W{i}'] = layer.W
+            arrays[f'b{i}'] = layer.b
+        params = ParameterBuffer.pack(arrays, dtype=policy.param_dtype)
+        super().__init__(params, policy)
+        self._bind_compute_params()
+
+    @classmethod
+    def from_sizes(cls, sizes, activation='relu', dtype='float64'):
+        """
+        Build an MLP from layer sizes, e.g. [784, 256, 128, 10]: hidden
+        layers use `activation`, the output layer is linear.
+        """
+        layers = [DenseLayer(n_in, n_out, activation)
+                  for n_in, n_out in zip(sizes[:-2], sizes[1:-1])]
+        layers.append(DenseLayer(sizes[-2], sizes[-1], 'linear'))
+        return cls(layers, dtype=dtype)
+
+    @property
+    def activations(self):
+        return [layer.activation for layer in self.layers]
+
+    def get_config(self):
+        return {'activations': self.activations}
+
+    def _restore_config(self, params, activations):
+        self.layers = [DenseLayer.from_arrays(params[f'W{i}'], params[f'b{i}'], activation)
+                       for i, activation in enumerate(activations, start=1)]
+
+    def _bind_compute_params(self):
+        for i, layer in enumerate(self.layers, start=1):
+            layer.W = self.compute_params[f'W{i}']
+            layer.b = self.compute_params[f'b{i}']
+
+    def _build_workspace(self, batch_size, dtype):
+        ws = {
+            'X': np.empty((batch_size, self.input_size), dtype=dtype),
+            'rowbuf': np.empty((batch_size, 1), dtype=dtype),
+        }
+        for i, layer in enumerate(self.layers, start=1):
+            shape = (batch_size, layer.W.shape[1])
+            ws[f'A{i}'] = np.empty(shape, dtype=dtype)
+            ws[f'dA{i}'] = np.empty(shape, dtype=dtype)
+            if layer.activation == 'relu':
+                ws[f'mask{i}'] = np.empty(shape, dtype=bool)
+        n = len(self.layers)
+        ws['logits'], ws['dlogits'] = ws[f'A{n}'], ws[f'dA{n}']
+        ws['probs'] = np.empty_like(ws['logits'])
+        return ws
+
+    def forward_logits(self, X, ws=None):
+        """Forward pass up to the output logits (no softmax)"""
+        if ws is None:
+            ws = self.cache = self.workspace(X.shape[0])
+
+        A = X
+        for i, layer in enumerate(self.layers, start=1):
+            # dA{i} is free until backward: it tiles the layer's bias
+            A = layer.forward_inplace(A, ws[f'A{i}'], ws.get(f'mask{i}'), scratch=ws[f'dA{i}'])
+        return A
+
+    def backward(self, X, y, dlogits=None, on_layer=None):
+        """
+        Backward pass for the last forward call.
+
+        Same contract as SimpleNN.backward: gradients are written into the
+        buffers returned by gradients() (keys dW1, db1, ...).
+        """
+        ws = self.cache
+        grads = self.gradients()
+
+        if dlogits is None:
+            dlogits = grad_cross_entropy(ws['probs'], y, out=ws['dlogits'])
+
+        grad = dlogits
+        for i in range(len(self.layers), 0, -1):
+            layer_input = ws[f'A{i - 1}'] if i > 1 else X
+            grad_input = ws[f'dA{i - 1}'] if i > 1 else None
+            self.layers[i - 1].backward_inplace(
+                layer_input, grad, grads[f'dW{i}'], grads[f'db{i}'],
+                grad_input=grad_input, mask=ws.get(f'mask{i}'))
+            if on_layer is not None:
+                on_layer(i)
+            grad = grad_input
+        return grads
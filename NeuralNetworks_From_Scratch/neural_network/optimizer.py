@@ -1,46 +1,229 @@
+import math
 import numpy as np
+from .parameters import ParameterBuffer
+from .schedulers import Schedule
 
-class SGD:
-    def __init__(self, learning_rate=0.01):
+class Optimizer:
+    """
+    Base class for optimizers that update a flat parameter buffer in place.
+
+    `update(params, grads)` accepts the model's ParameterBuffers directly
+    (zero-copy). Plain dicts are still supported: the parameters are packed
+    into a flat buffer once (the dict's values are rebound to views into it)
+    and the gradients are staged into a flat buffer every step. Gradients in
+    a different dtype than the parameters (mixed precision) are cast into
+    that staging buffer once, so the update ops below never mix dtypes.
+
+    `learning_rate` is a float or a schedulers.Schedule, looked up once per
+    step at position `iterations - schedule_start`; `lr_scale` multiplies
+    either (ReduceLROnPlateau lowers it) and `lr` is the rate the last step
+    used. fit() restarts a schedule it sized itself (no total_steps) at
+    every call by moving schedule_start; a schedule with its own
+    total_steps keeps counting across fit calls (and checkpoint resumes).
+
+    A step is `begin_step` (bind the buffers, advance the counters) followed
+    by `apply` over ranges of the flat buffer. The update is elementwise, so
+    the ranges can be applied in any order and from another thread, e.g.
+    one layer at a time as its gradients become ready (see
+    pipeline.PipelinedStep); `update` applies the whole buffer at once.
+    """
+    def __init__(self, learning_rate):
         self.learning_rate = learning_rate
-    
-    def update(self, params, grads):
+        self.lr_scale = 1.0
+        self.lr = None
+        self.iterations = 0
+        self.schedule_start = 0
+        self._params = None
+        self._grads = None
+        self._grad_stage = None
+        self._scratch = None
+        self._step = None
+
+    def _flatten(self, params, grads):
+        """
+        Return (flat params, flat grads, flat grads still to be cast into
+        the staging buffer by apply, or None) for this step
+        """
+        if not isinstance(params, ParameterBuffer):
+            packed = self._params
+            if packed is None or any(params[key] is not packed[key] for key in params):
+                packed = ParameterBuffer.pack(params)
+                for key in packed:
+                    params[key] = packed[key]
+            params = packed
+
+        if params is not self._params:
+            params.check_writeable()
+            self._params = params
+            self._grads = None
+            self._grad_stage = None
+            self._scratch = np.empty_like(params.flat)
+            self._init_state(params)
+
+        if grads is self._grads:
+            return params.flat, grads.flat, None
+        if self._grad_stage is None:
+            self._grad_stage = params.like(prefix='d')
+
+        if isinstance(grads, ParameterBuffer) and grads.shapes == params.shapes:
+            if grads.dtype == params.dtype:
+                self._grads = grads
+                return params.flat, grads.flat, None
+            # Cast range by range in apply(), when those gradients are ready
+            return params.flat, self._grad_stage.flat, grads.flat
         for key in params:
-            params[key] -= self.learning_rate * grads['d' + key]
+            np.copyto(self._grad_stage['d' + key], grads['d' + key], casting='same_kind')
+        return params.flat, self._grad_stage.flat, None
 
-class Adam:
-    def __init__(self, learning_rate=0.001, beta1=0.9, beta2=0.999, epsilon=1e-8):
-        self.learning_rate = learning_rate
+    def _next_lr(self):
+        """Learning rate for this step (advances the schedule)"""
+        lr = self.learning_rate
+        if isinstance(lr, Schedule):
+            lr = lr(self.iterations - self.schedule_start)
+        self.iterations += 1
+        self.lr = lr * self.lr_scale
+        return self.lr
+
+    def _init_state(self, params):
+        """Allocate per-parameter state for a newly seen ParameterBuffer"""
+
+    def get_config(self):
+        """Constructor arguments (hyperparameters)"""
+        return {'learning_rate': self.learning_rate}
+
+    def state_buffers(self):
+        """Per-parameter state as name -> ParameterBuffer (for checkpoints)"""
+        return {}
+
+    def load_state(self, buffers, t=0, iterations=0, lr_scale=1.0, schedule_start=0):
+        """
+        Restore state saved from state_buffers(). The buffers are kept as
+        long as the next update's parameters have the same layout.
+        """
+        for name, buffer in buffers.items():
+            setattr(self, name, buffer)
+        if hasattr(self, 't'):
+            self.t = t
+        self.iterations = iterations
+        self.schedule_start = schedule_start
+        self.lr_scale = lr_scale
+        self._params = None
+
+    def begin_step(self, params, grads):
+        """
+        Start one update of `params` from `grads`. The gradient values are
+        only read by the following apply() calls.
+        """
+        self._step = self._flatten(params, grads)
+        self._prepare()
+
+    def apply(self, start=0, stop=None):
+        """Update entries [start, stop) of the flat buffer for the current step"""
+        p, g, source = self._step
+        span = slice(start, stop)
+        if source is not None:
+            np.copyto(g[span], source[span], casting='same_kind')
+        self._apply(p[span], g[span], span)
+
+    def update(self, params, grads):
+        self.begin_step(params, grads)
+        self.apply()
+
+    def _prepare(self):
+        """Per-step scalars (learning rate, bias corrections)"""
+
+    def _apply(self, p, g, span):
+        """Elementwise update of the views p, g (state arrays sliced by `span`)"""
+        raise NotImplementedError
+
+class SGD(Optimizer):
+    def __init__(self, learning_rate=0.01, momentum=0.0):
+        super().__init__(learning_rate)
+        self.momentum = momentum
+        self.velocity = None
+
+    def _init_state(self, params):
+        if self.momentum and not (isinstance(self.velocity, ParameterBuffer)
+                                  and self.velocity.shapes == params.shapes):
+            self.velocity = params.like(prefix='d')
+
+    def get_config(self):
+        return {'learning_rate': self.learning_rate, 'momentum': self.momentum}
+
+    def state_buffers(self):
+        return {'velocity': self.velocity} if self.velocity is not None else {}
+
+    def _prepare(self):
+        self._lr = self._next_lr()
+
+    def _apply(self, p, g, span):
+        step = self._scratch[span]
+
+        if self.momentum:
+            # v = momentum * v + g;  p -= lr * v
+            v = self.velocity.flat[span]
+            np.multiply(v, self.momentum, out=v)
+            np.add(v, g, out=v)
+            g = v
+
+        np.multiply(g, self._lr, out=step)
+        np.subtract(p, step, out=p)
+
+class Adam(Optimizer):
+    def __init__(self, learning_rate=0.001, beta1=0.9, beta2=0.999, epsilon=1e-8, dtype=None):
+        super().__init__(learning_rate)
         self.beta1 = beta1
         self.beta2 = beta2
         self.epsilon = epsilon
+        # Dtype of the moment estimates; defaults to the parameters' dtype
+        self.dtype = dtype
         self.m = {}
         self.v = {}
         self.t = 0
-    
-    def update(self, params, grads):
+
+    def _init_state(self, params):
+        if not (isinstance(self.m, ParameterBuffer) and self.m.shapes == params.shapes):
+            self.m = params.like(dtype=self.dtype, prefix='d')
+            self.v = params.like(dtype=self.dtype, prefix='d')
+        self._scratch = np.empty_like(self.m.flat)
+
+    def get_config(self):
+        return {'learning_rate': self.learning_rate, 'beta1': self.beta1, 'beta2': self.beta2,
+                'epsilon': self.epsilon,
+                'dtype': np.dtype(self.dtype).name if self.dtype is not None else None}
+
+    def state_buffers(self):
+        if not isinstance(self.m, ParameterBuffer):
+            return {}
+        return {'m': self.m, 'v': self.v}
+
+    def _prepare(self):
         self.t += 1
-        
-        # Initialize momentum and velocity if first iteration
-        if not self.m:
-            for key in params:
-                self.m['d' + key] = np.zeros_like(params[key])
-                self.v['d' + key] = np.zeros_like(params[key])
-        
-        for key in params:
-            grad_key = 'd' + key
-            
-            # Update biased first moment estimate
-            self.m[grad_key] = self.beta1 * self.m[grad_key] + (1 - self.beta1) * grads[grad_key]
-            
-            # Update biased second raw moment estimate
-            self.v[grad_key] = self.beta2 * self.v[grad_key] + (1 - self.beta2) * (grads[grad_key] ** 2)
-            
-            # Compute bias-corrected first moment estimate
-            m_corrected = self.m[grad_key] / (1 - self.beta1 ** self.t)
-            
-            # Compute bias-corrected second raw moment estimate
-            v_corrected = self.v[grad_key] / (1 - self.beta2 ** self.t)
-            
-            # Update parameters
-            params[key] -= self.learning_rate * m_corrected / (np.sqrt(v_corrected) + self.epsilon)
+        # Fold both bias corrections into the step size and epsilon:
+        # m_hat / (sqrt(v_hat) + eps) == (m / (sqrt(v) + eps_t)) * sqrt(1 - b2^t) / (1 - b1^t)
+        correction1 = 1 - self.beta1 ** self.t
+        correction2 = math.sqrt(1 - self.beta2 ** self.t)
+        self._step_size = self._next_lr() * correction2 / correction1
+        self._epsilon = self.epsilon * correction2
+
+    def _apply(self, p, g, span):
+        m, v, tmp = self.m.flat[span], self.v.flat[span], self._scratch[span]
+        step_size, epsilon = self._step_size, self._epsilon
+
+        # Biased first moment: m += (1 - b1) * (g - m)
+        np.subtract(g, m, out=tmp)
+        np.multiply(tmp, 1 - self.beta1, out=tmp)
+        np.add(m, tmp, out=m)
+
+        # Biased second raw moment: v += (1 - b2) * (g^2 - v)
+        np.multiply(g, g, out=tmp)
+        np.subtract(tmp, v, out=tmp)
+        np.multiply(tmp, 1 - self.beta2, out=tmp)
+        np.add(v, tmp, out=v)
+
+        # p -= step_size * m / (sqrt(v) + eps_t)
+        np.sqrt(v, out=tmp)
+        np.add(tmp, epsilon, out=tmp)
+        np.divide(m, tmp, out=tmp)
+        np.multiply(tmp, step_size, out=tmp)
+        np.subtract(p, tmp, out=p)
@@ -0,0 +1,204 @@
+import multiprocessing as mp
+import traceback
+from multiprocessing import shared_memory
+import numpy as np
+from .parameters import ParameterBuffer
+from .precision import Policy
+
+class DataParallel:
+    """
+    Data-parallel training steps for a Model.
+
+    A pool of worker processes each holds a replica of the model whose
+    weights are views into one shared-memory buffer. For every mini-batch
+    the main process writes the normalized batch into shared memory, each
+    worker runs forward/loss/backward on its shard of rows and writes its
+    (shard-weighted) gradients into its own row of a shared gradient
+    matrix, and the main process sums the rows into the model's gradient
+    buffer before the optimizer step.
+
+    Exposes the same `train_step` as Model, so `fit` drives it unchanged.
+    Views into shared memory never leave this object, so close() can
+    always release it. Use as a context manager or call `close()`.
+
+    For near-linear scaling give each worker one BLAS thread (e.g. set
+    OPENBLAS_NUM_THREADS=1 / OMP_NUM_THREADS=1 before starting Python).
+    """
+    def __init__(self, model, n_workers, max_batch_size):
+        self.model = model
+        self.n_workers = n_workers
+        self.max_batch_size = max_batch_size
+        self.dtype = model.policy.compute_dtype
+        self._closed = False
+
+        n_params = model.compute_params.flat.size
+        n_outputs = model.params[f'W{len(model.params) // 2}'].shape[1]
+        itemsize = self.dtype.itemsize
+        self._shm = {
+            'weights': _alloc(n_params * itemsize),
+            'grads': _alloc(n_workers * n_params * itemsize),
+            'X': _alloc(max_batch_size * model.input_size * itemsize),
+            'y': _alloc(max_batch_size * 8),
+            'logits': _alloc(max_batch_size * n_outputs * itemsize),
+            'loss': _alloc(n_workers * 8),
+        }
+        self._arrays = _attach(self._shm, self.dtype, n_workers, n_params,
+                               max_batch_size, model.input_size, n_outputs)
+        np.copyto(self._arrays['weights'], model.compute_params.flat)
+
+        self._conns = []
+        self._workers = []
+        for rank in range(n_workers):
+            parent_conn, child_conn = mp.Pipe()
+            worker = mp.Process(
+                target=_worker_main,
+                args=(child_conn, model, {k: shm.name for k, shm in self._shm.items()},
+                      rank, n_workers, max_batch_size, n_outputs),
+                daemon=True)
+            worker.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._workers.append(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def train_step(self, X, y, loss_fn=None, timer=None):
+        """
+        Sharded forward, loss and backward on one normalized batch.
+
+        `timer` gets a single 'step' lap (the phases run in the workers).
+
+        Returns:
+            loss, logits (valid until the next step), the model's grads
+        """
+        if loss_fn is not None:
+            raise ValueError("DataParallel uses the model's loss_fn")
+        arrays = self._arrays
+        batch_size = X.shape[0]
+        if batch_size > self.max_batch_size:
+            raise ValueError(f"Batch of {batch_size} exceeds max_batch_size={self.max_batch_size}")
+        np.copyto(arrays['X'][:batch_size], X)
+        arrays['y'][:batch_size] = y
+
+        # Publish the weights the optimizer produced since the last step
+        np.copyto(arrays['weights'], self.model.compute_params.flat)
+
+        bounds = np.linspace(0, batch_size, self.n_workers + 1).astype(int)
+        for rank, conn in enumerate(self._conns):
+            conn.send((bounds[rank], bounds[rank + 1], batch_size))
+        for conn in self._conns:
+            status = conn.recv()
+            if status is not None:
+                self.close()
+                raise RuntimeError(f"DataParallel worker failed:\n{status}")
+
+        # Reduce: the workers already weighted their shard by its size
+        grads = self.model.gradients()
+        np.sum(arrays['grads'], axis=0, out=grads.flat)
+        loss = float(np.sum(arrays['loss']))
+        logits = self.model.workspace(batch_size)['logits']
+        np.copyto(logits, arrays['logits'][:batch_size])
+        if timer is not None:
+            timer.lap('step')
+        return loss, logits, grads
+
+    def close(self):
+        """Stop the workers and release the shared memory"""
+        if self._closed:
+            return
+        self._closed = True
+        for conn in self._conns:
+            try:
+                conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        for conn in self._conns:
+            conn.close()
+        self._arrays = None
+        for shm in self._shm.values():
+            shm.close()
+            shm.unlink()
+
+def _alloc(nbytes):
+    return shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+
+def _attach(shms, dtype, n_workers, n_params, max_batch_size, input_size, n_outputs):
+    """numpy views over the shared-memory blocks"""
+    def view(name, shape, view_dtype=dtype):
+        return np.ndarray(shape, dtype=view_dtype, buffer=shms[name].buf)
+    return {
+        'weights': view('weights', (n_params,)),
+        'grads': view('grads', (n_workers, n_params)),
+        'X': view('X', (max_batch_size, input_size)),
+        'y': view('y', (max_batch_size,), np.int64),
+        'logits': view('logits', (max_batch_size, n_outputs)),
+        'loss': view('loss', (n_workers,), np.float64),
+    }
+
+def _worker_main(conn, model, shm_names, rank, n_workers, max_batch_size, n_outputs):
+    shms = {name: shared_memory.SharedMemory(name=shm_name)
+            for name, shm_name in shm_names.items()}
+    try:
+        _worker_loop(conn, model, shms, rank, n_workers, max_batch_size, n_outputs)
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        # Every view into shared memory died with _worker_loop's frame
+        del model
+        for shm in shms.values():
+            shm.close()
+
+def _worker_loop(conn, model, shms, rank, n_workers, max_batch_size, n_outputs):
+    dtype = model.policy.compute_dtype
+    n_params = model.compute_params.flat.size
+    arrays = _attach(shms, dtype, n_workers, n_params, max_batch_size,
+                     model.input_size, n_outputs)
+
+    # Replica: compute-dtype weights in shared memory, gradients written
+    # straight into this worker's row of the shared gradient matrix
+    shapes = {name: model.params[name].shape for name in model.params}
+    model.policy = Policy(dtype)
+    model.params = model.compute_params = ParameterBuffer(shapes, dtype, buffer=shms['weights'].buf)
+    model._bind_compute_params()
+    model._workspaces = {}
+    model._grads = ParameterBuffer({'d' + name: shape for name, shape in shapes.items()},
+                                   dtype, buffer=shms['grads'].buf,
+                                   offset=rank * n_params * dtype.itemsize)
+    grads = model._grads.flat
+
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            try:
+                start, stop, batch_size = msg
+                if stop > start:
+                    loss, logits, _ = model.train_step(arrays['X'][start:stop],
+                                                       arrays['y'][start:stop])
+                    weight = (stop - start) / batch_size
+                    np.multiply(grads, weight, out=grads)
+                    arrays['logits'][start:stop] = logits
+                    arrays['loss'][rank] = loss * weight
+                else:
+                    grads.fill(0)
+                    arrays['loss'][rank] = 0.0
+                conn.send(None)
+            except Exception:
+                conn.send(traceback.format_exc())
+    finally:
+        # The caller closes the shared memory; drop the replica's views first
+        model.params = model.compute_params = model._grads = None
+        model._workspaces = {}
+        model.cache = {}
+        if hasattr(model, 'layers'):
+            for layer in model.layers:
+                layer.W = layer.b = layer.input = layer.output = None
@@ -0,0 +1,120 @@
+import numpy as np
+
+class ParameterBuffer(dict):
+    """
+    Dict of named arrays that are all views into one contiguous flat buffer.
+
+    Models keep their parameters and gradients in ParameterBuffers with the
+    same layout (gradient keys are the parameter keys prefixed with 'd'), so
+    optimizers can update everything with a few vectorized ops on `.flat`
+    instead of looping over the dict.
+    """
+    def __init__(self, shapes, dtype=np.float64, buffer=None, offset=0):
+        """
+        Args:
+            shapes: Ordered mapping of name -> shape
+            dtype: dtype of the flat buffer
+            buffer: Optional object exposing the buffer protocol (e.g. a
+                SharedMemory's .buf) to place the flat array in, uninitialized
+            offset: Byte offset into `buffer`
+        """
+        super().__init__()
+        self.shapes = tuple(tuple(shape) for shape in shapes.values())
+        sizes = [int(np.prod(shape)) for shape in self.shapes]
+        if buffer is None:
+            self.flat = np.zeros(sum(sizes), dtype=dtype)
+        else:
+            self.flat = np.frombuffer(buffer, dtype=dtype, count=sum(sizes), offset=offset)
+        self.offsets = {}
+        start = 0
+        for name, shape, size in zip(shapes, self.shapes, sizes):
+            self.offsets[name] = (start, start + size)
+            self[name] = self.flat[start:start + size].reshape(shape)
+            start += size
+
+    @classmethod
+    def pack(cls, arrays, dtype=None, prefix=''):
+        """Copy a dict of arrays into a new buffer, optionally renaming keys"""
+        if dtype is None:
+            dtype = np.result_type(*arrays.values())
+        buffer = cls({prefix + name: value.shape for name, value in arrays.items()}, dtype)
+        for name, value in arrays.items():
+            np.copyto(buffer[prefix + name], value, casting='same_kind')
+        return buffer
+
+    def like(self, dtype=None, prefix=''):
+        """Zero-filled buffer with the same layout (keys optionally prefixed)"""
+        return ParameterBuffer({prefix + name: self[name].shape for name in self},
+                               dtype or self.flat.dtype)
+
+    def check_writeable(self):
+        """Raise ValueError if the flat buffer is read-only (e.g. memory-mapped)"""
+        if not self.flat.flags.writeable:
+            raise ValueError("The parameters are read-only (a checkpoint loaded with "
+                             "mmap=True); load it with mmap='copy-on-write' or "
+                             "mmap=False to train")
+
+    @property
+    def nbytes(self):
+        return self.flat.nbytes
+
+    @property
+    def dtype(self):
+        return self.flat.dtype
+
+    def __setitem__(self, name, value):
+        # Rebinding a key would silently detach it from the flat buffer
+        if name in self and value is not self[name]:
+            raise TypeError("ParameterBuffer entries are views; update them in place "
+                            "(e.g. buffer[name][...] = value)")
+        super().__setitem__(name, value)
+
+    def __reduce__(self):
+        # Pickle the layout and the flat array only, so the unpickled views
+        # still share one buffer
+        shapes = {name: self[name].shape for name in self}
+        return (_rebuild_parameter_buffer, (shapes, self.flat))
+
+def _rebuild_parameter_buffer(shapes, flat):
+    buffer = ParameterBuffer(shapes, flat.dtype)
+    np.copyto(buffer.flat, flat)
+    return buffer
+
+class GradientAccumulator:
+    """
+    Sums the gradients of `steps` micro-batches into one preallocated
+    buffer (same layout as the parameters, in their dtype), so a large
+    effective batch only needs one micro-batch of activations in memory
+    and one optimizer step.
+
+    Each micro-batch's gradients are a mean over its rows; they are
+    weighted by the row count, so `result()` is the mean over every row of
+    the effective batch, as if it had been one batch.
+    """
+    def __init__(self, params, steps):
+        self.steps = steps
+        self.grads = params.like(prefix='d')
+        self.count = 0
+        self.samples = 0
+
+    @property
+    def ready(self):
+        return self.count >= self.steps
+
+    def add(self, grads, n):
+        """Accumulate `grads` (a ParameterBuffer, overwritten as scratch) of n rows"""
+        total = self.grads.flat
+        if self.count == 0:
+            np.multiply(grads.flat, n, out=total)
+        else:
+            np.multiply(grads.flat, n, out=grads.flat)
+            np.add(total, grads.flat, out=total)
+        self.count += 1
+        self.samples += n
+
+    def result(self):
+        """Mean gradients over the accumulated rows; starts a new accumulation"""
+        np.multiply(self.grads.flat, 1.0 / self.samples, out=self.grads.flat)
+        self.count = 0
+        self.samples = 0
+        return self.grads
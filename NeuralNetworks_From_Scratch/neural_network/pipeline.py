@@ -0,0 +1,89 @@
+import queue
+import threading
+
+class PipelinedStep:
+    """
+    Training steps that overlap the backward pass with the optimizer.
+
+    As soon as backward has finished with a layer (its gradients are final
+    and its weights are no longer read), that layer's slice of the flat
+    parameter buffer is queued to an update thread, which runs the
+    optimizer on it (and refreshes the mixed-precision compute copy)
+    while the main thread computes the gradients of the layers below.
+    NumPy releases the GIL inside BLAS calls and ufunc loops, so the two
+    really run side by side; the gain grows with the number of layers.
+
+    train_step applies the update itself and returns once every layer is
+    updated. The result is identical to train_step + optimizer.update.
+    Use as a context manager or call `close()`.
+    """
+    def __init__(self, model, optimizer):
+        if not hasattr(optimizer, 'begin_step'):
+            raise TypeError("PipelinedStep needs an optimizer with begin_step/apply")
+        self.model = model
+        self.optimizer = optimizer
+        self._spans = {}
+        self._tasks = queue.Queue()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _span(self, layer):
+        span = self._spans.get(layer)
+        if span is None:
+            span = self._spans[layer] = self.model.layer_span(layer)
+        return span
+
+    def _run(self):
+        while True:
+            span = self._tasks.get()
+            try:
+                if span is None:
+                    return
+                if self._error is None:
+                    self.optimizer.apply(*span)
+                    self.model.sync_params(*span)
+            except BaseException as exc:
+                self._error = exc
+            finally:
+                self._tasks.task_done()
+
+    def train_step(self, X, y, loss_fn=None, timer=None):
+        """
+        Forward, loss, and backward pipelined with the parameter update.
+
+        Returns:
+            loss, logits (valid until the next forward), grads
+        """
+        model = self.model
+        loss_fn = loss_fn or model.loss_fn
+        logits = model.forward_logits(X)
+        if timer is not None:
+            timer.lap('forward')
+        ws = model.cache
+        loss = loss_fn(logits, y, grad_out=ws['dlogits'], rowbuf=ws['rowbuf'])
+        if timer is not None:
+            timer.lap('loss')
+
+        self.optimizer.begin_step(model.params, model.gradients())
+        grads = model.backward(X, y, dlogits=ws['dlogits'],
+                               on_layer=lambda layer: self._tasks.put(self._span(layer)))
+        self._tasks.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+        if timer is not None:
+            timer.lap('backward')
+        return loss, logits, grads
+
+    def close(self):
+        """Stop the update thread"""
+        if self._thread.is_alive():
+            self._tasks.put(None)
+            self._thread.join()
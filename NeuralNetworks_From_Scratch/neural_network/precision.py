@@ -0,0 +1,43 @@
+import numpy as np
+
+class Policy:
+    """
+    Dtype policy for a model.
+
+    `param_dtype` is the dtype of the master weights the optimizer updates,
+    `compute_dtype` the dtype of activations, gradients and matmuls. When
+    they differ (mixed precision) the model keeps a compute-dtype copy of
+    the weights that is refreshed after every optimizer step.
+    """
+    def __init__(self, compute_dtype=np.float64, param_dtype=None):
+        self.compute_dtype = np.dtype(compute_dtype)
+        self.param_dtype = np.dtype(param_dtype if param_dtype is not None else compute_dtype)
+        if self.compute_dtype.kind != 'f' or self.param_dtype.kind != 'f':
+            raise ValueError("Policy dtypes must be floating point")
+
+    @property
+    def mixed(self):
+        return self.compute_dtype != self.param_dtype
+
+    def __repr__(self):
+        return f"Policy(compute_dtype={self.compute_dtype.name}, param_dtype={self.param_dtype.name})"
+
+POLICIES = {
+    'float64': Policy(np.float64),
+    'float32': Policy(np.float32),
+    'mixed': Policy(np.float32, np.float64),
+}
+
+def get_policy(policy):
+    """
+    Resolve a policy name ('float64', 'float32', 'mixed'), a numpy dtype
+    or an existing Policy into a Policy.
+    """
+    if isinstance(policy, Policy):
+        return policy
+    if isinstance(policy, str) and policy in POLICIES:
+        return POLICIES[policy]
+    try:
+        return Policy(np.dtype(policy))
+    except TypeError:
+        raise ValueError(f"Unknown dtype policy: {policy!r}") from None
@@ -0,0 +1,241 @@
+import numpy as np
+from .loss_functions import SoftmaxCrossEntropy
+from .callbacks import Callback
+from .data import normalize
+from .inference import ChunkedInference
+from .sparse import CSRMatrix
+
+GRANULARITIES = ('weight', 'row')
+
+def magnitude_mask(W, sparsity, granularity='weight'):
+    """
+    Keep-mask that removes the `sparsity` fraction of W with the smallest
+    magnitude: single weights ('weight') or whole input rows by L2 norm
+    ('row', i.e. input features dropped from the layer).
+
+    Returns:
+        bool array shaped like W (True = kept)
+    """
+    if granularity == 'weight':
+        scores = np.abs(W).reshape(-1)
+    elif granularity == 'row':
+        scores = np.sqrt(np.einsum('ij,ij->i', W, W, dtype=np.float64))
+    else:
+        raise ValueError(f"Unknown granularity: {granularity!r} (expected one of {GRANULARITIES})")
+    n_pruned = int(round(sparsity * scores.shape[0]))
+    keep = np.ones(scores.shape[0], dtype=bool)
+    if n_pruned:
+        keep[np.argpartition(scores, n_pruned - 1)[:n_pruned]] = False
+    if granularity == 'row':
+        return np.repeat(keep[:, None], W.shape[1], axis=1)
+    return keep.reshape(W.shape)
+
+class MagnitudePruning(Callback):
+    """
+    Gradual magnitude pruning during fit (the cubic schedule of Zhu & Gupta,
+    2017).
+
+    Sparsity ramps from `initial_sparsity` at `begin_step` to
+    `target_sparsity` at `end_step` (batches counted over the whole run;
+    default: 75% of the run, leaving the rest to recover), re-pruning
+    every `frequency` batches:
+
+        s(t) = target + (initial - target) * (1 - (t - begin) / (end - begin)) ** 3
+
+    After every batch the masks are re-applied to the weights, so pruned
+    weights stay exactly zero whatever the optimizer does. `layers`
+    defaults to every weight matrix but the output layer's (none at all
+    for a model without hidden layers).
+
+    Args:
+        target_sparsity: Final fraction of pruned weights per layer
+        layers: Parameter names to prune, e.g. ['W1']
+        granularity: 'weight' (unstructured, smallest files) or 'row'
+            (whole input rows, which is what makes inference faster;
+            see PrunedModel)
+        initial_sparsity: Sparsity at the first pruning step
+        begin_step, end_step: Batch range of the schedule
+        frequency: Batches between pruning steps
+    """
+    def __init__(self, target_sparsity=0.9, layers=None, granularity='weight',
+                 initial_sparsity=0.0, begin_step=0, end_step=None, frequency=100):
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity!r} (expected one of {GRANULARITIES})")
+        self.target_sparsity = target_sparsity
+        self.layers = layers
+        self.granularity = granularity
+        self.initial_sparsity = initial_sparsity
+        self.begin_step = begin_step
+        self.end_step = end_step
+        self.frequency = max(frequency, 1)
+        self.masks = {}
+        self.sparsity = 0.0
+        self._end = None
+        self._step = 0
+
+    def sparsity_at(self, step):
+        """Scheduled sparsity at batch `step`"""
+        if step < self.begin_step:
+            return 0.0
+        progress = min(1.0, (step - self.begin_step) / max(self._end - self.begin_step, 1))
+        return self.target_sparsity + (self.initial_sparsity - self.target_sparsity) * (1 - progress) ** 3
+
+    def on_train_start(self, logs):
+        total = logs['epochs'] * logs['n_batches']
+        self._end = self.end_step if self.end_step is not None else int(0.75 * total)
+        if self.layers is None:
+            n_layers = len(self.model.params) // 2
+            # Never the output layer: a model without hidden layers prunes nothing
+            self.layers = [f'W{i}' for i in range(1, n_layers)]
+        self.masks = {}
+        self._step = 0
+
+    def on_batch_end(self, batch, logs):
+        step = self._step
+        self._step += 1
+        if self.begin_step <= step <= self._end and \
+                ((step - self.begin_step) % self.frequency == 0 or step == self._end):
+            self.sparsity = self.sparsity_at(step)
+            # Already-pruned weights are zero, so they are pruned first
+            # and the masks only ever grow
+            self.masks = {name: magnitude_mask(self.model.params[name], self.sparsity,
+                                               self.granularity)
+                          for name in self.layers}
+        if self.masks:
+            for name, mask in self.masks.items():
+                W = self.model.params[name]
+                np.multiply(W, mask, out=W)
+            self.model.sync_params()
+
+def layer_sparsity(model):
+    """Fraction of exactly-zero weights of every weight matrix, by name"""
+    return {name: 1.0 - np.count_nonzero(model.params[name]) / model.params[name].size
+            for name in model.params if name.startswith('W')}
+
+class PrunedModel(ChunkedInference):
+    """
+    Inference copy of a pruned SimpleNN / Sequential with its sparse weight
+    matrices stored compactly.
+
+    Storage: every weight matrix with density <= `max_density` is kept as
+    a sparse.CSRMatrix over its input rows (nonzero values in `dtype`,
+    int16 column ids); denser ones stay dense. save() writes exactly these
+    arrays, so the file shrinks with the sparsity.
+
+    Forward kernel: input rows that hold no weight at all are skipped. A
+    layer multiplies only the kept input features (one np.take) by the
+    dense block of its kept rows, a BLAS GEMM whose cost scales with the
+    kept rows. Row-pruned layers (MagnitudePruning(granularity='row'))
+    therefore run proportionally faster. Unstructured sparsity shrinks the
+    file, but its rows are rarely empty, so it does not speed up this
+    kernel. Per-nonzero NumPy kernels lose to dense BLAS (see
+    sparse.CSRMatrix).
+    """
+
+    def __init__(self, model, dtype=None, max_density=0.5):
+        dtype = np.dtype(dtype or model.policy.compute_dtype)
+        n_layers = len(model.activations)
+        weights = []
+        for i in range(1, n_layers + 1):
+            W = np.asarray(model.params[f'W{i}'], dtype=dtype)
+            density = np.count_nonzero(W) / max(W.size, 1)
+            weights.append(CSRMatrix.from_dense(W) if density <= max_density else W.copy())
+        biases = [np.asarray(model.params[f'b{i}'], dtype=dtype).reshape(1, -1)
+                  for i in range(1, n_layers + 1)]
+        self._build(weights, biases, list(model.activations), dtype)
+
+    def _build(self, weights, biases, activations, dtype):
+        for activation in activations:
+            if activation not in ('relu', 'linear'):
+                raise ValueError(f"Unsupported activation: {activation}")
+        self.dtype = dtype
+        self.weights = weights
+        self.biases = biases
+        self.activations = activations
+        self.input_size = weights[0].shape[0]
+        self.output_size = weights[-1].shape[1]
+        self.loss_fn = SoftmaxCrossEntropy(dtype)
+        # Compute form: kept input rows (None = all) and their dense block
+        self.layers = []
+        for W in weights:
+            if isinstance(W, CSRMatrix):
+                rows = np.flatnonzero(np.diff(W.indptr))
+                block = W.take(rows).to_dense()
+                self.layers.append((rows if rows.shape[0] < W.shape[0] else None, block))
+            else:
+                self.layers.append((None, W))
+
+    @property
+    def nbytes(self):
+        """Bytes of the stored weights and biases"""
+        return sum(W.nbytes for W in self.weights) + sum(b.nbytes for b in self.biases)
+
+    @property
+    def density(self):
+        """Fraction of nonzero weights over all layers"""
+        nnz = sum(W.nnz if isinstance(W, CSRMatrix) else np.count_nonzero(W) for W in self.weights)
+        return nnz / sum(W.shape[0] * W.shape[1] for W in self.weights)
+
+    def save(self, path):
+        """Write the compact weights to an .npz file"""
+        arrays = {'activations': np.array(self.activations), 'dtype': np.array(self.dtype.name)}
+        for i, (W, b) in enumerate(zip(self.weights, self.biases), start=1):
+            if isinstance(W, CSRMatrix):
+                arrays.update({f'W{i}.data': W.data, f'W{i}.indices': W.indices,
+                               f'W{i}.indptr': W.indptr, f'W{i}.shape': np.array(W.shape)})
+            else:
+                arrays[f'W{i}'] = W
+            arrays[f'b{i}'] = b
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """PrunedModel from a file written by save()"""
+        with np.load(path) as f:
+            activations = [str(a) for a in f['activations']]
+            weights, biases = [], []
+            for i in range(1, len(activations) + 1):
+                if f'W{i}' in f:
+                    weights.append(f[f'W{i}'])
+                else:
+                    weights.append(CSRMatrix(f[f'W{i}.data'], f[f'W{i}.indices'],
+                                             f[f'W{i}.indptr'], tuple(f[f'W{i}.shape'])))
+                biases.append(f[f'b{i}'])
+            dtype = np.dtype(str(f['dtype']))
+        model = cls.__new__(cls)
+        model._build(weights, biases, activations, dtype)
+        return model
+
+    def _allocate(self, chunk):
+        ws = {'raw': np.empty((chunk, self.input_size), dtype=np.uint8),
+              'rowbuf': np.empty((chunk, 1), dtype=self.dtype),
+              'dlogits': np.empty((chunk, self.output_size), dtype=self.dtype)}
+        for i, (rows, block) in enumerate(self.layers, start=1):
+            ws[f'in{i}'] = np.empty((chunk, block.shape[0]), dtype=self.dtype)
+            ws[f'A{i}'] = np.empty((chunk, block.shape[1]), dtype=self.dtype)
+        return ws
+
+    def _forward(self, X, ws):
+        """Logits for one chunk X (n <= workspace rows), uint8 pixels or floats"""
+        n = X.shape[0]
+        A = X
+        for i, ((rows, block), bias, activation) in enumerate(
+                zip(self.layers, self.biases, self.activations), start=1):
+            if i == 1:
+                # Gather the kept pixels before normalizing them
+                if rows is not None:
+                    A = np.take(X, rows, axis=1, out=ws['raw'][:n, :rows.shape[0]]) \
+                        if X.dtype == np.uint8 else np.take(X, rows, axis=1)
+                A = normalize(A, self.dtype, out=ws['in1'][:n])
+            elif rows is not None:
+                A = np.take(A, rows, axis=1, out=ws[f'in{i}'][:n])
+            Z = np.matmul(A, block, out=ws[f'A{i}'][:n])
+            np.add(Z, bias, out=Z)
+            if activation == 'relu':
+                np.maximum(Z, 0, out=Z)
+            A = Z
+        return A
+
+def sparsify(model, dtype=None, max_density=0.5):
+    """Compact inference copy of a pruned model (see PrunedModel)"""
+    return PrunedModel(model, dtype, max_density)
@@ -0,0 +1,142 @@
+import numpy as np
+from .inference import ChunkedInference
+from .loss_functions import SoftmaxCrossEntropy
+
+# Rows of the reduction dimension per float32 BLAS call. Every product of a
+# uint8 activation and an int8 weight is at most 255 * 127, so any partial
+# sum over a block this size stays below 2**24 and is exact in float32.
+EXACT_BLOCK = 2 ** 24 // (255 * 127)
+
+def quantize_per_channel(W):
+    """
+    Symmetric int8 quantization with one scale per output channel (column).
+
+    Returns:
+        Wq (int8, same shape as W), scales (float32, (W.shape[1],))
+    """
+    W = np.asarray(W, dtype=np.float64)
+    scales = np.max(np.abs(W), axis=0) / 127.0
+    scales[scales == 0] = 1.0
+    Wq = np.clip(np.rint(W / scales), -127, 127).astype(np.int8)
+    return Wq, scales.astype(np.float32)
+
+def int_matmul(A, Wq, acc, wbuf, partial, block=EXACT_BLOCK):
+    """
+    acc (int32) = A @ Wq, where A holds integers in [0, 255] (uint8 or a
+    float32 array of integral values) and Wq is int8.
+
+    NumPy has no int8 GEMM kernel (its integer matmul is a naive loop, tens
+    of times slower than BLAS), so the integer products are computed with
+    float32 BLAS over blocks of `block` rows of Wq, which keeps every
+    partial sum exact, and accumulated in int32. The result equals an
+    int32-accumulated integer matmul bit for bit.
+
+    Args:
+        wbuf: float32 scratch, at least (block, Wq.shape[1])
+        partial: float32 scratch shaped like acc
+    """
+    n_in = Wq.shape[0]
+    for start in range(0, n_in, block):
+        stop = min(start + block, n_in)
+        w = wbuf[:stop - start, :Wq.shape[1]]
+        np.copyto(w, Wq[start:stop])
+        np.matmul(A[:, start:stop], w, out=partial)
+        if start == 0:
+            np.copyto(acc, partial, casting='unsafe')
+        else:
+            np.add(acc, partial, out=acc, casting='unsafe')
+    return acc
+
+class QuantizedModel(ChunkedInference):
+    """
+    Post-training int8 version of a trained SimpleNN / Sequential for
+    inference.
+
+    Weights are stored as int8 with a float32 scale per output channel;
+    biases stay float32. The input layer consumes uint8 pixels directly
+    (scale 1/255, matching data.normalize). Hidden activations are
+    re-quantized to [0, 255] with a dynamic scale per row after each ReLU,
+    so results do not depend on the chunk size. Every layer accumulates
+    into int32 and is dequantized to float32 once per output element.
+
+    This is a size and bandwidth saving, not a latency one: the weights
+    take a quarter of float32's bytes (to store, ship or keep resident),
+    but int_matmul still runs float32 BLAS on them plus the int8 -> float32
+    and int32 casts, so predict is slower than the float32 model's.
+    """
+    dtype = np.dtype(np.float32)
+
+    def __init__(self, model):
+        self.layers = []
+        for i, activation in enumerate(model.activations, start=1):
+            if activation not in ('relu', 'linear'):
+                raise ValueError(f"Unsupported activation for quantization: {activation}")
+            Wq, scales = quantize_per_channel(model.params[f'W{i}'])
+            bias = np.asarray(model.params[f'b{i}'], dtype=np.float32).reshape(1, -1)
+            self.layers.append((Wq, scales, bias, activation))
+        self.input_size = self.layers[0][0].shape[0]
+        self.output_size = self.layers[-1][0].shape[1]
+        self.loss_fn = SoftmaxCrossEntropy(np.float32)
+
+    @property
+    def nbytes(self):
+        """Bytes of weights, scales and biases"""
+        return sum(Wq.nbytes + scales.nbytes + bias.nbytes
+                   for Wq, scales, bias, _ in self.layers)
+
+    def _allocate(self, chunk):
+        widths = [Wq.shape[1] for Wq, _, _, _ in self.layers]
+        ws = {
+            'A0': np.empty((chunk, self.input_size), dtype=np.float32),
+            'wbuf': np.empty((min(EXACT_BLOCK, max(Wq.shape[0] for Wq, _, _, _ in self.layers)),
+                              max(widths)), dtype=np.float32),
+            'rowscale': np.empty((chunk, 1), dtype=np.float32),
+            'rowbuf': np.empty((chunk, 1), dtype=np.float32),
+        }
+        for i, width in enumerate(widths, start=1):
+            ws[f'acc{i}'] = np.empty((chunk, width), dtype=np.int32)
+            ws[f'A{i}'] = np.empty((chunk, width), dtype=np.float32)
+        ws['dlogits'] = np.empty((chunk, widths[-1]), dtype=np.float32)
+        return ws
+
+    def _quantize_input(self, X, out):
+        """uint8 pixels as-is; float inputs in [0, 1] are rounded to 1/255 steps"""
+        if X.dtype == np.uint8:
+            np.copyto(out, X)
+        else:
+            np.multiply(X, 255, out=out, casting='unsafe')
+            np.rint(out, out=out)
+            np.clip(out, 0, 255, out=out)
+        return out
+
+    def _forward(self, X, ws):
+        """float32 logits for one chunk X (n <= workspace rows)"""
+        n = X.shape[0]
+        A = self._quantize_input(X, ws['A0'][:n])
+        rowscale = ws['rowscale'][:n]
+        rowscale.fill(1.0 / 255)
+        for i, (Wq, scales, bias, activation) in enumerate(self.layers, start=1):
+            acc = int_matmul(A, Wq, ws[f'acc{i}'][:n], ws['wbuf'], ws[f'A{i}'][:n])
+            # Dequantize: z = acc * row_scale * channel_scale + bias
+            Z = ws[f'A{i}'][:n]
+            np.copyto(Z, acc, casting='same_kind')
+            np.multiply(Z, rowscale, out=Z)
+            np.multiply(Z, scales, out=Z)
+            np.add(Z, bias, out=Z)
+            if activation == 'linear':
+                A = Z
+                continue
+            np.maximum(Z, 0, out=Z)
+            if i < len(self.layers):
+                # Requantize this layer's output to [0, 255] per row
+                np.max(Z, axis=1, out=rowscale[:, 0])
+                np.multiply(rowscale, 1 / 255, out=rowscale)
+                rowscale[rowscale == 0] = 1.0
+                np.divide(Z, rowscale, out=Z)
+                np.rint(Z, out=Z)
+            A = Z
+        return A
+
+def quantize(model):
+    """Post-training int8 quantization of a trained model (see QuantizedModel)"""
+    return QuantizedModel(model)
@@ -0,0 +1,199 @@
+import numpy as np
+from .callbacks import Callback
+
+class Schedule:
+    """
+    Learning rate as a function of the optimizer step.
+
+    Pass a schedule as an optimizer's `learning_rate`. The whole schedule is
+    computed once, vectorized, for `total_steps` steps (when it is None,
+    fit() builds it for its own step count without changing the setting);
+    each optimizer step is then a list lookup. Steps past the end keep the
+    last value.
+    """
+    def __init__(self, total_steps=None):
+        self.total_steps = total_steps
+        self._table = None
+        self._key = None
+
+    def values(self, n_steps):
+        """Learning rates for steps 0 .. n_steps-1 as an array"""
+        raise NotImplementedError
+
+    @property
+    def n_steps(self):
+        """Length of the current table (None before the first build)"""
+        return None if self._table is None else len(self._table)
+
+    def build(self, total_steps=None):
+        """
+        Compute the table for `total_steps` steps (default: the schedule's
+        own total_steps). It is cached on the length and hyperparameters,
+        so a reused schedule is rebuilt exactly when either changed.
+        """
+        n_steps = total_steps if total_steps is not None else self.total_steps
+        if n_steps is None:
+            raise ValueError(f"{type(self).__name__} needs total_steps "
+                             "(pass it, or let fit() set it)")
+        key = (n_steps, self.get_config())
+        if key != self._key:
+            # Python floats: they stay weakly typed in float32 updates
+            self._table = np.asarray(self.values(n_steps), dtype=np.float64).tolist()
+            self._key = key
+
+    def __call__(self, step):
+        if self._table is None:
+            self.build()
+        return self._table[min(step, len(self._table) - 1)]
+
+    def get_config(self):
+        return {'total_steps': self.total_steps}
+
+class StepSchedule(Schedule):
+    """lr * gamma ** (step // step_size)"""
+    def __init__(self, learning_rate, step_size, gamma=0.1, total_steps=None):
+        super().__init__(total_steps)
+        self.learning_rate = learning_rate
+        self.step_size = step_size
+        self.gamma = gamma
+
+    def values(self, n_steps):
+        return self.learning_rate * self.gamma ** (np.arange(n_steps) // self.step_size)
+
+    def get_config(self):
+        return {'learning_rate': self.learning_rate, 'step_size': self.step_size,
+                'gamma': self.gamma, 'total_steps': self.total_steps}
+
+class CosineSchedule(Schedule):
+    """Cosine decay from `learning_rate` to `min_lr` over total_steps"""
+    def __init__(self, learning_rate, total_steps=None, min_lr=0.0):
+        super().__init__(total_steps)
+        self.learning_rate = learning_rate
+        self.min_lr = min_lr
+
+    def values(self, n_steps):
+        progress = np.arange(n_steps) / max(n_steps - 1, 1)
+        return self.min_lr + 0.5 * (self.learning_rate - self.min_lr) * (1 + np.cos(np.pi * progress))
+
+    def get_config(self):
+        return {'learning_rate': self.learning_rate, 'total_steps': self.total_steps,
+                'min_lr': self.min_lr}
+
+class OneCycleSchedule(Schedule):
+    """
+    One-cycle policy: cosine ramp from max_lr / div_factor up to max_lr over
+    the first pct_start of training, then cosine decay down to
+    max_lr / (div_factor * final_div_factor).
+    """
+    def __init__(self, max_lr, total_steps=None, pct_start=0.3, div_factor=25.0,
+                 final_div_factor=1e4):
+        super().__init__(total_steps)
+        self.max_lr = max_lr
+        self.pct_start = pct_start
+        self.div_factor = div_factor
+        self.final_div_factor = final_div_factor
+
+    def values(self, n_steps):
+        start_lr = self.max_lr / self.div_factor
+        final_lr = start_lr / self.final_div_factor
+        peak = max(int(self.pct_start * n_steps), 1)
+        steps = np.arange(n_steps)
+        up = np.minimum(steps / peak, 1.0)
+        down = np.clip((steps - peak) / max(n_steps - 1 - peak, 1), 0.0, 1.0)
+        lr = start_lr + (self.max_lr - start_lr) * 0.5 * (1 - np.cos(np.pi * up))
+        return np.where(steps < peak, lr,
+                        final_lr + (self.max_lr - final_lr) * 0.5 * (1 + np.cos(np.pi * down)))
+
+    def get_config(self):
+        return {'max_lr': self.max_lr, 'total_steps': self.total_steps,
+                'pct_start': self.pct_start, 'div_factor': self.div_factor,
+                'final_div_factor': self.final_div_factor}
+
+class WarmupSchedule(Schedule):
+    """
+    Linear warmup over `warmup_steps` into another schedule (or a constant
+    learning rate).
+    """
+    def __init__(self, schedule, warmup_steps, total_steps=None):
+        super().__init__(total_steps)
+        self.schedule = schedule
+        self.warmup_steps = warmup_steps
+
+    def values(self, n_steps):
+        if isinstance(self.schedule, Schedule):
+            # Evaluated over this run's length; the inner schedule is not modified
+            base = np.asarray(self.schedule.values(n_steps), dtype=np.float64)
+        else:
+            base = np.full(n_steps, float(self.schedule))
+        return base * np.minimum((np.arange(n_steps) + 1) / self.warmup_steps, 1.0)
+
+    def get_config(self):
+        schedule = self.schedule
+        if isinstance(schedule, Schedule):
+            schedule = schedule_to_config(schedule)
+        return {'schedule': schedule, 'warmup_steps': self.warmup_steps,
+                'total_steps': self.total_steps}
+
+SCHEDULES = {cls.__name__: cls for cls in
+             (StepSchedule, CosineSchedule, OneCycleSchedule, WarmupSchedule)}
+
+def schedule_to_config(schedule):
+    """
+    JSON-serializable description of a schedule. A schedule fit() sized
+    records the length it was built for, so a resumed run continues the
+    same curve.
+    """
+    config = schedule.get_config()
+    if config.get('total_steps') is None and schedule.n_steps is not None:
+        config['total_steps'] = schedule.n_steps
+    return {'class': type(schedule).__name__, 'config': config}
+
+def schedule_from_config(config):
+    """Inverse of schedule_to_config"""
+    kwargs = dict(config['config'])
+    if isinstance(kwargs.get('schedule'), dict):
+        kwargs['schedule'] = schedule_from_config(kwargs['schedule'])
+    return SCHEDULES[config['class']](**kwargs)
+
+class ReduceLROnPlateau(Callback):
+    """
+    Multiplies the optimizer's lr_scale by `factor` when `monitor` has not
+    improved for `patience` epochs (works on top of any schedule).
+
+    Args:
+        monitor: Epoch log key, e.g. 'val_loss'
+        factor: Scale applied on each plateau
+        patience: Epochs without improvement before reducing
+        min_scale: Lower bound on the accumulated scale
+        optimizer: Defaults to the optimizer fit() uses
+    """
+    def __init__(self, monitor='val_loss', factor=0.1, patience=3, min_delta=0.0,
+                 min_scale=1e-4, optimizer=None):
+        self.monitor = monitor
+        self.factor = factor
+        self.patience = patience
+        self.min_delta = abs(min_delta)
+        self.min_scale = min_scale
+        self.optimizer = optimizer
+        self.sign = -1 if 'acc' in monitor else 1
+        self.best = None
+        self._wait = 0
+
+    def on_train_start(self, logs):
+        self.best = None
+        self._wait = 0
+        if self.optimizer is None:
+            self.optimizer = logs.get('optimizer')
+
+    def on_epoch_end(self, epoch, logs):
+        value = logs.get(self.monitor)
+        if value is None:
+            return
+        if self.best is None or self.sign * (self.best - value) > self.min_delta:
+            self.best = value
+            self._wait = 0
+            return
+        self._wait += 1
+        if self._wait >= self.patience:
+            self.optimizer.lr_scale = max(self.optimizer.lr_scale * self.factor, self.min_scale)
+            self._wait = 0
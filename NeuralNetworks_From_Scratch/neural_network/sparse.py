@@ -0,0 +1,157 @@
+import numpy as np
+
+class CSRMatrix:
+    """
+    Compressed sparse row matrix for mostly-zero inputs (e.g. MNIST pixels).
+
+    Stores the nonzero values (`data`, in the input's dtype), their column
+    `indices` (int16 when the width allows) and the row pointer `indptr`.
+    Built once from dense (or memory-mapped) data; mini-batches are
+    gathered with `take` and multiplied with `matmul` / `t_matmul`, so the
+    first layer's forward and weight-gradient cost scales with the columns
+    a batch actually touches instead of all features.
+    """
+    def __init__(self, data, indices, indptr, shape):
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = tuple(shape)
+
+    @classmethod
+    def from_dense(cls, X, chunk_rows=4096):
+        """Compress X (n_samples, n_features) chunk by chunk (memmap friendly)"""
+        n_rows, n_cols = X.shape
+        index_dtype = np.int16 if n_cols <= np.iinfo(np.int16).max else np.int32
+        data, indices, counts = [], [], []
+        for start in range(0, n_rows, chunk_rows):
+            chunk = np.asarray(X[start:start + chunk_rows])
+            rows, cols = np.nonzero(chunk)
+            data.append(chunk[rows, cols])
+            indices.append(cols.astype(index_dtype))
+            counts.append(np.bincount(rows, minlength=chunk.shape[0]))
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        if counts:
+            np.cumsum(np.concatenate(counts), out=indptr[1:])
+        return cls(np.concatenate(data) if data else np.empty(0, X.dtype),
+                   np.concatenate(indices) if indices else np.empty(0, index_dtype),
+                   indptr, X.shape)
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def nnz(self):
+        return int(self.indptr[-1])
+
+    @property
+    def density(self):
+        return self.nnz / max(self.shape[0] * self.shape[1], 1)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.indices.nbytes + self.indptr.nbytes
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, rows):
+        """Row slice (views, no copy) or row gather (see take)"""
+        if isinstance(rows, slice):
+            start, stop, step = rows.indices(self.shape[0])
+            if step == 1:
+                stop = max(start, stop)
+                lo, hi = self.indptr[start], self.indptr[stop]
+                return CSRMatrix(self.data[lo:hi], self.indices[lo:hi],
+                                 self.indptr[start:stop + 1] - lo, (stop - start, self.shape[1]))
+            rows = np.arange(start, stop, step)
+        return self.take(rows)
+
+    def take(self, rows, dtype=None, scale=None):
+        """
+        Gather rows into a new CSRMatrix, optionally converting the values
+        to `dtype` and multiplying them by `scale` (e.g. 1/255 to normalize).
+        """
+        rows = np.asarray(rows)
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        indptr = np.zeros(rows.shape[0] + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        # Position in self.data of every gathered nonzero
+        positions = np.repeat(starts - indptr[:-1], lengths)
+        positions += np.arange(indptr[-1])
+        data = self.data[positions]
+        if dtype is not None:
+            data = data.astype(dtype, copy=False)
+        if scale is not None:
+            np.multiply(data, data.dtype.type(scale), out=data)
+        return CSRMatrix(data, self.indices[positions], indptr, (rows.shape[0], self.shape[1]))
+
+    def row_ids(self):
+        """Row index of every stored nonzero"""
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    def to_dense(self, out=None, scale=None):
+        """Dense (n_rows, n_features) array, optionally scaled, into `out`"""
+        if out is None:
+            out = np.zeros(self.shape, dtype=self.dtype)
+        else:
+            out.fill(0)
+        out[self.row_ids(), self.indices] = self.data
+        if scale is not None:
+            np.multiply(out, out.dtype.type(scale), out=out)
+        return out
+
+    def compact(self, dtype=None):
+        """
+        The rows restricted to the columns that hold a nonzero.
+
+        Returns:
+            cols (sorted column ids), dense (n_rows, len(cols)) block
+        """
+        present = np.bincount(self.indices, minlength=self.shape[1]) > 0
+        cols = np.flatnonzero(present)
+        position = np.cumsum(present) - 1
+        block = np.zeros((self.shape[0], cols.shape[0]), dtype=dtype or self.dtype)
+        block[self.row_ids(), position[self.indices]] = self.data
+        return cols, block
+
+    # Both kernels run BLAS on the compacted block, so their cost scales
+    # with the columns a batch touches. Pure-NumPy per-nonzero kernels
+    # (gather + add.reduceat) measured slower at every density on MNIST
+    # sized batches; see benchmarks/sparse.py.
+
+    def matmul(self, W, out=None):
+        """self @ W for a dense W (n_features, k)"""
+        cols, block = self.compact(np.result_type(self.dtype, W.dtype))
+        return np.matmul(block, W[cols], out=out)
+
+    def t_matmul(self, G, out=None):
+        """self.T @ G for a dense G (n_rows, k), e.g. the first layer's dW"""
+        if out is None:
+            out = np.empty((self.shape[1], G.shape[1]), dtype=np.result_type(self.dtype, G.dtype))
+        cols, block = self.compact(out.dtype)
+        out.fill(0)
+        out[cols] = np.matmul(block.T, G)
+        return out
+
+def matmul(X, W, out=None):
+    """X @ W for a dense or CSRMatrix X"""
+    if isinstance(X, CSRMatrix):
+        return X.matmul(W, out=out)
+    return np.matmul(X, W, out=out)
+
+def t_matmul(X, G, out=None):
+    """X.T @ G for a dense or CSRMatrix X"""
+    if isinstance(X, CSRMatrix):
+        return X.t_matmul(G, out=out)
+    return np.matmul(X.T, G, out=out)
+
+def input_density(X, sample_rows=2048):
+    """Fraction of nonzero inputs, estimated from up to `sample_rows` evenly spaced rows"""
+    if isinstance(X, CSRMatrix):
+        return X.density
+    n = X.shape[0]
+    rows = np.linspace(0, n - 1, min(sample_rows, n)).astype(np.intp) if n else np.empty(0, np.intp)
+    sample = np.asarray(X[rows])
+    return np.count_nonzero(sample) / max(sample.size, 1)
@@ -0,0 +1,274 @@
+import glob
+import mmap
+import os
+import numpy as np
+from .data import read_idx, normalize, prefetch_batches
+
+class _FileShard:
+    """Rows of a C-ordered array stored at `offset` in a file, read with readinto"""
+    def __init__(self, path, offset, shape, dtype):
+        self.path = os.fspath(path)
+        self.offset = offset
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = int(np.prod(self.shape[1:], dtype=np.int64)) * self.dtype.itemsize
+
+    @classmethod
+    def from_memmap(cls, array):
+        return cls(array.filename, array.offset, array.shape, array.dtype)
+
+    @classmethod
+    def from_npy(cls, path):
+        array = np.load(path, mmap_mode='r')
+        if not array.flags.c_contiguous:
+            raise ValueError(f"Fortran-ordered .npy files are not supported: {path}")
+        return cls.from_memmap(array)
+
+    def reader(self):
+        return open(self.path, 'rb', buffering=0)
+
+    def read(self, f, start, out):
+        """Read rows [start, start + len(out)) into `out` (contiguous)"""
+        f.seek(self.offset + start * self.row_bytes)
+        view = memoryview(out.reshape(-1).view(np.uint8))
+        while view.nbytes:
+            n = f.readinto(view)
+            if not n:
+                raise EOFError(f"{self.path} is truncated")
+            view = view[n:]
+        return out
+
+class _ArrayShard:
+    """Rows of an in-memory (or already memory-mapped) array"""
+    def __init__(self, array):
+        self.array = array
+        self.shape = array.shape
+        self.dtype = array.dtype
+
+    def reader(self):
+        return None
+
+    def read(self, f, start, out):
+        np.copyto(out, self.array[start:start + out.shape[0]])
+        return out
+
+def _shard(source):
+    if isinstance(source, (str, os.PathLike)):
+        return _FileShard.from_npy(source)
+    # A whole memmap (np.load(mmap_mode='r'), read_idx) is streamed with
+    # plain reads; slices and other arrays are copied from directly
+    if isinstance(source, np.memmap) and isinstance(source.base, mmap.mmap) \
+            and source.flags.c_contiguous:
+        return _FileShard.from_memmap(source)
+    return _ArrayShard(np.asarray(source))
+
+class ShardedDataset:
+    """
+    Training data streamed from disk in sequential blocks, for datasets
+    larger than RAM.
+
+    A dataset is a list of (X, y) shards: .npy files, whole-file memmaps
+    (np.load(mmap_mode='r'), data.read_idx) or in-memory arrays. File
+    shards are read with plain sequential reads into a reused block
+    buffer, so neither the data nor its page mappings accumulate in the
+    process. Every epoch visits the blocks of all shards in a random
+    order and mixes their rows through a shuffle buffer (see
+    StreamingLoader); pass it to fit() in place of X_train (y_train=None).
+
+    Args:
+        shards: list of (X, y) pairs
+        shuffle_buffer: Rows held in the shuffle buffer (raw dtype)
+        block_rows: Rows per sequential read
+    """
+    def __init__(self, shards, shuffle_buffer=65536, block_rows=4096):
+        self.shards = [(_shard(X), _shard(y)) for X, y in shards]
+        for X, y in self.shards:
+            if X.shape[0] != y.shape[0]:
+                raise ValueError(f"Shard has {X.shape[0]} rows of X but {y.shape[0]} labels")
+            if X.shape[1:] != self.shards[0][0].shape[1:] or X.dtype != self.shards[0][0].dtype:
+                raise ValueError("All shards need the same row shape and dtype")
+        self.shuffle_buffer = shuffle_buffer
+        self.block_rows = block_rows
+
+    @classmethod
+    def from_directory(cls, directory, **kwargs):
+        """Shards written by write_shards (X_00000.npy, y_00000.npy, ...)"""
+        X_paths = sorted(glob.glob(os.path.join(directory, 'X_*.npy')))
+        if not X_paths:
+            raise FileNotFoundError(f"No X_*.npy shards in {directory}")
+        pairs = [(path, os.path.join(directory, 'y_' + os.path.basename(path)[2:]))
+                 for path in X_paths]
+        return cls(pairs, **kwargs)
+
+    @classmethod
+    def from_idx(cls, images_path, labels_path, **kwargs):
+        """One shard streamed straight from a pair of (uncompressed) IDX files"""
+        images = read_idx(images_path)
+        labels = read_idx(labels_path)
+        images_shard = _FileShard.from_memmap(images)
+        images_shard.shape = (images.shape[0], int(np.prod(images.shape[1:])))
+        dataset = cls([], **kwargs)
+        dataset.shards = [(images_shard, _FileShard.from_memmap(labels))]
+        return dataset
+
+    @property
+    def shape(self):
+        return (len(self),) + self.shards[0][0].shape[1:]
+
+    @property
+    def dtype(self):
+        return self.shards[0][0].dtype
+
+    @property
+    def label_dtype(self):
+        return self.shards[0][1].dtype
+
+    def __len__(self):
+        return sum(X.shape[0] for X, _ in self.shards)
+
+    def blocks(self, rng=None):
+        """(shard, start, stop) of every block, in random order when `rng` is given"""
+        blocks = [(shard, start, min(start + self.block_rows, X.shape[0]))
+                  for shard, (X, _) in enumerate(self.shards)
+                  for start in range(0, X.shape[0], self.block_rows)]
+        if rng is not None:
+            blocks = [blocks[i] for i in rng.permutation(len(blocks))]
+        return blocks
+
+    def loader(self, batch_size, shuffle=True, prefetch=2, dtype=np.float64, rng=None):
+        """StreamingLoader over this dataset (what fit uses)"""
+        return StreamingLoader(self, batch_size, shuffle=shuffle, prefetch=prefetch,
+                               dtype=dtype, rng=rng)
+
+def write_shards(X, y, directory, shard_rows=65536):
+    """
+    Write (X, y) as .npy shards of `shard_rows` rows for ShardedDataset,
+    one shard at a time (X may be a memmap larger than RAM).
+
+    Returns:
+        ShardedDataset.from_directory(directory)
+    """
+    os.makedirs(directory, exist_ok=True)
+    for i, start in enumerate(range(0, X.shape[0], shard_rows)):
+        stop = min(start + shard_rows, X.shape[0])
+        np.save(os.path.join(directory, f'X_{i:05d}.npy'), np.asarray(X[start:stop]))
+        np.save(os.path.join(directory, f'y_{i:05d}.npy'), np.asarray(y[start:stop]))
+    return ShardedDataset.from_directory(directory)
+
+class StreamingLoader:
+    """
+    Mini-batches from a ShardedDataset with shuffle-buffer semantics.
+
+    Blocks are read sequentially (in random block order) into a buffer of
+    `shuffle_buffer` raw rows. Each batch takes random rows of the buffer
+    and the stream refills their slots, so every row is seen exactly once
+    per epoch and memory is bounded by the buffer, not the dataset. Once
+    the stream is exhausted the buffer drains in random order.
+
+    Same iteration contract as data.BatchLoader: (X_batch, y_batch) views
+    into recycled, normalized buffers, prepared `prefetch` batches ahead
+    on a background thread.
+    """
+    def __init__(self, dataset, batch_size, shuffle=True, prefetch=2, dtype=np.float64, rng=None):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.prefetch = prefetch
+        self.dtype = np.dtype(dtype)
+        self.rng = rng if rng is not None else np.random.default_rng(np.random.randint(2**31))
+
+        row_shape = dataset.shape[1:]
+        capacity = max(dataset.shuffle_buffer, batch_size) if shuffle else batch_size
+        self._X = np.empty((capacity,) + row_shape, dtype=dataset.dtype)
+        self._y = np.empty(capacity, dtype=dataset.label_dtype)
+        self._block_X = np.empty((dataset.block_rows,) + row_shape, dtype=dataset.dtype)
+        self._block_y = np.empty(dataset.block_rows, dtype=dataset.label_dtype)
+        self._slots = [{'X': np.empty((batch_size,) + row_shape, dtype=self.dtype),
+                        'raw': np.empty((batch_size,) + row_shape, dtype=dataset.dtype),
+                        'y': np.empty(batch_size, dtype=dataset.label_dtype)}
+                       for _ in range(max(prefetch, 0) + 1)]
+
+    @property
+    def n_samples(self):
+        return len(self.dataset)
+
+    def __len__(self):
+        return -(-self.n_samples // self.batch_size)
+
+    def _stream(self):
+        """Yields (X, y) blocks in this epoch's block order"""
+        dataset = self.dataset
+        files = {}
+        try:
+            for shard, start, stop in dataset.blocks(self.rng if self.shuffle else None):
+                X_shard, y_shard = dataset.shards[shard]
+                if shard not in files:
+                    files[shard] = (X_shard.reader(), y_shard.reader())
+                X_file, y_file = files[shard]
+                n = stop - start
+                yield (X_shard.read(X_file, start, self._block_X[:n]),
+                       y_shard.read(y_file, start, self._block_y[:n]))
+        finally:
+            for pair in files.values():
+                for f in pair:
+                    if f is not None:
+                        f.close()
+
+    def _fill_buffer(self, stream, pending, dest):
+        """
+        Copy up to len(dest) streamed rows into buffer positions `dest`.
+        `pending` is the unconsumed rest of the current block, or None.
+
+        Returns:
+            rows copied, new pending
+        """
+        copied = 0
+        while copied < dest.shape[0]:
+            if pending is None:
+                pending = next(stream, None)
+                if pending is None:
+                    break
+            X_block, y_block = pending
+            n = min(dest.shape[0] - copied, X_block.shape[0])
+            positions = dest[copied:copied + n]
+            self._X[positions] = X_block[:n]
+            self._y[positions] = y_block[:n]
+            copied += n
+            pending = (X_block[n:], y_block[n:]) if n < X_block.shape[0] else None
+        return copied, pending
+
+    def _batch_positions(self):
+        """Yields buffer positions of every batch; the buffer is refilled behind them"""
+        capacity = self._X.shape[0]
+        stream = self._stream()
+        filled, pending = self._fill_buffer(stream, None, np.arange(capacity))
+        while filled:
+            k = min(self.batch_size, filled)
+            if self.shuffle:
+                positions = np.sort(self.rng.choice(filled, k, replace=False))
+            else:
+                positions = np.arange(k)
+            yield positions
+            # Refill the taken slots; once the stream runs dry, move rows
+            # from the buffer's tail into the remaining holes so that the
+            # live rows stay in [0, filled)
+            copied, pending = self._fill_buffer(stream, pending, positions)
+            if copied < k:
+                holes = positions[copied:]
+                tail_start = filled - holes.shape[0]
+                tail = np.setdiff1d(np.arange(tail_start, filled), holes, assume_unique=True)
+                holes = holes[holes < tail_start]
+                self._X[holes] = self._X[tail]
+                self._y[holes] = self._y[tail]
+                filled = tail_start
+
+    def _fill(self, slot, positions):
+        n = positions.shape[0]
+        raw = np.take(self._X, positions, axis=0, out=slot['raw'][:n])
+        y_batch = np.take(self._y, positions, out=slot['y'][:n])
+        return normalize(raw, self.dtype, out=slot['X'][:n]), y_batch
+
+    def __iter__(self):
+        # The buffer is refilled behind each batch, so batches are gathered
+        # (copied out) before the next positions are drawn
+        return prefetch_batches(self._batch_positions(), self._slots, self._fill, 'StreamingLoader')
@@ -0,0 +1,295 @@
+import itertools
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+from .callbacks import Callback, CSVSink
+from .model import SimpleNN
+from .optimizer import SGD, Adam
+
+# Trial settings not given by the search space
+DEFAULTS = {
+    'hidden_size': 128,
+    'dtype': 'float64',
+    'optimizer': 'adam',
+    'learning_rate': 0.001,
+    'momentum': 0.0,
+    'epochs': 10,
+    'batch_size': 128,
+    'seed': 0,
+}
+
+class Uniform:
+    """Random-search distribution: uniform on [low, high)"""
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng):
+        return float(rng.uniform(self.low, self.high))
+
+    def __repr__(self):
+        return f"Uniform({self.low}, {self.high})"
+
+class LogUniform(Uniform):
+    """Random-search distribution: log-uniform on [low, high), e.g. learning rates"""
+    def sample(self, rng):
+        return float(np.exp(rng.uniform(np.log(self.low), np.log(self.high))))
+
+    def __repr__(self):
+        return f"LogUniform({self.low}, {self.high})"
+
+def grid_search(space):
+    """
+    Every combination of a search space.
+
+    Args:
+        space: dict of setting -> list of values (other values are fixed)
+
+    Returns:
+        list of trial configs (dicts)
+    """
+    names = list(space)
+    choices = [value if isinstance(value, list) else [value] for value in space.values()]
+    return [dict(zip(names, values)) for values in itertools.product(*choices)]
+
+def random_search(space, n_trials, seed=0):
+    """
+    `n_trials` random configs: lists are sampled uniformly, Uniform /
+    LogUniform values from their distribution, anything else is fixed.
+    """
+    rng = np.random.default_rng(seed)
+    trials = []
+    for _ in range(n_trials):
+        config = {}
+        for name, value in space.items():
+            if isinstance(value, list):
+                value = value[rng.integers(len(value))]
+            elif isinstance(value, Uniform):
+                value = value.sample(rng)
+            config[name] = value
+        trials.append(config)
+    return trials
+
+class SharedArrays:
+    """
+    Arrays copied once into shared memory (in blocks of at most
+    COPY_BLOCK_BYTES, so a memmap is streamed rather than read whole) so
+    trial processes attach to them by name instead of receiving a pickled
+    copy each. Use as a context manager or call close().
+    """
+    COPY_BLOCK_BYTES = 16 << 20
+
+    def __init__(self, arrays):
+        self._shm = {}
+        self.spec = {}
+        for name, array in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            self._shm[name] = shm
+            self.spec[name] = (shm.name, array.shape, array.dtype.str)
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+            if array.ndim == 0:
+                np.copyto(shared, array)
+                continue
+            row_bytes = max(array[:1].nbytes, 1)
+            step = max(1, self.COPY_BLOCK_BYTES // row_bytes)
+            for start in range(0, array.shape[0], step):
+                np.copyto(shared[start:start + step], array[start:start + step])
+
+    @staticmethod
+    def attach(spec):
+        """Returns (SharedMemory handles to keep alive, dict of arrays)"""
+        shms = {name: shared_memory.SharedMemory(name=shm_name)
+                for name, (shm_name, _, _) in spec.items()}
+        arrays = {name: np.ndarray(shape, dtype=dtype, buffer=shms[name].buf)
+                  for name, (_, shape, dtype) in spec.items()}
+        return shms, arrays
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for shm in self._shm.values():
+            shm.close()
+            shm.unlink()
+        self._shm = {}
+
+class MedianPruner(Callback):
+    """
+    Stops a trial whose `monitor` value after an epoch is worse than the
+    median of the other trials at the same epoch.
+
+    Every trial writes its epoch values into its row of `history` (a
+    (n_trials, epochs) float array shared by all trial processes, NaN
+    where not reached yet), so trials running in parallel see each other.
+
+    Args:
+        min_epochs: Never prune before this many epochs
+        min_trials: Other trials that must have reached the epoch first
+        mode: 'min', 'max', or 'auto' (max for accuracies, else min)
+    """
+    def __init__(self, history, trial, monitor='val_accuracy', min_epochs=1, min_trials=3,
+                 mode='auto'):
+        if mode == 'auto':
+            mode = 'max' if 'acc' in monitor else 'min'
+        self.history = history
+        self.trial = trial
+        self.monitor = monitor
+        self.min_epochs = min_epochs
+        self.min_trials = min_trials
+        self.sign = 1 if mode == 'min' else -1
+        self.pruned_epoch = None
+        self._epochs = None
+
+    def on_train_start(self, logs):
+        self._epochs = logs['epochs']
+
+    def on_epoch_end(self, epoch, logs):
+        value = logs.get(self.monitor)
+        if value is None or epoch >= self.history.shape[1]:
+            return
+        self.history[self.trial, epoch] = value
+        # Nothing left to save on the last epoch
+        if epoch + 1 < self.min_epochs or epoch + 1 == self._epochs:
+            return
+        others = np.delete(self.history[:, epoch], self.trial)
+        others = others[~np.isnan(others)]
+        if others.shape[0] >= self.min_trials and \
+                self.sign * value > self.sign * np.median(others):
+            self.pruned_epoch = epoch + 1
+            self.model.stop_training = True
+
+def build_trial(config, input_size, output_size):
+    """SimpleNN and optimizer for one trial config (missing keys from DEFAULTS)"""
+    config = {**DEFAULTS, **config}
+    np.random.seed(config['seed'])
+    model = SimpleNN(input_size, config['hidden_size'], output_size, dtype=config['dtype'])
+    if config['optimizer'] == 'adam':
+        optimizer = Adam(config['learning_rate'])
+    elif config['optimizer'] == 'sgd':
+        optimizer = SGD(config['learning_rate'], momentum=config['momentum'])
+    else:
+        raise ValueError(f"Unknown optimizer: {config['optimizer']!r}")
+    return model, optimizer, config
+
+# Set in every trial process by _init_worker (or directly when serial)
+_state = {}
+
+def _init_worker(data_spec, history_spec):
+    shms, arrays = SharedArrays.attach({**data_spec, **history_spec})
+    _state.update(shms=shms, arrays=arrays)
+
+def _run_trial(trial, config, prune):
+    """Train one trial; returns its results row (never raises)"""
+    arrays = _state['arrays']
+    X, y = arrays['X_train'], arrays['y_train']
+    X_val, y_val = arrays.get('X_val'), arrays.get('y_val')
+    row = {'trial': trial, **config}
+    start = time.perf_counter()
+    try:
+        model, optimizer, full = build_trial(config, X.shape[1], int(y.max()) + 1)
+        callbacks = []
+        pruner = None
+        if prune and X_val is not None:
+            pruner = MedianPruner(arrays['history'], trial, **prune)
+            callbacks.append(pruner)
+        model.fit(X, y, X_val, y_val, epochs=full['epochs'], batch_size=full['batch_size'],
+                  optimizer=optimizer, verbose=False, callbacks=callbacks)
+        row['status'] = 'pruned' if pruner is not None and pruner.pruned_epoch else 'complete'
+        row['epochs_run'] = len(model.train_losses)
+        row['train_loss'] = model.train_losses[-1]
+        if model.val_losses:
+            row['val_loss'] = model.val_losses[-1]
+            row['val_accuracy'] = model.val_accuracies[-1]
+            row['best_val_accuracy'] = max(model.val_accuracies)
+    except Exception:
+        row['status'] = 'failed'
+        row['error'] = traceback.format_exc(limit=3)
+    row['seconds'] = time.perf_counter() - start
+    return row
+
+def run_sweep(trials, X_train, y_train, X_val=None, y_val=None, n_workers=1,
+              prune=None, output=None, on_result=None):
+    """
+    Run trials (from grid_search / random_search) in a pool of processes.
+
+    The data is copied into shared memory once; each trial process
+    attaches to it, builds its SimpleNN and optimizer from the config
+    (see build_trial and DEFAULTS) and trains with validation every epoch.
+    Give each process one BLAS thread (e.g. OPENBLAS_NUM_THREADS=1) so
+    n_workers trials run side by side.
+
+    Args:
+        prune: Optional MedianPruner keyword arguments, e.g.
+            {'monitor': 'val_accuracy', 'min_epochs': 2, 'min_trials': 3};
+            needs validation data
+        output: Optional CSV path for the results table
+        on_result: Optional callable(row) called as each trial finishes
+
+    Returns:
+        list of result rows (trial config, status, epochs_run, losses,
+        accuracies, seconds), best val_accuracy first
+    """
+    arrays = {'X_train': X_train, 'y_train': y_train}
+    if X_val is not None and y_val is not None:
+        arrays.update(X_val=X_val, y_val=y_val)
+    max_epochs = max(config.get('epochs', DEFAULTS['epochs']) for config in trials)
+    history = np.full((len(trials), max_epochs), np.nan)
+
+    rows = []
+    with SharedArrays(arrays) as data, SharedArrays({'history': history}) as shared_history:
+        if n_workers > 1:
+            with ProcessPoolExecutor(n_workers, initializer=_init_worker,
+                                     initargs=(data.spec, shared_history.spec)) as pool:
+                futures = [pool.submit(_run_trial, trial, config, prune)
+                           for trial, config in enumerate(trials)]
+                for future in as_completed(futures):
+                    rows.append(future.result())
+                    if on_result is not None:
+                        on_result(rows[-1])
+        else:
+            _init_worker(data.spec, shared_history.spec)
+            try:
+                for trial, config in enumerate(trials):
+                    rows.append(_run_trial(trial, config, prune))
+                    if on_result is not None:
+                        on_result(rows[-1])
+            finally:
+                shms = _state.pop('shms')
+                _state.clear()
+                for shm in shms.values():
+                    shm.close()
+
+    rows.sort(key=lambda row: -row.get('best_val_accuracy', -np.inf))
+    if output is not None:
+        fields = []
+        for row in rows:
+            fields.extend(key for key in row if key not in fields)
+        with CSVSink(output, fields) as sink:
+            for row in rows:
+                sink.write(row)
+    return rows
+
+def format_table(rows, columns=None):
+    """Results rows as an aligned text table"""
+    if not rows:
+        return ''
+    if columns is None:
+        columns = []
+        for row in rows:
+            columns.extend(key for key in row if key not in columns and key != 'error')
+
+    def cell(value):
+        if isinstance(value, float):
+            return f"{value:.4g}"
+        return '' if value is None else str(value)
+
+    cells = [[cell(row.get(column)) for column in columns] for row in rows]
+    widths = [max(len(column), *(len(line[i]) for line in cells)) for i, column in enumerate(columns)]
+    lines = ['  '.join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines.extend('  '.join(value.rjust(width) for value, width in zip(line, widths)) for line in cells)
+    return '\n'.join(lines)
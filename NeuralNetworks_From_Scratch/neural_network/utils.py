@@ -5,7 +5,7 @@ def accuracy(predictions, labels):
     Calculate accuracy given predictions and true labels.
     
     Args:
-        predictions: Softmax probabilities (batch_size, num_classes)
+        predictions: Softmax probabilities or logits (batch_size, num_classes)
         labels: True labels (batch_size,)
     
     Returns:
@@ -39,6 +39,9 @@ def shuffle_data(X, y):
 def create_mini_batches(X, y, batch_size):
     """
     Create mini-batches from the data.
+
+    Builds the whole list up front; data.BatchLoader streams shuffled,
+    prefetched batches without copying the dataset and is what fit uses.
     """
     batches = []
     for i in range(0, X.shape[0], batch_size):
@@ -0,0 +1,69 @@
+"""
+Hyperparameter sweep over SimpleNN / optimizer settings on MNIST.
+
+Runs a grid or random search in a pool of processes sharing one copy of
+the data, prunes trials that fall below the median validation accuracy,
+and writes the results table to a CSV file.
+
+    python sweep.py --search grid --workers 4
+    python sweep.py --search random --trials 20 --epochs 5 --output random.csv
+"""
+import argparse
+from neural_network.data import load_mnist
+from neural_network.sweep import (grid_search, random_search, run_sweep, format_table,
+                                  LogUniform)
+
+GRID = {
+    'hidden_size': [64, 128, 256],
+    'optimizer': ['adam', 'sgd'],
+    'learning_rate': [0.001, 0.01],
+    'momentum': 0.9,
+}
+
+RANDOM = {
+    'hidden_size': [64, 128, 256, 512],
+    'optimizer': ['adam', 'sgd'],
+    'learning_rate': LogUniform(1e-4, 1e-1),
+    'momentum': [0.0, 0.9],
+    'batch_size': [64, 128, 256],
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--search', choices=['grid', 'random'], default='grid')
+    parser.add_argument('--trials', type=int, default=12, help="random search trials")
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--dtype', default='float32')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--min-epochs', type=int, default=2,
+                        help="epochs before a trial can be pruned (0 disables pruning)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='sweep.csv')
+    args = parser.parse_args()
+
+    X_train, y_train = load_mnist(root='./data', train=True, download=True)
+    val_size = 10000
+    X_val, y_val = X_train[:val_size], y_train[:val_size]
+    X_train, y_train = X_train[val_size:], y_train[val_size:]
+
+    fixed = {'epochs': args.epochs, 'dtype': args.dtype}
+    if args.search == 'grid':
+        trials = grid_search({**GRID, **fixed})
+    else:
+        trials = random_search({**RANDOM, **fixed}, args.trials, seed=args.seed)
+    prune = {'min_epochs': args.min_epochs} if args.min_epochs else None
+    print(f"{len(trials)} trials on {args.workers} workers")
+
+    def report(row):
+        print(f"trial {row['trial']:3d} {row['status']:>8}: "
+              f"val_accuracy {row.get('val_accuracy', float('nan')):.4f} "
+              f"after {row.get('epochs_run', 0)} epochs, {row['seconds']:.1f} s")
+
+    rows = run_sweep(trials, X_train, y_train, X_val, y_val, n_workers=args.workers,
+                     prune=prune, output=args.output, on_result=report)
+    print()
+    print(format_table(rows))
+    print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()